@@ -0,0 +1,100 @@
+from abc import ABC, abstractmethod
+import math
+
+
+class CoolingSchedule(ABC):
+    """
+    The temperature of a simulated annealing run at every step.
+
+    Every schedule starts at the initial temperature on step 1. The geometric, linear and Lundy-Mees schedules reach
+    the final temperature on step max_time, the logarithmic schedule never reaches it and ignores it.
+
+    :var initial_temperature: The temperature of step 1
+    :var final_temperature: The temperature of step max_time
+    :var max_time: The amount of steps of the run
+    """
+
+    def __init__(self, initial_temperature: float, final_temperature: float, max_time: int):
+        if initial_temperature <= 0 or final_temperature <= 0:
+            raise ValueError("Temperatures must be positive")
+        self.initial_temperature: float = initial_temperature
+        self.final_temperature: float = final_temperature
+        self.max_time: int = max_time
+        self.steps: int = max(max_time - 1, 1)     # steps between the initial and the final temperature
+
+    @abstractmethod
+    def temperature(self, time: int) -> float:
+        """
+        Returns the temperature of step `time` (from 1)
+        """
+
+
+class LogarithmicCooling(CoolingSchedule):
+    """
+    T(t) = T0 * log(2) / log(t + 1), slow enough to converge to the global optimum given infinite time.
+    """
+
+    def temperature(self, time: int) -> float:
+        return self.initial_temperature * math.log(2) / math.log(time + 1)
+
+
+class GeometricCooling(CoolingSchedule):
+    """
+    T(t) = T0 * alpha^(t - 1), with alpha chosen to reach the final temperature on step max_time.
+    """
+
+    def __init__(self, initial_temperature: float, final_temperature: float, max_time: int):
+        super().__init__(initial_temperature, final_temperature, max_time)
+        self.alpha: float = (final_temperature / initial_temperature) ** (1 / self.steps)
+
+    def temperature(self, time: int) -> float:
+        return self.initial_temperature * self.alpha ** (time - 1)
+
+
+class LinearCooling(CoolingSchedule):
+    """
+    T(t) decreases by the same amount every step, from T0 to the final temperature on step max_time.
+    """
+
+    def __init__(self, initial_temperature: float, final_temperature: float, max_time: int):
+        super().__init__(initial_temperature, final_temperature, max_time)
+        self.decrement: float = (initial_temperature - final_temperature) / self.steps
+
+    def temperature(self, time: int) -> float:
+        return max(self.initial_temperature - self.decrement * (time - 1), self.final_temperature)
+
+
+class LundyMeesCooling(CoolingSchedule):
+    """
+    T(t + 1) = T(t) / (1 + beta * T(t)), or 1 / T(t) = 1 / T0 + beta * (t - 1), with beta chosen to reach the final
+    temperature on step max_time. Cools fast while hot and slowly once cold.
+    """
+
+    def __init__(self, initial_temperature: float, final_temperature: float, max_time: int):
+        super().__init__(initial_temperature, final_temperature, max_time)
+        self.beta: float = (1 / final_temperature - 1 / initial_temperature) / self.steps
+
+    def temperature(self, time: int) -> float:
+        return 1 / (1 / self.initial_temperature + self.beta * (time - 1))
+
+
+COOLING_SCHEDULES = {
+    "logarithmic": LogarithmicCooling,
+    "geometric": GeometricCooling,
+    "linear": LinearCooling,
+    "lundy-mees": LundyMeesCooling,
+}
+
+
+def get_cooling_schedule(name: str, initial_temperature: float, final_temperature: float,
+                         max_time: int) -> CoolingSchedule:
+    """
+    Returns the cooling schedule called `name`, one of COOLING_SCHEDULES
+
+    :param initial_temperature: The temperature of step 1
+    :param final_temperature: The temperature of step max_time
+    :param max_time: The amount of steps of the run
+    """
+    if name not in COOLING_SCHEDULES:
+        raise ValueError(f"Unknown cooling schedule {name}, expected one of {', '.join(COOLING_SCHEDULES)}")
+    return COOLING_SCHEDULES[name](initial_temperature, final_temperature, max_time)
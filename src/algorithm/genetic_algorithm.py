@@ -1,121 +1,164 @@
-import random
-
 import numpy as np
 
-from data_structure.magic_cube import MagicCube
-from algorithm.objective_function import ObjectiveFunction
+from data_structure.magic_cube import MagicCube, get_cube_values
+from data_structure.trajectory import Trajectory
+from algorithm.objective_function import ObjectiveFunction, OBJECTIVES
+from algorithm.search_monitor import SearchMonitor
 
 
 class GeneticAlgorithm:
 
-    def __init__(self, initial_cube: MagicCube, cube_size: int, iteration: int, population: int):
+    SELECTIONS = ("roulette", "tournament", "rank")
+
+    def __init__(self, initial_cube: MagicCube, cube_size: int, iteration: int, population: int,
+                 selection: str = "roulette", objective: str = "count"):
+        """
+        :param selection: Parent selection strategy, one of SELECTIONS
+        :param objective: The score the parents are selected by, one of objective_function.OBJECTIVES
+        """
+        if selection not in self.SELECTIONS:
+            raise ValueError(f"Unknown selection {selection}, expected one of {', '.join(self.SELECTIONS)}")
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective {objective}, expected one of {', '.join(OBJECTIVES)}")
         self.POPULATION_COUNT = population  # 300
         self.MAX_ITERATION = iteration  # 300
         self.MUTATION_CHANCE = 0.2
-        self.TARGET_VALUE = 109
+        self.SELECTION = selection
+        self.TOURNAMENT_SIZE = 3
+        self.OBJECTIVE = objective
+        self.TARGET_VALUE = ObjectiveFunction.get_max_value(cube_size)
         self.cube = initial_cube
         self.cube_size = cube_size
         self.iteration: int = 1
-        self.population: list[[MagicCube, int]] = []
-        self.range = []
-        self.states: list[MagicCube] = []
+        self.generations: int = 0                                  # generations completed
+        self.evaluations: int = 0                                  # cubes scored, initial population included
+        self.population: np.ndarray = np.empty((0, cube_size**3))  # one cube data per row
+        self.fitness: np.ndarray = np.empty(0)                     # objective value of each row of the population
+        self.scores: np.ndarray = np.empty(0)                      # score of each row, used to select the parents
+        self.states: Trajectory = Trajectory(initial_cube)  # initial cube, then the best child of each generation
         self.average: float = 0
+        self.monitor: SearchMonitor = SearchMonitor()       # progress reports and cancellation, once per generation
 
     def get_best_value(self) -> int:
-        return ObjectiveFunction.get_object_value(self.states[-1])
+        return int(self.states.values[-1])
 
     def get_average(self):
         return self.average
 
     def genetic_algorithm(self):
         self.population = self.__create_population()
-        for p in self.population:
-            if p[1] == self.TARGET_VALUE:
-                self.states.append(p[0])
-                return
+        self.__evaluate()
+        self.evaluations = len(self.population)
+        if self.__append_target():
+            return
         best = 0
         while self.iteration <= self.MAX_ITERATION:
-            self.__sort_population()
-            self.range = self.__create_range()
-            children: list[[MagicCube, int]] = []
-            for i in range(self.POPULATION_COUNT):
-                parent_one, parent_two = self.__get_parents()
-                child_one, child_two = self.__reproduce(parent_one, parent_two)
-                self.__mutate(child_one)
-                self.__mutate(child_two)
-                children.append([child_one, ObjectiveFunction.get_object_value(child_one)])
-                children.append([child_two, ObjectiveFunction.get_object_value(child_two)])
-            for c in children:
-                if c[1] == self.TARGET_VALUE:
-                    self.states.append(c[0])
-                    return
-            best = 0
-            best_instance = None
-            total = 0
-            for c in children:
-                total += c[1]
-                if c[1] > best:
-                    best_instance = c[0]
-                    best = c[1]
-            self.average = total / self.POPULATION_COUNT
-            self.states.append(best_instance)
+            parents = self.__select_parents()
+            children = self.__reproduce(self.population[parents[:, 0]], self.population[parents[:, 1]])
+            self.__mutate(children)
             self.population = children
+            self.__evaluate()
+            self.evaluations += len(children)
+            self.generations += 1
+            if self.__append_target():
+                return
+            best_index = int(np.argmax(self.fitness))
+            best = int(self.fitness[best_index])
+            self.average = float(self.fitness.mean())
+            self.states.append(MagicCube(self.cube_size, self.population[best_index]), best)
             # print(best)
+            if self.monitor.update(self.iteration, self.MAX_ITERATION, best, int(self.states.values.max()),
+                                   self.evaluations):
+                break
             self.iteration += 1
+        if self.monitor.stopped:
+            # Cancelled or out of budget, end on the best child found so far
+            best_generation = int(np.argmax(self.states.values))
+            if self.states.values[best_generation] > self.states.values[-1]:
+                self.states.append(self.states[best_generation], int(self.states.values[best_generation]))
         print(best)
         return
 
-    def get_states(self) -> list[MagicCube]:
+    def get_states(self) -> Trajectory:
         return self.states
 
-    def __create_population(self) -> list[[MagicCube, int]]:
-        population_temp = [MagicCube() for _ in range(self.POPULATION_COUNT)]
-        ret = []
-        for m in population_temp:
-            ret.append([m, ObjectiveFunction.get_object_value(m)])
-        return ret
-
-    def __sort_population(self):
-        return sorted(self.population, key=lambda x: x[1], reverse=True)
-
-    def __create_range(self) -> list[[float, float]]:
-        total = 0
-        i = 0
-        ret = []
-        for p in self.population:
-            total += p[1]
-        for p in self.population:
-            ret.append([i, i + (100 * p[1] / total)])
-            i += (100 * p[1] / total)
-        return ret
-
-    def __get_parents(self) -> tuple[MagicCube, MagicCube]:
-        rnd = random.random() * 100
-        parent_one, parent_two = None, None
-        for i in range(len(self.range)):
-            r = self.range[i]
-            if r[0] <= rnd <= r[1]:
-                parent_one = self.population[i][0]
-
-        rnd = random.random() * 100
-        for i in range(len(self.range)):
-            r = self.range[i]
-            if r[0] <= rnd <= r[1]:
-                parent_two = self.population[i][0]
-
-        return parent_one, parent_two
-
-    def __reproduce(self, a: MagicCube, b: MagicCube) -> tuple[MagicCube, MagicCube]:
-        crossover_point = random.randint(1, self.cube_size**3-1)
-        data_one = np.concatenate((a.data[:crossover_point], b.data[crossover_point:]))
-        data_two = np.concatenate((b.data[:crossover_point], a.data[crossover_point:]))
-        child_one = MagicCube(self.cube_size, data_one)
-        child_two = MagicCube(self.cube_size, data_two)
-        return child_one, child_two
-
-    def __mutate(self, m: MagicCube):
-        if random.random() < self.MUTATION_CHANCE:
-            i = random.randint(0, self.cube_size**3-1)
-            j = random.randint(i, self.cube_size**3-1)
-            m.swap_index(i, j)
+    def __evaluate(self) -> None:
+        """
+        Compute the objective value and the score of every row of the population.
+        """
+        self.fitness = ObjectiveFunction.get_object_values(self.population, self.cube_size)
+        if self.OBJECTIVE == "count":
+            self.scores = self.fitness
+        else:
+            self.scores = ObjectiveFunction.get_object_scores(self.population, self.cube_size, self.OBJECTIVE)
+
+    def __append_target(self) -> bool:
+        """
+        Append the first cube of the population that reached the target value to the states, if there is one.
+        """
+        solved = np.flatnonzero(self.fitness >= self.TARGET_VALUE)
+        if len(solved) == 0:
+            return False
+        self.states.append(MagicCube(self.cube_size, self.population[solved[0]]), int(self.fitness[solved[0]]))
+        return True
+
+    def __create_population(self) -> np.ndarray:
+        # Random permutation of the cube values on every row
+        order = np.argsort(np.random.random((self.POPULATION_COUNT, self.cube_size**3)), axis=1)
+        return get_cube_values(self.cube_size)[order]
+
+    def __select_parents(self) -> np.ndarray:
+        """
+        Draw the parents of every pair of children at once.
+
+        :return: Array of shape (POPULATION_COUNT, 2), the population indices of both parents of each pair
+        """
+        draws = 2 * self.POPULATION_COUNT
+        if self.SELECTION == "tournament":
+            # The fittest of TOURNAMENT_SIZE random individuals wins each draw
+            candidates = np.random.randint(0, len(self.scores), size=(draws, self.TOURNAMENT_SIZE))
+            winners = candidates[np.arange(draws), np.argmax(self.scores[candidates], axis=1)]
+        else:
+            if self.SELECTION == "rank":
+                # Weight by rank (1 for the worst, population size for the best) instead of the fitness itself
+                weights = np.empty(len(self.scores))
+                weights[np.argsort(self.scores, kind="stable")] = np.arange(1, len(self.scores) + 1)
+            elif self.OBJECTIVE == "count":
+                weights = self.scores.astype(float)
+            else:
+                # Graded scores are penalties (at most 0), weight by the distance to the worst individual
+                weights = (self.scores - self.scores.min()).astype(float)
+            winners = self.__roulette(weights, draws)
+        return winners.reshape(self.POPULATION_COUNT, 2)
+
+    @staticmethod
+    def __roulette(weights: np.ndarray, draws: int) -> np.ndarray:
+        """
+        Draw `draws` indices with probability proportional to their weight, by binary search on the cumulative weights.
+        """
+        cumulative = np.cumsum(weights)
+        if cumulative[-1] <= 0:
+            # Every weight is zero, draw uniformly
+            return np.random.randint(0, len(weights), size=draws)
+        indices = np.searchsorted(cumulative, np.random.random(draws) * cumulative[-1], side="right")
+        return np.minimum(indices, len(weights) - 1)
+
+    def __reproduce(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Single point crossover of every pair of parents (rows of a and b), returns both children of every pair.
+        """
+        crossover_point = np.random.randint(1, self.cube_size**3, size=(len(a), 1))
+        from_first = np.arange(self.cube_size**3) < crossover_point
+        child_one = np.where(from_first, a, b)
+        child_two = np.where(from_first, b, a)
+        return np.concatenate((child_one, child_two))
+
+    def __mutate(self, m: np.ndarray):
+        """
+        Swap two random elements of each cube (row) with probability MUTATION_CHANCE, in place.
+        """
+        rows = np.flatnonzero(np.random.random(len(m)) < self.MUTATION_CHANCE)
+        i = np.random.randint(0, self.cube_size**3, size=len(rows))
+        j = np.random.randint(i, self.cube_size**3)
+        m[rows, i], m[rows, j] = m[rows, j], m[rows, i]
         return
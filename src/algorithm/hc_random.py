@@ -1,11 +1,127 @@
-from data_structure.magic_cube import MagicCube
+from data_structure.magic_cube import MagicCube, get_cube_values
+from data_structure.trajectory import Trajectory
 from algorithm.objective_function import ObjectiveFunction
-import copy
+from algorithm.search_monitor import SearchMonitor
+from data_structure.line_table import get_swap_pairs
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import Manager, Value
 from random import randint
+import time
+import numpy as np
+
+
+# Swaps scored by every restart of a parallel run, a shared memory counter set in each worker process by _init_worker
+_shared_evaluations = None
+
+
+def _init_worker(evaluations) -> None:
+    """
+    Initialize a worker process of a parallel run with the shared evaluation counter.
+    """
+    global _shared_evaluations
+    _shared_evaluations = evaluations
+
+
+def _climb_restart(initial_cube: MagicCube, max_iterations: int, restart: int, seed: np.random.SeedSequence,
+                   target_value: int, stop_event=None, objective: str = "count",
+                   candidate_list: bool = True, deadline: float = None,
+                   max_evaluations: int = None) -> tuple[MagicCube, int, int, int, int] | None:
+    """
+    Run one restart of the random restart hill climbing.
+
+    Module level so it can be sent to a worker process.
+
+    :param initial_cube: The cube of the first restart, every other restart starts from a random cube
+    :param max_iterations: The maximum number of iterations of this restart
+    :param restart: The restart number
+    :param seed: The random stream of this restart, used for its random initial cube
+    :param target_value: The objective value to reach, the value of a perfect magic cube by default
+    :param stop_event: Optional event set once any restart reached target_value or the search was cancelled,
+                       checked on every iteration
+    :param objective: The score to maximize, one of objective_function.OBJECTIVES
+    :param candidate_list: Only score the swaps touching a violated line, every other swap lowers the score
+    :param deadline: Optional time.monotonic() value after which the restart stops, checked on every iteration
+    :param max_evaluations: Optional amount of swaps the restart may score, checked on every iteration. In a worker
+                            process of a parallel run, the amount the restarts may score together.
+    :return: The best state (by score), its objective value, the iterations of this restart, the amount of swaps
+             performed and the amount of swaps scored, None if stop_event was already set or the shared evaluation
+             budget already spent when the restart started
+    """
+    if stop_event is not None and stop_event.is_set():
+        return None
+    if max_evaluations is not None and _shared_evaluations is not None and _shared_evaluations.value >= max_evaluations:
+        return None
+
+    if restart == 0:
+        cube = initial_cube.copy()
+    else:
+        rng = np.random.default_rng(seed)
+        cube = MagicCube(initial_cube.size, rng.permutation(get_cube_values(initial_cube.size)))
+    evaluator = cube.get_evaluator(objective)  # line sums of this restart, updated on every committed swap
+    current_score = evaluator.score
+    current_value = evaluator.value
+    best_local_state = cube.copy()
+    best_local_score = current_score
+    best_local_value = current_value
+    iteration_this_restart = 0
+    swaps = 0
+    reported = 0  # swaps scored by this restart already added to the shared counter
+    first, second = get_swap_pairs(cube.size)
+
+    for iteration in range(max_iterations):
+        if current_value >= target_value or (stop_event is not None and stop_event.is_set()):
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        if max_evaluations is not None:
+            if _shared_evaluations is None:
+                evaluations = evaluator.scanned
+            else:
+                with _shared_evaluations.get_lock():
+                    _shared_evaluations.value += evaluator.scanned - reported
+                    evaluations = _shared_evaluations.value
+                reported = evaluator.scanned
+            if evaluations >= max_evaluations:
+                break
+        iteration_this_restart += 1
+        best_neighbor_score = current_score
+        best_swap = None
+
+        # Score the swaps touching a violated line in one batch, every improving swap is among them
+        pairs = evaluator.candidate_pairs() if candidate_list else None
+        if pairs is not None and len(pairs) == 0:
+            pairs = None
+        scores = evaluator.neighbour_scores(pairs)
+        best = int(np.argmax(scores))
+        if scores[best] > current_score:
+            index = best if pairs is None else pairs[best]
+            best_neighbor_score = int(scores[best])
+            best_swap = (int(first[index]), int(second[index]))
+
+        # If no better neighbor is found, break out of the loop
+        if best_swap is None:
+            print(f"No improvement found at Restart {restart}, Iteration {iteration}. Best local score: {best_local_value}")
+            break
+
+        # Perform the best swap
+        i, j = best_swap
+        current_value = evaluator.swap(i, j)
+        current_score = best_neighbor_score
+        swaps += 1
+
+        # Update best state for the current restart
+        if current_score > best_local_score:
+            best_local_state = cube.copy()
+            best_local_score = current_score
+            best_local_value = current_value
+
+    print(f"Restart {restart} completed. Best score for this restart: {best_local_value}")
+    return best_local_state, best_local_value, iteration_this_restart, swaps, evaluator.scanned
 
 
 class RandomRestartHillClimbing:
-    def __init__(self, cube_size=5, max_restarts=10, max_iterations=20, initial_state=None):
+    def __init__(self, cube_size=5, max_restarts=10, max_iterations=20, initial_state=None, workers=1, seed=None,
+                 stop_at_target=False, objective="count", candidate_list=True):
         """
         Initializes the algorithm with a magic cube of specified size and limits on restarts and iterations.
         
@@ -13,18 +129,28 @@ class RandomRestartHillClimbing:
         :param max_restarts: The maximum number of random restarts.
         :param max_iterations: The maximum number of iterations per restart.
         :param initial_state: Optional initial state for the cube.
+        :param workers: The number of worker processes running restarts in parallel, 1 runs them one after another.
+        :param seed: Optional seed of the random streams, every restart gets its own independent stream.
+        :param stop_at_target: Stop every restart once any restart reaches a perfect magic cube.
+        :param objective: The score every restart maximizes, one of objective_function.OBJECTIVES.
+        :param candidate_list: Only score the swaps touching a violated line, every other swap lowers the score.
         """
+        self.TARGET_VALUE = ObjectiveFunction.get_max_value(cube_size)
         self.cube_size = cube_size
         self.max_restarts = max_restarts
         self.max_iterations = max_iterations
+        self.workers = int(workers)
+        self.seed = seed
+        self.stop_at_target = stop_at_target
+        self.objective = objective
+        self.candidate_list = candidate_list
         self.best_cube = None
         self.best_score = float('inf')
         self.objective_values = []  # Store objective values for plotting
+        self.monitor = SearchMonitor()  # progress reports once per restart, budget and cancellation within restarts
 
         # Initialize cube state
-        self.initial_cube = MagicCube(size=self.cube_size)
-        if initial_state is not None:  # Check if initial_state is provided
-            self.initial_cube.data = initial_state
+        self.initial_cube = MagicCube(size=self.cube_size, data=initial_state)
 
     def evaluate(self, cube):
         """
@@ -52,67 +178,104 @@ class RandomRestartHillClimbing:
         """
         cube.data[idx1], cube.data[idx2] = cube.data[idx2], cube.data[idx1]
 
-    def run(self) -> tuple[list[MagicCube], int, list[int], int]:
-        self.best_cube = copy.deepcopy(self.initial_cube)
-        self.best_score = self.evaluate(self.initial_cube)
-        best_states_per_restart = []  # Track the best state of each restart
-        best_scores_per_restart = []  # Track the best score of each
+    def run(self) -> tuple[Trajectory, int, list[int], int]:
+        """
+        Run every restart and return the best state of each restart, the total number of swaps performed,
+        the number of iterations of each restart and the number of restarts that ran.
+        If the search was cancelled or ran out of budget, the last state is the best state found.
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(int(self.max_restarts))
+        if self.workers > 1:
+            results = self.__run_parallel(seeds)
+        else:
+            results = self.__run_sequential(seeds)
+
+        # Track the best state of each restart, the initial state if the search was cancelled before any restart
+        best_states_per_restart: Trajectory | None = None if results else Trajectory(self.initial_cube)
         iteration_per_restart = []
         total_iterations = 0
-        restart_amount = 0
-
-        for restart in range(int(self.max_restarts)):
-            restart_amount += 1
-            cube = copy.deepcopy(self.initial_cube) if restart == 0 else MagicCube(size=self.cube_size)
-            current_score = self.evaluate(cube)
-            best_local_state = copy.deepcopy(cube)
-            best_local_score = current_score
-            iteration_scores = []
-            iteration_this_restart = 0
-
-            for iteration in range(int(self.max_iterations)):
-                iteration_this_restart += 1
-                best_neighbor_score = current_score
-                best_swap = None
-
-                # Evaluate all neighbors by swapping pairs of elements
-                for i in range(len(cube.data)):
-                    for j in range(i + 1, len(cube.data)):
-                        # Perform swap
-                        cube.data[i], cube.data[j] = cube.data[j], cube.data[i]
-                        neighbor_score = self.evaluate(cube)
-
-                        # Track the best neighbor
-                        if neighbor_score > best_neighbor_score:
-                            best_neighbor_score = neighbor_score
-                            best_swap = (i, j)
-
-                        # Revert swap to try the next pair
-                        cube.data[i], cube.data[j] = cube.data[j], cube.data[i]
-
-                # If no better neighbor is found, break out of the loop
-                if best_swap is None:
-                    print(f"No improvement found at Restart {restart}, Iteration {iteration}. Best local score: {best_local_score}")
-                    break
-
-                # Perform the best swap
-                i, j = best_swap
-                cube.data[i], cube.data[j] = cube.data[j], cube.data[i]
-                current_score = best_neighbor_score
-                total_iterations += 1
-
-                # Update best state for the current restart
-                if current_score > best_local_score:
-                    best_local_state = copy.deepcopy(cube)
-                    best_local_score = current_score
-
-                iteration_scores.append(current_score)
+        self.best_cube = self.initial_cube.copy()
+        self.best_score = self.evaluate(self.initial_cube)
 
+        for best_local_state, best_local_score, iteration_this_restart, swaps, _ in results:
+            if best_states_per_restart is None:
+                best_states_per_restart = Trajectory(best_local_state, best_local_score)
+            else:
+                best_states_per_restart.append(best_local_state, best_local_score)
             iteration_per_restart.append(iteration_this_restart)
+            total_iterations += swaps
+
+            if best_local_score > self.best_score:
+                self.best_cube = best_local_state
+                self.best_score = best_local_score
+
+        if self.monitor.stopped and best_states_per_restart.values[-1] < self.best_score:
+            # Cancelled or out of budget, end on the best state found so far
+            best_states_per_restart.append(self.best_cube, self.best_score)
+        return best_states_per_restart, total_iterations, iteration_per_restart, len(results)
+
+    # -- INTERNAL FUNCTIONS --
+
+    def __run_sequential(self, seeds: list[np.random.SeedSequence]) -> list[tuple[MagicCube, int, int, int, int]]:
+        """
+        Run the restarts one after another, in restart order.
+        """
+        results = []
+        max_evaluations = self.monitor.budget.max_evaluations
+        for restart, seed in enumerate(seeds):
+            # Every restart may score what the previous restarts left of the evaluation budget
+            remaining = None if max_evaluations is None else max_evaluations - sum(result[4] for result in results)
+            result = _climb_restart(self.initial_cube, int(self.max_iterations), restart, seed, self.TARGET_VALUE,
+                                    self.monitor.cancel_event, self.objective, self.candidate_list,
+                                    self.monitor.budget.deadline, remaining)
+            if result is None:
+                # Cancelled before the restart started, let the monitor record why the search stopped
+                self.__report(results, len(seeds))
+                break
+            results.append(result)
+            if self.__report(results, len(seeds)) or (self.stop_at_target and result[1] >= self.TARGET_VALUE):
+                break
+        return results
+
+    def __run_parallel(self, seeds: list[np.random.SeedSequence]) -> list[tuple[MagicCube, int, int, int, int]]:
+        """
+        Run the restarts in a pool of worker processes, returning the results of the restarts that ran in restart order.
+        """
+        evaluations = Value("q", 0)  # swaps scored by the restarts together, checked against the budget
+        with Manager() as manager, ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                       initargs=(evaluations,)) as executor:
+            stop_event = manager.Event()
+            futures = [executor.submit(_climb_restart, self.initial_cube, int(self.max_iterations), restart, seed,
+                                       self.TARGET_VALUE, stop_event, self.objective, self.candidate_list,
+                                       self.monitor.budget.deadline, self.monitor.budget.max_evaluations)
+                       for restart, seed in enumerate(seeds)]
 
-            # Save the best state and score for this restart
-            best_states_per_restart.append(best_local_state)
-            best_scores_per_restart.append(best_local_score)
-            print(f"Restart {restart} completed. Best score for this restart: {best_local_score}")
+            results = []
+            running = set(futures)
+            while running:
+                done, running = wait(running, timeout=self.monitor.interval, return_when=FIRST_COMPLETED)
+                stop = False
+                for future in done:
+                    if future.cancelled() or future.result() is None:
+                        continue
+                    results.append(future.result())
+                    stop = stop or (self.stop_at_target and future.result()[1] >= self.TARGET_VALUE)
+                if self.__report(results, len(seeds)) or stop:
+                    # Running restarts stop on their next iteration, pending restarts never start
+                    stop_event.set()
+                    for pending in running:
+                        pending.cancel()
 
-        return best_states_per_restart, total_iterations, iteration_per_restart, restart_amount
+            return [future.result() for future in futures
+                    if not future.cancelled() and future.result() is not None]
+
+    def __report(self, results: list[tuple[MagicCube, int, int, int, int]], total: int) -> bool:
+        """
+        Report the progress of the finished restarts to the monitor.
+
+        :return: True if the search was cancelled
+        """
+        best_score = max((result[1] for result in results), default=self.evaluate(self.initial_cube))
+        evaluations = sum(result[4] for result in results)
+        return self.monitor.update(len(results), total, results[-1][1] if results else best_score, best_score,
+                                   evaluations)
@@ -1,93 +1,110 @@
-from data_structure.magic_cube import MagicCube
-
-import numpy as np
-
-
-class HillClimbSideways:
-    """
-    A local search algorithm: Hill-Climbing Sideways Move.
-    """
-    def __init__(self, max_side, initial_cube: MagicCube):
-        self.states: list[MagicCube] = [initial_cube]   # self.states[-1] is the current state
-        self.max_sides: int = int(max_side)
-
-    def hill_climb_sideways_move(self) -> tuple[list[MagicCube], int]:
-        """
-        Returns the best state and the amount of iterations.
-        """
-        current = self.states[-1].copy()                        # copy of Magic cube class initial
-        current_value = current.get_state_value()               # initial state value
-        i = 0                                                   # initiation the number of iterations
-        i_sides = 0                                             # initiation the number of iterations with sideways move
-
-        # Loop of hill-climbing sideways move
-        while True:
-            # find the best state and its value
-            neighbour, neighbour_value = self.__get_highest_value_neigbour()
-            
-            if (neighbour_value < current_value) or (i_sides == self.max_sides):
-                # if the neighbour objective function value is LESS than the current objective function value
-                # stop the local search
-                return self.states, i
-            
-            self.states.append(neighbour)
-            if neighbour_value == current_value:
-                i_sides += 1
-            else:
-                i_sides = 0
-            current_value = neighbour_value
-            i += 1
-            print(f"iteration {i}, sideways iteration {i_sides} - current value {current_value}")
-    
-    # -- INTERNAL FUNCTION --
-
-    def __get_highest_value_neigbour(self):
-        """
-        Returns the best state and its state value.
-        """
-
-        # Initialize arrays for successors and their state values
-        successors: list[MagicCube] = []
-        successors_state: list[int] = []
-        data_len = self.states[-1].size ** 3
-
-        # Generate all possible swaps and calculate their state values
-        for x1 in range(data_len):
-            for x2 in range(x1 + 1, data_len):
-                # get successor
-                cube_swap = self.states[-1].swap_index_copy(x1, x2)
-                state_value = cube_swap.get_state_value()
-
-                # add to successors list
-                successors.append(cube_swap)
-                successors_state.append(state_value)
-
-        # Convert to NumPy arrays for fast indexing
-        np_successors_state = np.array(successors_state)
-
-        # Find the index of the maximum state value
-        max_index = np.argmax(np_successors_state)
-
-        max_indices = np.where(np_successors_state == np_successors_state.max())[0]                 # Get max successor value indices 
-        successors_max = np.array(successors)[max_indices]                                          # Successors that have maximum state value
-        successors_state_max = np_successors_state[max_indices]                                     # Successor values that have maximum state value
-        i_same = []
-
-        # Get the indices of successors that are present in the current state list
-        for idx in range(len(self.states)):
-            for idx_max, successor_max in enumerate(successors_max):
-                if (successor_max.data == self.states[idx].data):
-                    i_same.append(idx_max)
-
-        if len(i_same) > 0:
-            # Delete list of successors (with maximum state value) that are contained in the current state list 
-            state_same_drop = np.delete(successors_max, i_same, axis=0) 
-            state_value_same_drop = np.delete(successors_state_max, i_same, axis=0)
-            
-            # If there are some successors equal to the current state list
-            # return the next state that has maximum state value
-            return state_same_drop[0], state_value_same_drop[0]
-
-        # Return the best successor and its state value
-        return successors[max_index], successors_state[max_index]
-    
+from data_structure.magic_cube import MagicCube
+from data_structure.line_table import get_swap_pairs
+from data_structure.trajectory import Trajectory
+from data_structure.zobrist_hash import ZobristHash
+from algorithm.line_sum_evaluator import LineSumEvaluator
+from algorithm.objective_function import ObjectiveFunction
+from algorithm.search_monitor import SearchMonitor
+
+import numpy as np
+
+
+class HillClimbSideways:
+    """
+    A local search algorithm: Hill-Climbing Sideways Move.
+    """
+    def __init__(self, max_side, initial_cube: MagicCube, objective: str = "count", candidate_list: bool = True):
+        """
+        :param objective: The score to maximize, one of objective_function.OBJECTIVES. The states always record the
+                          objective value (amount of magic lines).
+        :param candidate_list: Only score the swaps touching a violated line (LineSumEvaluator.candidate_pairs). Every
+                               other swap lowers the score, whatever the objective, so every sideways or improving
+                               move is a candidate.
+        """
+        self.objective: str = objective
+        self.candidate_list: bool = candidate_list
+        self.states: Trajectory = Trajectory(initial_cube)   # self.states[-1] is the current state
+        self.max_sides: int = int(max_side)
+        self.TARGET_VALUE = ObjectiveFunction.get_max_value(initial_cube.size)
+        self.monitor: SearchMonitor = SearchMonitor()   # progress reports and cancellation
+        self.__visited: set[int] = set()                # Zobrist hash of every visited state
+
+    def hill_climb_sideways_move(self) -> tuple[Trajectory, int]:
+        """
+        Returns the best state and the amount of iterations.
+        """
+        current = self.states[-1]                               # copy of Magic cube class initial, swapped in place
+        current_value = int(self.states.values[-1])             # initial state value
+        evaluator = current.get_evaluator(self.objective)       # line sums and score of the current state
+        zobrist = ZobristHash(current)                          # hash of the current state, updated per swap
+        self.__visited.add(zobrist.value)
+        i = 0                                                   # initiation the number of iterations
+        i_sides = 0                                             # initiation the number of iterations with sideways move
+
+        # Loop of hill-climbing sideways move
+        while True:
+            if self.monitor.update(i, None, current_value, current_value, evaluator.scanned):
+                # cancelled, return the states found so far
+                return self.states, i
+
+            # find the best swap and its score
+            neighbour_swap, neighbour_score = self.__get_highest_value_neigbour(evaluator, zobrist)
+
+            if ((neighbour_swap is None) or (neighbour_score < evaluator.score) or (i_sides == self.max_sides)
+                    or current_value >= self.TARGET_VALUE):
+                # if every best neighbour was already visited, the neighbour score is LESS than the current score,
+                # or the target value is reached, stop the local search
+                return self.states, i
+
+            if neighbour_score == evaluator.score:
+                i_sides += 1
+            else:
+                i_sides = 0
+            current_value = evaluator.swap(*neighbour_swap)
+            self.states.append_swap(*neighbour_swap, current_value)
+            self.__visited.add(zobrist.swap(*neighbour_swap))
+            i += 1
+            print(f"iteration {i}, sideways iteration {i_sides} - current value {current_value}")
+    
+    # -- INTERNAL FUNCTION --
+
+    def __get_highest_value_neigbour(self, evaluator: LineSumEvaluator,
+                                     zobrist: ZobristHash) -> tuple[tuple[int, int] | None, int]:
+        """
+        Returns the best swap (pair of indices) that does not lead to a visited state, and its score.
+        Returns None as the swap if every successor with the maximum score was already visited.
+
+        Visited successors are recognized by their Zobrist hash, computed for every tied swap at once without
+        building the successors.
+        """
+        candidates = evaluator.candidate_pairs() if self.candidate_list else None
+        if candidates is not None and len(candidates) == 0:
+            # No violated line left, score every swap
+            candidates = None
+
+        # Scores of the swaps touching a violated line (all possible swaps without candidates), every sideways or
+        # improving swap is among them
+        return self.__get_unvisited_best(evaluator, zobrist, candidates)
+
+    def __get_unvisited_best(self, evaluator: LineSumEvaluator, zobrist: ZobristHash,
+                             pairs: np.ndarray = None) -> tuple[tuple[int, int] | None, int]:
+        """
+        Returns the first swap with the maximum score of the given swaps (indices into get_swap_pairs, every swap by
+        default) that does not lead to a visited state, and the maximum score.
+        """
+        first, second = get_swap_pairs(evaluator.cube.size)
+        successors_state = evaluator.neighbour_scores(pairs)
+        max_value = int(successors_state.max())
+
+        # Indices of the swaps that have maximum score
+        max_indices = np.flatnonzero(successors_state == max_value)
+        if pairs is not None:
+            max_indices = pairs[max_indices]
+
+        # Return the first successor (with maximum score) that was not visited yet
+        successor_hashes = zobrist.swap_hashes(first[max_indices], second[max_indices])
+        for max_index, successor_hash in zip(max_indices.tolist(), successor_hashes.tolist()):
+            if successor_hash not in self.__visited:
+                return (int(first[max_index]), int(second[max_index])), max_value
+
+        return None, max_value
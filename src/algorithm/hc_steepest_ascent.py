@@ -1,67 +1,81 @@
-from data_structure.magic_cube import MagicCube
-
-import numpy as np
-
-
-class HillClimbSteepest:
-    """`
-    A local search algorithm: Hill-Climbing Steepest Ascent.
-    """
-    def __init__(self, initial_cube: MagicCube):
-        self.states: list[MagicCube] = [initial_cube]   # self.states[-1] is the current state
-
-    def hill_climb_steepest_ascent(self) -> tuple[list[MagicCube], int]:
-        """
-        Returns the best state and the amount of iterations.
-        """
-        current = self.states[-1].copy()            # copy of Magic cube class initial
-        current_value = current.get_state_value()   # initial state value
-        i = 0                                       # initiation the number of iterations
-
-        # Loop of hill-climbing steepest ascent
-        while True:
-            # find the best state and its value
-            neighbour, neighbour_value = self.__get_highest_value_neighbour()
-
-            if neighbour_value <= current_value:
-                # if the neighbour state value is LESS than or EQUAL to the current state value,
-                # stop the local search
-                return self.states, i
-
-            self.states.append(neighbour)
-            # current = neighbour --> using self.states[-1]
-            current_value = neighbour_value
-            i += 1
-            print("iteration", i, "- current value", current_value)
-
-    # -- INTERNAL FUNCTIONS --
-
-    def __get_highest_value_neighbour(self):
-        """
-        Returns the best cube state and its state value
-        """
-
-        # Initialize arrays for successors and their state values
-        successors: list[MagicCube] = []
-        successors_state: list[int] = []
-        data_len = self.states[-1].size ** 3
-
-        # Generate all possible swaps and calculate their state values
-        for x1 in range(data_len):
-            for x2 in range(x1 + 1, data_len):
-                # get successor
-                cube_swap = self.states[-1].swap_index_copy(x1, x2)
-                state_value = cube_swap.get_state_value()
-
-                # add to successors list
-                successors.append(cube_swap)
-                successors_state.append(state_value)
-
-        # Convert to NumPy arrays for fast indexing
-        np_successors_state = np.array(successors_state)
-
-        # Find the index of the maximum state value
-        max_index = np.argmax(np_successors_state)
-
-        # Return the best successor and its state value
-        return successors[max_index], successors_state[max_index]
+from data_structure.magic_cube import MagicCube
+from data_structure.line_table import get_swap_pairs
+from data_structure.trajectory import Trajectory
+from algorithm.line_sum_evaluator import LineSumEvaluator
+from algorithm.objective_function import ObjectiveFunction
+from algorithm.search_monitor import SearchMonitor
+
+import numpy as np
+
+
+class HillClimbSteepest:
+    """`
+    A local search algorithm: Hill-Climbing Steepest Ascent.
+    """
+    def __init__(self, initial_cube: MagicCube, objective: str = "count", candidate_list: bool = True):
+        """
+        :param objective: The score to maximize, one of objective_function.OBJECTIVES. The states always record the
+                          objective value (amount of magic lines).
+        :param candidate_list: Only score the swaps touching a violated line (LineSumEvaluator.candidate_pairs). Every
+                               other swap lowers the score, whatever the objective, so the result is the same as
+                               scoring the whole neighbourhood.
+        """
+        self.objective: str = objective
+        self.candidate_list: bool = candidate_list
+        self.states: Trajectory = Trajectory(initial_cube)   # self.states[-1] is the current state
+        self.TARGET_VALUE = ObjectiveFunction.get_max_value(initial_cube.size)
+        self.monitor: SearchMonitor = SearchMonitor()   # progress reports and cancellation
+
+    def hill_climb_steepest_ascent(self) -> tuple[Trajectory, int]:
+        """
+        Returns the best state and the amount of iterations.
+        """
+        current = self.states[-1]                   # copy of Magic cube class initial, swapped in place
+        current_value = int(self.states.values[-1]) # initial state value
+        evaluator = current.get_evaluator(self.objective)  # line sums and score of the current state
+        i = 0                                       # initiation the number of iterations
+
+        # Loop of hill-climbing steepest ascent
+        while True:
+            if self.monitor.update(i, None, current_value, current_value, evaluator.scanned):
+                # cancelled, return the states found so far
+                return self.states, i
+
+            # find the best swap and its score
+            neighbour_swap, neighbour_score = self.__get_highest_value_neighbour(evaluator)
+
+            if neighbour_score <= evaluator.score or current_value >= self.TARGET_VALUE:
+                # if the neighbour score is LESS than or EQUAL to the current score,
+                # or the target value is reached, stop the local search
+                return self.states, i
+
+            current_value = evaluator.swap(*neighbour_swap)
+            self.states.append_swap(*neighbour_swap, current_value)
+            i += 1
+            print("iteration", i, "- current value", current_value)
+
+    # -- INTERNAL FUNCTIONS --
+
+    def __get_highest_value_neighbour(self, evaluator: LineSumEvaluator) -> tuple[tuple[int, int], int]:
+        """
+        Returns the best swap (pair of indices) and the score after that swap.
+        With the candidate list, the best swap is the best of the swaps touching a violated line: if it does not
+        improve, no swap improves.
+        """
+        first, second = get_swap_pairs(evaluator.cube.size)
+        candidates = evaluator.candidate_pairs() if self.candidate_list else None
+        if candidates is not None and len(candidates) == 0:
+            # No violated line left, score every swap
+            candidates = None
+
+        # Scores of the candidate swaps (all possible swaps without candidates), without creating any successor
+        successors_state = evaluator.neighbour_scores(candidates)
+
+        # Find the index of the maximum state value
+        max_index = int(np.argmax(successors_state))
+        score = int(successors_state[max_index])
+        if candidates is not None:
+            max_index = candidates[max_index]
+
+        # Return the best swap and its state value
+        return (int(first[max_index]), int(second[max_index])), score
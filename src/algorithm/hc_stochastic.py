@@ -1,42 +1,80 @@
 from data_structure.magic_cube import MagicCube
+from data_structure.line_table import get_swap_pairs
+from data_structure.trajectory import Trajectory
+from algorithm.line_sum_evaluator import LineSumEvaluator
+from algorithm.objective_function import ObjectiveFunction
+from algorithm.search_monitor import SearchMonitor
 
 import random
+import numpy as np
 
 
 class StochasticHillClimb:
     """
     A local search algorithm: Stochastic Hill-Climbing without temperature control.
+
+    Every iteration draws one random swap, scores it through the line sums and applies it in place only if it
+    improves the score. No successor cube is created.
     """
-    def __init__(self, initial_cube: MagicCube):
-        self.states: list[MagicCube] = [initial_cube]   # self.states[-1] is the current state
+
+    FIRST_IMPROVEMENT_CHUNK = 256   # swaps scored at once while walking the shuffled swaps in first improvement mode
+
+    def __init__(self, initial_cube: MagicCube, objective: str = "count", first_improvement: bool = False):
+        """
+        :param objective: The score to maximize, one of objective_function.OBJECTIVES. The states always record the
+                          objective value (amount of magic lines).
+        :param first_improvement: Every iteration, walk the swaps in a random order and apply the first one that
+                                  improves, stopping at a local optimum, instead of drawing a single random swap
+        """
+        self.objective: str = objective
+        self.first_improvement: bool = first_improvement
+        self.states: Trajectory = Trajectory(initial_cube)   # self.states[-1] is the current state
         self.iteration_value: list[int] = []
+        self.TARGET_VALUE = ObjectiveFunction.get_max_value(initial_cube.size)
+        self.monitor: SearchMonitor = SearchMonitor()   # progress reports and cancellation
 
-    def stochastic_hill_climb(self, nmax: int = 5000) -> tuple[list[any], int, list[int]]:
+    def stochastic_hill_climb(self, nmax: int = 5000) -> tuple[Trajectory, int, list[int]]:
         """
         Executes the Stochastic Hill Climbing algorithm for a maximum of nmax iterations.
-        Returns the best state and the number of iterations performed.
+        Returns the states, the number of iterations performed and the value of the neighbor drawn on each iteration
+        (of the state after each iteration in first improvement mode).
         """
-        current = self.states[-1].copy()            # Copy of the initial cube
-        current_value = current.get_state_value()   # Initial state value
+        current = self.states[-1]                           # Copy of the initial cube, swapped in place
+        current_value = int(self.states.values[-1])         # Initial state value
+        evaluator = current.get_evaluator(self.objective)   # Line sums and score of the current state
+        first, second = get_swap_pairs(current.size)
         self.iteration_value.append(current_value)
         i = 0                                        # Initiation of the number of iterations
 
         # Loop of stochastic hill-climbing
         while i < nmax:
-            # Generate neighbors
-            neighbors = self.__generate_neighbors()
-            if not neighbors or current_value == 109:
+            if self.monitor.update(i, nmax, current_value, current_value, i + evaluator.scanned):
                 break
+            if current_value >= self.TARGET_VALUE:
+                break
+
+            if self.first_improvement:
+                swap = self.__get_first_improvement(evaluator, first, second)
+                if swap is None:
+                    # Local optimum, no swap improves
+                    break
+                current_value = evaluator.swap(*swap)
+                self.states.append_swap(*swap, current_value)
+                self.iteration_value.append(current_value)
+                print("iteration", i, "- current value", current_value)
+                i += 1
+                continue
 
             # Randomly select a neighbor
-            neighbor = random.choice(neighbors)
-            neighbor_value = neighbor.get_state_value()
-            self.iteration_value.append(neighbor_value)
+            neighbor_index = random.randrange(len(first))
+            x1, x2 = int(first[neighbor_index]), int(second[neighbor_index])
+            value_delta, score_delta = evaluator.swap_deltas(x1, x2)
+            self.iteration_value.append(current_value + value_delta)
 
             # Always accept the neighbor if it's better
-            if neighbor_value > current_value:
-                self.states.append(neighbor)
-                current_value = neighbor_value
+            if score_delta > 0:
+                current_value = evaluator.swap(x1, x2)
+                self.states.append_swap(x1, x2, current_value)
                 print("iteration", i, "- current value", current_value)
 
             i += 1
@@ -45,16 +83,17 @@ class StochasticHillClimb:
 
     # -- INTERNAL FUNCTIONS --
 
-    def __generate_neighbors(self) -> list[MagicCube]:
+    def __get_first_improvement(self, evaluator: LineSumEvaluator, first: np.ndarray,
+                                second: np.ndarray) -> tuple[int, int] | None:
         """
-        Generates all possible neighbors (successor states).
+        Returns the first swap that improves the score, walking every swap in a random order. The swaps are scored
+        in chunks of FIRST_IMPROVEMENT_CHUNK. Returns None if no swap improves.
         """
-        successors: list[MagicCube] = []
-        data_len = self.states[-1].size ** 3
-
-        for x1 in range(data_len):
-            for x2 in range(x1 + 1, data_len):
-                cube_swap = self.states[-1].swap_index_copy(x1, x2)
-                successors.append(cube_swap)
-
-        return successors
+        order = np.random.permutation(len(first))
+        for start in range(0, len(order), self.FIRST_IMPROVEMENT_CHUNK):
+            pairs = order[start:start + self.FIRST_IMPROVEMENT_CHUNK]
+            improving = np.flatnonzero(evaluator.neighbour_scores(pairs) > evaluator.score)
+            if len(improving):
+                index = pairs[improving[0]]
+                return int(first[index]), int(second[index])
+        return None
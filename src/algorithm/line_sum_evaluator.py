@@ -0,0 +1,299 @@
+from algorithm.objective_function import MagicCube, OBJECTIVES, PENALTIES
+from data_structure.line_table import get_line_table, get_cell_lines, get_swap_pairs, get_swap_line_table
+
+import numpy as np
+
+
+class LineSumEvaluator:
+    """
+    Incremental objective function of a Magic Cube.
+
+    Keeps the sum of every line of the cube and the lines that pass through each cell, so the objective change of
+    swapping two cells only touches the lines of those two cells instead of rescoring the whole cube.
+
+    Besides the objective value (the amount of lines equal to the magic number), the evaluator keeps the score the
+    search maximizes, selected by `objective`:
+        - "count": the objective value itself
+        - "absolute": minus the sum of the absolute deviation of every line sum from the magic number
+        - "squared": minus the sum of the squared deviation of every line sum from the magic number
+    The graded scores change with almost every swap, so the search sees a slope where the count is flat. Every score
+    is maximal exactly for a perfect magic cube (0 for the graded scores).
+
+    The evaluator owns the cube it is attached to: swaps must go through LineSumEvaluator.swap to keep the line sums
+    in sync with the cube data.
+
+    :var cube: The Magic Cube the evaluator is attached to
+    :var objective: The score maximized by the search, one of OBJECTIVES
+    :var line_sums: The sum of every line, in the order of the line index table
+    :var value: The objective value of the cube (amount of lines equal to the magic number)
+    :var score: The score of the cube for the objective
+    :var scanned: The amount of swaps scored by neighbour_values and neighbour_scores
+    """
+
+    # Above this fraction of candidate swaps, scoring the whole neighbourhood is as fast as scoring the candidates
+    CANDIDATE_FRACTION = 0.6
+
+    def __init__(self, magic_cube: MagicCube, objective: str = "count"):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective {objective}, expected one of {', '.join(OBJECTIVES)}")
+        self.cube: MagicCube = magic_cube
+        self.objective: str = objective
+        self.__penalty = PENALTIES.get(objective)
+        self.__cell_lines: tuple[tuple[int, ...], ...] = get_cell_lines(magic_cube.size)
+        self.__swap_pairs: tuple[np.ndarray, np.ndarray] = get_swap_pairs(magic_cube.size)
+        self.__magic_sum: int = magic_cube.magic_sum
+        self.line_sums: list[int] = []
+        self.value: int = 0
+        self.score: int = 0
+        self.scanned: int = 0
+        # Amount of violated lines (sum not equal to the magic number) through each cell, None until
+        # LineSumEvaluator.candidate_pairs is first called
+        self.__violations: np.ndarray | None = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Recompute every line sum from the cube data, e.g. after the data was changed without the evaluator.
+        """
+        self.line_sums = self.cube.data[get_line_table(self.cube.size)].sum(axis=1).tolist()
+        self.value = sum(1 for line_sum in self.line_sums if line_sum == self.__magic_sum)
+        if self.__penalty is None:
+            self.score = self.value
+        else:
+            self.score = -sum(self.__penalty(line_sum - self.__magic_sum) for line_sum in self.line_sums)
+        if self.__violations is not None:
+            self.__count_violations()
+
+    def swap_delta(self, i: int, j: int) -> int:
+        """
+        Returns the change of the score if the cells at index i and j were swapped, without swapping them.
+
+        For the "count" objective, the score is the objective value.
+        """
+        penalty = self.__penalty
+        if penalty is None:
+            return self.value_delta(i, j)
+
+        difference = int(self.cube.data[j]) - int(self.cube.data[i])
+        if difference == 0:
+            return 0
+
+        # Lines through both cells keep their sum, only lines through exactly one of them change
+        lines_i = self.__cell_lines[i]
+        lines_j = self.__cell_lines[j]
+        line_sums = self.line_sums
+        magic_sum = self.__magic_sum
+        delta = 0
+        for line in lines_i:
+            if line not in lines_j:
+                deviation = line_sums[line] - magic_sum
+                delta += penalty(deviation) - penalty(deviation + difference)
+        for line in lines_j:
+            if line not in lines_i:
+                deviation = line_sums[line] - magic_sum
+                delta += penalty(deviation) - penalty(deviation - difference)
+        return delta
+
+    def value_delta(self, i: int, j: int) -> int:
+        """
+        Returns the change of the objective value (amount of lines equal to the magic number) if the cells at index i
+        and j were swapped, without swapping them, whatever the objective of the evaluator.
+        """
+        difference = int(self.cube.data[j]) - int(self.cube.data[i])
+        if difference == 0:
+            return 0
+
+        # Lines through both cells keep their sum, only lines through exactly one of them change
+        lines_i = self.__cell_lines[i]
+        lines_j = self.__cell_lines[j]
+        line_sums = self.line_sums
+        magic_sum = self.__magic_sum
+        delta = 0
+        for line in lines_i:
+            if line not in lines_j:
+                line_sum = line_sums[line]
+                delta += (line_sum + difference == magic_sum) - (line_sum == magic_sum)
+        for line in lines_j:
+            if line not in lines_i:
+                line_sum = line_sums[line]
+                delta += (line_sum - difference == magic_sum) - (line_sum == magic_sum)
+        return delta
+
+    def swap_deltas(self, i: int, j: int) -> tuple[int, int]:
+        """
+        Returns the change of the objective value and the change of the score if the cells at index i and j were
+        swapped, without swapping them, in a single pass over their lines.
+        """
+        penalty = self.__penalty
+        if penalty is None:
+            delta = self.value_delta(i, j)
+            return delta, delta
+
+        difference = int(self.cube.data[j]) - int(self.cube.data[i])
+        if difference == 0:
+            return 0, 0
+
+        # Lines through both cells keep their sum, only lines through exactly one of them change
+        lines_i = self.__cell_lines[i]
+        lines_j = self.__cell_lines[j]
+        line_sums = self.line_sums
+        magic_sum = self.__magic_sum
+        value_delta = 0
+        score_delta = 0
+        for line in lines_i:
+            if line not in lines_j:
+                deviation = line_sums[line] - magic_sum
+                value_delta += (deviation + difference == 0) - (deviation == 0)
+                score_delta += penalty(deviation) - penalty(deviation + difference)
+        for line in lines_j:
+            if line not in lines_i:
+                deviation = line_sums[line] - magic_sum
+                value_delta += (deviation - difference == 0) - (deviation == 0)
+                score_delta += penalty(deviation) - penalty(deviation - difference)
+        return value_delta, score_delta
+
+    def candidate_pairs(self) -> np.ndarray | None:
+        """
+        Returns the swaps with at least one cell on a violated line (a line whose sum is not the magic number).
+
+        Every cell lies on at least 3 lines and two cells share at most one, so a swap of two cells off the violated
+        lines breaks at least two magic lines and lowers every score: the best swap, if it improves or keeps the
+        score, is always a candidate. Near a solution, few cells are left on violated lines and scoring only the
+        candidates is much cheaper than scoring the whole neighbourhood.
+
+        The violated lines of every cell are counted on the first call, then updated by LineSumEvaluator.swap.
+
+        :return: The indices (into line_table.get_swap_pairs, ascending) of the candidate swaps, None if more than
+                 CANDIDATE_FRACTION of the swaps are candidates and the whole neighbourhood should be scored
+        """
+        if self.__violations is None:
+            self.__count_violations()
+        on_violated_line = self.__violations > 0
+        # A swap is not a candidate if both cells are off the violated lines
+        off = len(on_violated_line) - int(np.count_nonzero(on_violated_line))
+        if 1 - off * (off - 1) / (len(on_violated_line) * (len(on_violated_line) - 1)) > self.CANDIDATE_FRACTION:
+            return None
+        first, second = self.__swap_pairs
+        return np.flatnonzero(on_violated_line[first] | on_violated_line[second])
+
+    def neighbour_values(self, pairs: np.ndarray = None) -> np.ndarray:
+        """
+        Returns the objective value after every two-cell swap, computed at once from the current line sums.
+
+        The values are ordered like line_table.get_swap_pairs, no successor cube is created.
+
+        :param pairs: Only score these swaps (indices into line_table.get_swap_pairs), e.g. the candidate_pairs
+        """
+        first, second = self.__swap_pairs
+        lines_first, lines_second = get_swap_line_table(self.cube.size)
+        if pairs is not None:
+            first, second = first[pairs], second[pairs]
+            lines_first, lines_second = lines_first[pairs], lines_second[pairs]
+        self.scanned += len(first)
+        magic_sum = self.__magic_sum
+
+        # One extra line sum that never reaches the magic number, for the padding of the swap line table
+        line_sums = np.append(self.line_sums, -magic_sum)
+        difference = (self.cube.data[second].astype(np.int64) - self.cube.data[first])[:, None]
+
+        sums_first = line_sums[lines_first]
+        sums_second = line_sums[lines_second]
+        delta = (np.count_nonzero(sums_first + difference == magic_sum, axis=1) -
+                 np.count_nonzero(sums_first == magic_sum, axis=1) +
+                 np.count_nonzero(sums_second - difference == magic_sum, axis=1) -
+                 np.count_nonzero(sums_second == magic_sum, axis=1))
+        return self.value + delta
+
+    def neighbour_scores(self, pairs: np.ndarray = None) -> np.ndarray:
+        """
+        Returns the score after every two-cell swap, computed at once from the current line sums.
+
+        The scores are ordered like line_table.get_swap_pairs. For the "count" objective, they are the neighbour values.
+
+        :param pairs: Only score these swaps (indices into line_table.get_swap_pairs), e.g. the candidate_pairs
+        """
+        if self.__penalty is None:
+            return self.neighbour_values(pairs)
+
+        first, second = self.__swap_pairs
+        lines_first, lines_second = get_swap_line_table(self.cube.size)
+        if pairs is not None:
+            first, second = first[pairs], second[pairs]
+            lines_first, lines_second = lines_first[pairs], lines_second[pairs]
+        self.scanned += len(first)
+        penalty = self.__penalty
+
+        # The padding of the swap line table points to one extra line that never changes
+        deviations = np.append(np.asarray(self.line_sums) - self.__magic_sum, 0)
+        difference = (self.cube.data[second].astype(np.int64) - self.cube.data[first])[:, None]
+        n_lines = len(self.line_sums)
+
+        deviations_first = deviations[lines_first]
+        deviations_second = deviations[lines_second]
+        delta = (penalty(deviations_first) -
+                 penalty(deviations_first + difference * (lines_first < n_lines))).sum(axis=1)
+        delta += (penalty(deviations_second) -
+                  penalty(deviations_second - difference * (lines_second < n_lines))).sum(axis=1)
+        return self.score + delta
+
+    def swap(self, i: int, j: int) -> int:
+        """
+        Swap the cells at index i and j of the cube in place and update the line sums and the score.
+
+        :return: The new objective value
+        """
+        data = self.cube.data
+        difference = int(data[j]) - int(data[i])
+        if difference == 0:
+            return self.value
+
+        if self.__penalty is not None:
+            self.score += self.swap_delta(i, j)
+
+        lines_i = self.__cell_lines[i]
+        lines_j = self.__cell_lines[j]
+        line_sums = self.line_sums
+        magic_sum = self.__magic_sum
+        for line in lines_i:
+            if line not in lines_j:
+                line_sum = line_sums[line]
+                self.value += (line_sum + difference == magic_sum) - (line_sum == magic_sum)
+                line_sums[line] = line_sum + difference
+        for line in lines_j:
+            if line not in lines_i:
+                line_sum = line_sums[line]
+                self.value += (line_sum - difference == magic_sum) - (line_sum == magic_sum)
+                line_sums[line] = line_sum - difference
+
+        data[i], data[j] = data[j], data[i]
+        if self.__violations is not None:
+            self.__update_violations(lines_i, lines_j, difference)
+        if self.__penalty is None:
+            self.score = self.value
+        return self.value
+
+    # -- INTERNAL FUNCTIONS --
+
+    def __count_violations(self) -> None:
+        """
+        Count the violated lines through every cell from the line sums.
+        """
+        table = get_line_table(self.cube.size)
+        violated = np.asarray(self.line_sums) != self.__magic_sum
+        self.__violations = np.bincount(table[violated].ravel(), minlength=self.cube.size**3)
+
+    def __update_violations(self, lines_i: tuple[int, ...], lines_j: tuple[int, ...], difference: int) -> None:
+        """
+        Update the violated lines through every cell after a swap changed the lines of cell i by +difference and the
+        lines of cell j by -difference.
+        """
+        table = get_line_table(self.cube.size)
+        magic_sum = self.__magic_sum
+        for lines, other, change in ((lines_i, lines_j, difference), (lines_j, lines_i, -difference)):
+            for line in lines:
+                if line not in other:
+                    line_sum = self.line_sums[line]
+                    was_magic = line_sum - change == magic_sum
+                    if was_magic != (line_sum == magic_sum):
+                        # The line became violated (was magic) or magic (was violated)
+                        self.__violations[table[line]] += 1 if was_magic else -1
@@ -1,5 +1,19 @@
 import numpy as np
 
+from data_structure.line_table import get_line_table, get_line_count, get_magic_sum
+
+
+# Scores a search can maximize: the objective value itself, or a graded score of the line sum deviations
+OBJECTIVES = ("count", "absolute", "squared")
+
+
+def _square(deviation):
+    return deviation * deviation
+
+
+# Penalty of a line sum that deviates from the magic number, per graded objective. Works on ints and arrays.
+PENALTIES = {"absolute": abs, "squared": _square}
+
 
 # CLASS PLACEHOLDER FOR TYPE CHECKING
 class MagicCube:
@@ -11,10 +25,11 @@ class MagicCube:
     """
     size: int
     magic_sum: int
+    data: np.ndarray
 
     def __init__(self, size: int = 5):
         self.size = size
-        self.magic_sum = 315
+        self.magic_sum = get_magic_sum(size)
 
     def get_row(self, y: int, z: int) -> np.ndarray:
         # Returns a row for given indices y, z
@@ -52,8 +67,18 @@ class ObjectiveFunction:
     Static Class --> no Constructor
 
     Use by calling ObjectiveFunction.get_object_value: Returns objective value from internal function
+
+    The objective value is the amount of lines whose sum is the magic number, its maximum (a perfect magic cube) is
+    ObjectiveFunction.get_max_value, 109 for a 5x5x5 cube.
     """
 
+    @staticmethod
+    def get_max_value(size: int) -> int:
+        """
+        Returns the objective value of a perfect magic cube with the given size, the amount of lines of the cube.
+        """
+        return get_line_count(size)
+
     @staticmethod
     def get_object_value(magic_cube: MagicCube) -> int:
         """
@@ -62,57 +87,47 @@ class ObjectiveFunction:
         :return: Objective function value of a magic cube
         """
 
-        # 109 is the maximum possible state value for a 5x5x5 magic cube
-        return 109 - ObjectiveFunction.__check_315(magic_cube)
+        # Every line that is not equal to the magic number lowers the maximum possible state value
+        return get_line_count(magic_cube.size) - ObjectiveFunction.__check_magic_sum(magic_cube)
+
+    @staticmethod
+    def get_object_values(cubes_data: np.ndarray, size: int) -> np.ndarray:
+        """
+        Returns the objective value of many magic cubes at once.
+
+        :param cubes_data: Array of shape (amount of cubes, size^3), one cube data per row
+        :param size: The dimensions of every magic cube
+        :return: Objective function value of each magic cube
+        """
+
+        # Gather every line of every cube at once, shape (amount of cubes, n_lines, size)
+        lines = cubes_data[:, get_line_table(size)]
+        return get_line_count(size) - np.count_nonzero(lines.sum(axis=2) != get_magic_sum(size), axis=1)
+
+    @staticmethod
+    def get_object_scores(cubes_data: np.ndarray, size: int, objective: str = "count") -> np.ndarray:
+        """
+        Returns the score of many magic cubes at once for one of OBJECTIVES.
+
+        "count" is the objective value, the graded objectives are minus the sum of the absolute or squared deviation
+        of every line sum from the magic number (0 for a perfect magic cube).
+
+        :param cubes_data: Array of shape (amount of cubes, size^3), one cube data per row
+        :param size: The dimensions of every magic cube
+        :param objective: One of OBJECTIVES
+        :return: Score of each magic cube
+        """
+        if objective == "count":
+            return ObjectiveFunction.get_object_values(cubes_data, size)
+        deviations = cubes_data[:, get_line_table(size)].sum(axis=2, dtype=np.int64) - get_magic_sum(size)
+        return -PENALTIES[objective](deviations).sum(axis=1)
 
     @staticmethod
-    def __check_315(magic_cube: MagicCube) -> int:
+    def __check_magic_sum(magic_cube: MagicCube) -> int:
         """
         Returns the sum of a series (row/column/pillar/diagonal) from the cube that is not equal to the magic number.
         """
 
-        # Check all rows
-        not_315_row = 0
-        for z in range(magic_cube.size):
-            for y in range(magic_cube.size):
-                if np.sum(magic_cube.get_row(y, z)) != magic_cube.magic_sum:
-                    not_315_row += 1
-
-        # Check all columns
-        not_315_col = 0
-        for z in range(magic_cube.size):
-            for x in range(magic_cube.size):
-                if np.sum(magic_cube.get_col(x, z)) != magic_cube.magic_sum:
-                    not_315_col += 1
-
-        # Check all pillars
-        not_315_pil = 0
-        for y in range(magic_cube.size):
-            for x in range(magic_cube.size):
-                if np.sum(magic_cube.get_pillar(x, y)) != magic_cube.magic_sum:
-                    not_315_pil += 1
-
-        # Check all space diagonals
-        not_315_space_diag = 0
-        for diag in magic_cube.get_space_diags():
-            if np.sum(diag) != magic_cube.magic_sum:
-                not_315_space_diag += 1
-
-        # Check all side diagonals on each axis
-        not_315_diag_x = 0
-        for diag_x in magic_cube.get_side_diags_x():
-            if np.sum(diag_x) != magic_cube.magic_sum:
-                not_315_diag_x += 1
-
-        not_315_diag_y = 0
-        for diag_y in magic_cube.get_side_diags_y():
-            if np.sum(diag_y) != magic_cube.magic_sum:
-                not_315_diag_y += 1
-
-        not_315_diag_z = 0
-        for diag_z in magic_cube.get_side_diags_z():
-            if np.sum(diag_z) != magic_cube.magic_sum:
-                not_315_diag_z += 1
-
-        return (not_315_row + not_315_col + not_315_pil + not_315_space_diag +
-                not_315_diag_x + not_315_diag_y + not_315_diag_z)
+        # Gather every line at once through the precomputed line index table, shape (n_lines, size)
+        lines = magic_cube.data[get_line_table(magic_cube.size)]
+        return int(np.count_nonzero(lines.sum(axis=1) != magic_cube.magic_sum))
@@ -0,0 +1,120 @@
+import math
+import threading
+import time
+
+
+class SearchBudget:
+    """
+    The limits of a local search run: a wall-clock deadline, a maximum amount of objective evaluations and a
+    cancellation token.
+
+    The budget is enforced by the SearchMonitor it is given to: once it is spent, SearchMonitor.update returns True and
+    the algorithm returns its best state so far. The time limit counts from the creation of the budget. Budgets are
+    checked as often as the algorithm calls SearchMonitor.update, so a search may run over by one check interval.
+
+    :var time_limit: The amount of seconds the search may run, None if unbounded
+    :var max_evaluations: The amount of objective evaluations (scored swaps or individuals) the search may do, None if
+                          unbounded
+    :var cancel_event: The cancellation token, set to stop every search sharing the budget
+    :var deadline: The time.monotonic() value after which the search stops, None if unbounded
+    :var stop_reason: Why the search stopped: "cancelled", "deadline" or "evaluations", None while the budget lasts
+    """
+
+    def __init__(self, time_limit: float = None, max_evaluations: int = None, cancel_event: threading.Event = None):
+        self.time_limit: float | None = time_limit
+        self.max_evaluations: int | None = max_evaluations
+        self.cancel_event: threading.Event = cancel_event if cancel_event is not None else threading.Event()
+        self.deadline: float | None = None if time_limit is None else time.monotonic() + time_limit
+        self.stop_reason: str | None = None
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check(self, evaluations: int = 0) -> bool:
+        """
+        Returns True, and sets stop_reason, if the search was cancelled or ran out of time or evaluations.
+
+        :param evaluations: The amount of objective evaluations done since the search started
+        """
+        if self.cancel_event.is_set():
+            self.stop_reason = "cancelled"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.stop_reason = "deadline"
+        elif self.max_evaluations is not None and evaluations >= self.max_evaluations:
+            self.stop_reason = "evaluations"
+        return self.stop_reason is not None
+
+
+class SearchMonitor:
+    """
+    Progress reporting, budget and cooperative cancellation of a running local search.
+
+    Every algorithm has a `monitor` attribute, by default a SearchMonitor without callback and with an unbounded
+    budget. The algorithm calls SearchMonitor.update as it runs and stops, returning its best state so far, once update
+    returns True. Another thread (e.g. the GUI) stops the search with SearchMonitor.cancel.
+
+    :var callback: Called with the progress of the search, at most once per `interval` seconds. The progress is a dict
+                   of iteration, total (the maximum amount of iterations, None if unbounded), current_value,
+                   best_value and evaluations_per_second.
+    :var interval: The minimum amount of seconds between two callbacks
+    :var budget: The limits of the search, see SearchBudget
+    """
+
+    def __init__(self, callback=None, interval: float = 0.1, budget: SearchBudget = None):
+        self.callback = callback
+        self.interval: float = interval
+        self.budget: SearchBudget = budget if budget is not None else SearchBudget()
+        self.__start_time: float = time.perf_counter()
+        self.__last_report: float = -math.inf
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        """
+        The event set once the search is cancelled, the cancellation token of the budget.
+        """
+        return self.budget.cancel_event
+
+    @property
+    def stopped(self) -> bool:
+        """
+        Whether the search was stopped by a cancellation or by its budget.
+        """
+        return self.budget.stop_reason is not None
+
+    def cancel(self) -> None:
+        """
+        Ask the search to stop, it stops on its next call of SearchMonitor.update.
+        """
+        self.budget.cancel()
+
+    def is_cancelled(self) -> bool:
+        return self.budget.is_cancelled()
+
+    def update(self, iteration: int, total: int | None, current_value: int, best_value: int,
+               evaluations: int) -> bool:
+        """
+        Report the progress of the search to the callback, if `interval` seconds passed since the last report.
+
+        :param iteration: The amount of iterations done
+        :param total: The maximum amount of iterations, None if unbounded
+        :param current_value: The objective value of the current state
+        :param best_value: The best objective value found so far
+        :param evaluations: The amount of objective evaluations done since the search started
+        :return: True if the search was cancelled or its budget is spent, and it must stop
+        """
+        if self.callback is not None:
+            now = time.perf_counter()
+            if now - self.__last_report >= self.interval:
+                self.__last_report = now
+                elapsed = now - self.__start_time
+                self.callback({
+                    "iteration": iteration,
+                    "total": total,
+                    "current_value": current_value,
+                    "best_value": best_value,
+                    "evaluations_per_second": evaluations / elapsed if elapsed > 0 else 0.0,
+                })
+        return self.budget.check(evaluations)
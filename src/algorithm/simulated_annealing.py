@@ -1,8 +1,14 @@
 from data_structure.magic_cube import MagicCube
+from data_structure.trajectory import Trajectory
+from data_structure.trajectory_file import TrajectoryRecorder, TrajectoryFile
+from data_structure.line_table import get_swap_pairs
 from algorithm.objective_function import ObjectiveFunction
+from algorithm.search_monitor import SearchMonitor
+from algorithm.cooling_schedule import CoolingSchedule, COOLING_SCHEDULES, get_cooling_schedule
 
 import random
 import math
+import numpy as np
 
 
 class SimulatedAnnealing:
@@ -10,90 +16,378 @@ class SimulatedAnnealing:
     Implementation of simulated annealing algorithm
 
     :var INITIAL_TEMPERATURE: constant of initial temperature of algorithm
+    :var FINAL_TEMPERATURE: temperature the geometric, linear and Lundy-Mees schedules reach at MAX_TIME
     :var cube: The initial of a magic cube
     :var objective: The objective value of current state
     :var time: The time variable for iteration
+    :var monitor: Progress reports and cancellation, checked every MONITOR_INTERVAL iterations
     """
 
-    def __init__(self, initial_cube, cube_size):
+    # Temperatures are given in units of the "count" objective, whose smallest score change is one line, and
+    # multiplied by the temperature scale of the objective: this quantile of the score changes of sampled swaps
+    SCALE_QUANTILE = 0.01
+    # Records of a trajectory file read at once when computing the probabilities of a recorded run
+    RECORD_CHUNK = 65536
+
+    def __init__(self, initial_cube, cube_size, record_path: str = None, objective: str = "count",
+                 record: bool = True, schedule: str = "logarithmic", reheat_after: int = None,
+                 calibrate: bool = False):
         """
         Initialization for the algorithm
 
         :param initial_cube: The initial magic cube object before algorithm starts
         :param cube_size: The size of initial magic cube
+        :param record_path: Optional trajectory file to stream the accepted moves and their temperatures to, instead
+                            of keeping them in memory. Once the run ends, the states are read back from the file.
+        :param objective: The score to maximize, one of objective_function.OBJECTIVES. The states always record the
+                          objective value (amount of magic lines).
+        :param record: Log every accepted move and its probability. Without it, the states only hold the initial and
+                       the final cube, which keeps long runs free of logging costs.
+        :param schedule: The cooling schedule, one of cooling_schedule.COOLING_SCHEDULES
+        :param reheat_after: Reheat once the best score did not improve for this amount of steps: if the chain is
+                             colder than REHEAT_FRACTION of the initial temperature, the schedule restarts from there
+                             and cools over the remaining steps. None never reheats.
+        :param calibrate: Set the initial temperature from a sample of random swaps before the run, see
+                          SimulatedAnnealing.calibrate_temperature
         """
+        if record_path is not None and not record:
+            raise ValueError("record_path streams the accepted moves, it needs record=True")
+        if schedule not in COOLING_SCHEDULES:
+            raise ValueError(f"Unknown cooling schedule {schedule}, expected one of {', '.join(COOLING_SCHEDULES)}")
 
         # CONSTANTS (Algorithm Settings)
-        self.INITIAL_TEMPERATURE = 2
+        self.OBJECTIVE = objective
+        self.RECORD = record
+        self.SCHEDULE = schedule
+        self.REHEAT_AFTER = reheat_after
+        self.REHEAT_FRACTION = 0.5
+        self.CALIBRATE = calibrate
+        self.CALIBRATION_SAMPLES = 1000
+        self.CALIBRATION_ACCEPTANCE = 0.5   # initial probability of accepting a small worsening swap
         self.MAX_TIME = 250000
         # self.MAX_TIME = 1000
-        self.TARGET_VALUE = 109
+        self.TARGET_VALUE = ObjectiveFunction.get_max_value(initial_cube.size)
+        self.MONITOR_INTERVAL = 1000
+        self.monitor: SearchMonitor = SearchMonitor()
         self.time = 1
-        self.cube = initial_cube
+        self.cube = initial_cube.copy()             # working cube, swapped in place
+        self.evaluator = self.cube.get_evaluator(objective)  # line sums and score of the working cube
+        self.TEMPERATURE_SCALE = self.get_temperature_scale()
+        # 2 / log(time + 1) with the logarithmic schedule
+        self.INITIAL_TEMPERATURE = 2 / math.log(2) * self.TEMPERATURE_SCALE
+        self.FINAL_TEMPERATURE = 0.1 * self.TEMPERATURE_SCALE
         self.objective = ObjectiveFunction.get_object_value(initial_cube)
         self.size = cube_size
-        self.states: list[MagicCube] = [initial_cube]
+        self.record_path = record_path
+        if record_path is None:
+            self.states: Trajectory | TrajectoryFile = Trajectory(initial_cube, self.objective)  # every accepted move
+        else:
+            self.states: TrajectoryRecorder | TrajectoryFile = TrajectoryRecorder(record_path, initial_cube,
+                                                                                  self.objective)
+        # Recorded runs of the "count" objective recompute the probabilities from the file instead of keeping them
+        self.keep_probabilities: bool = record and (record_path is None or objective != "count")
         self.data_per_iteration: list[float] = []
         self.stuck_frequency: int = 0
+        self.reheats: int = 0
+        self.temperatures: list[float] = []         # temperature ladder of the parallel tempering replicas
+        self.acceptance_rates: list[float] = []     # accepted proposals / proposals, per replica
+        self.swap_rates: list[float] = []           # accepted exchanges / attempts, per pair of neighbouring replicas
 
     def simulated_annealing(self):
         """
         Execute the Algorithm
         """
+        best_objective = self.objective
+        evaluator = self.evaluator
+        cells = self.size ** 3
+        if self.CALIBRATE:
+            self.calibrate_temperature()
+        schedule = get_cooling_schedule(self.SCHEDULE, self.INITIAL_TEMPERATURE,
+                                        min(self.FINAL_TEMPERATURE, self.INITIAL_TEMPERATURE), self.MAX_TIME)
+        start = 0                       # step of the schedule is time - start, moved by every reheat
+        best_score = evaluator.score
+        best_data = self.cube.data.copy()
+        last_improvement = self.time
         if not self.cube.is_perfect():
             while self.time <= self.MAX_TIME:
-                neighbor, neighbor_objective = self.__get_random_neighbor()
-                if neighbor_objective == self.TARGET_VALUE:
-                    self.states.append(neighbor)
+                if self.time % self.MONITOR_INTERVAL == 0 and self.monitor.update(
+                        self.time, self.MAX_TIME, self.objective, best_objective, self.time):
                     break
-                if neighbor_objective > self.objective:
-                    self.states.append(neighbor)
-                    self.cube = neighbor
-                    self.objective = neighbor_objective
+                if self.REHEAT_AFTER and self.time - last_improvement >= self.REHEAT_AFTER:
+                    last_improvement = self.time
+                    if schedule.temperature(self.time - start) < self.REHEAT_FRACTION * self.INITIAL_TEMPERATURE:
+                        schedule = self.__reheat(schedule)
+                        start = self.time - 1
+                # Score the proposal without swapping, only accepted swaps are applied to the working cube.
+                # delta_E is the change of the score, the objective value is read back from the evaluator
+                i, j = self.__get_random_pair(cells)
+                delta_E = evaluator.swap_delta(i, j)
+                if delta_E > 0:
+                    self.objective = evaluator.swap(i, j)
+                    if self.RECORD:
+                        self.__record_swap(i, j, self.objective, schedule.temperature(self.time - start))
+                    best_objective = max(best_objective, self.objective)
+                    if evaluator.score > best_score:
+                        best_score = evaluator.score
+                        best_data[:] = self.cube.data
+                        last_improvement = self.time
+                    if self.objective >= self.TARGET_VALUE:
+                        break
 
-                    print("State " + str(self.time) + " with value " + str(neighbor_objective) + " and current " +
-                        str(self.objective) + " is better")
+                    print("State " + str(self.time) + " with value " + str(self.objective) + " is better")
 
                 else:
-                    delta_E = neighbor_objective - self.objective
-                    if self.__accept_by_probability(delta_E, self.time):
+                    temperature: float = schedule.temperature(self.time - start)
+                    probability: float = self.__accept_by_probability(delta_E, temperature)
+                    if probability:
+                        self.objective = evaluator.swap(i, j)
                         if delta_E < 0:
-                            self.states.append(neighbor)
                             self.stuck_frequency += 1
-                        self.cube = neighbor
-                        self.objective = neighbor_objective
-                        temperature: float = self.INITIAL_TEMPERATURE / math.log(self.time + 1)
-                        probability: float = math.exp(delta_E / temperature)
-                        self.data_per_iteration.append(probability)
-                        # if delta_E < 0:
-                        #     print("State " + str(self.time) + " with value " + str(neighbor_objective) + " and current "
-                        #           + str(self.objective) + " with probability " + str(probability) + " E = " +
-                        #           str(delta_E))
+                        if self.RECORD:
+                            self.__record_swap(i, j, self.objective, temperature)
+                        if self.keep_probabilities:
+                            # Recorded runs recompute the probabilities from the file
+                            self.data_per_iteration.append(probability)
                 self.time += 1
+        if self.monitor.stopped and evaluator.score < best_score:
+            # Cancelled or out of budget, end on the best state found so far
+            self.cube.data[:] = best_data
+            self.evaluator = self.cube.get_evaluator(self.OBJECTIVE)
+            self.objective = self.evaluator.value
+            if self.RECORD:
+                self.__record(self.cube, self.objective, schedule.temperature(self.time - start))
+        self.__finish_recording()
+        return
+
+    def parallel_tempering(self, replicas: int = 4, min_temperature: float = 0.1, max_temperature: float = 0.25,
+                           exchange_interval: int = 10):
+        """
+        Execute the Algorithm in replica exchange (parallel tempering) mode.
+
+        Runs `replicas` chains, all starting from the initial cube, at fixed temperatures on a geometric ladder from
+        min_temperature to max_temperature. Every `exchange_interval` sweeps (one proposal per chain), each pair of
+        neighbouring chains tries to exchange states. MAX_TIME is the total amount of proposals over all chains.
+        The coldest chain is the one recorded in states.
+
+        The objective changes by whole lines, so chains only exchange often when their temperatures are close:
+        a narrow ladder works better than one spanning the whole logarithmic schedule.
+
+        :param replicas: The amount of chains, at least 2
+        :param min_temperature: The temperature of the coldest chain, in units of the "count" objective
+        :param max_temperature: The temperature of the hottest chain, in units of the "count" objective
+        :param exchange_interval: The amount of sweeps between two rounds of exchanges
+        """
+        if replicas < 2:
+            raise ValueError("Parallel tempering needs at least 2 replicas")
+
+        # Temperature ladder, index 0 is the coldest chain
+        ratio = max_temperature / min_temperature
+        scale = self.TEMPERATURE_SCALE
+        self.temperatures = [scale * min_temperature * ratio ** (k / (replicas - 1)) for k in range(replicas)]
+
+        chains = [self.evaluator] + [self.cube.copy().get_evaluator(self.OBJECTIVE) for _ in range(replicas - 1)]
+        objectives = [self.objective] * replicas
+        proposals = [0] * replicas
+        accepted = [0] * replicas
+        exchange_attempts = [0] * (replicas - 1)
+        exchanges = [0] * (replicas - 1)
+        solved = None  # index of the chain that reached the target value
+        sweep = 0
+        cells = self.size ** 3
+
+        if not self.cube.is_perfect():
+            while self.time <= self.MAX_TIME and solved is None:
+                if sweep % self.MONITOR_INTERVAL == 0 and self.monitor.update(
+                        self.time, self.MAX_TIME, objectives[0], max(objectives), self.time):
+                    break
+                for k in range(replicas):
+                    i, j = self.__get_random_pair(cells)
+                    delta_E = chains[k].swap_delta(i, j)
+                    proposals[k] += 1
+                    self.time += 1
+                    probability = self.__accept_by_probability(delta_E, self.temperatures[k])
+                    if probability:
+                        objectives[k] = chains[k].swap(i, j)
+                        accepted[k] += 1
+                        if k == 0:
+                            if self.RECORD:
+                                self.__record_swap(i, j, objectives[0], self.temperatures[0])
+                            if delta_E < 0:
+                                self.stuck_frequency += 1
+                                if self.keep_probabilities:
+                                    self.data_per_iteration.append(probability)
+                        if objectives[k] >= self.TARGET_VALUE:
+                            solved = k
+                            break
+
+                sweep += 1
+                if solved is None and sweep % exchange_interval == 0:
+                    for k in range(replicas - 1):
+                        # Exchange with probability min(1, exp((1/T_k - 1/T_k+1) * (score_k+1 - score_k)))
+                        exchange_attempts[k] += 1
+                        delta_E = chains[k + 1].score - chains[k].score
+                        temperature = 1 / (1 / self.temperatures[k] - 1 / self.temperatures[k + 1])
+                        if self.__accept_by_probability(delta_E, temperature):
+                            chains[k], chains[k + 1] = chains[k + 1], chains[k]
+                            objectives[k], objectives[k + 1] = objectives[k + 1], objectives[k]
+                            exchanges[k] += 1
+                            if k == 0 and self.RECORD:
+                                self.__record(chains[0].cube, objectives[0], self.temperatures[0])
+
+        best = solved if solved is not None else 0
+        if self.monitor.stopped:
+            # Cancelled or out of budget, end on the chain with the best score
+            best = max(range(replicas), key=lambda k: chains[k].score)
+        if best != 0 and self.RECORD:
+            self.__record(chains[best].cube, objectives[best], self.temperatures[best])
+        self.evaluator = chains[best]
+        self.cube = self.evaluator.cube
+        self.objective = objectives[best]
+        self.acceptance_rates = [a / p if p else 0.0 for a, p in zip(accepted, proposals)]
+        self.swap_rates = [e / a if a else 0.0 for e, a in zip(exchanges, exchange_attempts)]
+        self.__finish_recording()
         return
 
-    def get_states(self) -> list[MagicCube]:
+    def get_states(self) -> Trajectory | TrajectoryFile:
         return self.states
 
-    def get_probability_per_iteration(self) -> list[float]:
+    def get_probability_per_iteration(self) -> list[float] | np.ndarray:
+        if self.RECORD and not self.keep_probabilities:
+            # exp(delta_E / temperature) of every accepted move that did not improve the objective, read from the
+            # trajectory file RECORD_CHUNK records at a time
+            values, temperatures, swaps = self.states.values, self.states.temperatures, self.states.swaps
+            probabilities = []
+            for start in range(1, len(values), self.RECORD_CHUNK):
+                stop = min(start + self.RECORD_CHUNK, len(values))
+                delta_e = np.diff(values[start - 1:stop])
+                accepted = (delta_e <= 0) & (swaps[start:stop, 0] >= 0)
+                if self.temperatures:
+                    # Parallel tempering only records the probabilities of the moves that made the objective worse
+                    accepted &= delta_e < 0
+                probabilities.append(np.exp(delta_e[accepted] / temperatures[start:stop][accepted]))
+            return np.concatenate(probabilities) if probabilities else np.empty(0, dtype=temperatures.dtype)
         return self.data_per_iteration
 
     def get_stuck_frequency(self) -> int:
         return self.stuck_frequency
 
+    def get_reheats(self) -> int:
+        return self.reheats
+
+    def get_temperature_scale(self) -> float:
+        """
+        Returns the temperature scale of the objective: the SCALE_QUANTILE quantile of the score changes of
+        CALIBRATION_SAMPLES random swaps of the working cube, among the swaps changing the score.
+
+        The "count" objective changes by whole lines, its scale is 1. The graded objectives change by a wide range of
+        amounts, and a random cube is far from the line sums the search ends near: scaling by their smallest changes
+        instead of their typical change keeps the chain as selective as with the "count" objective once it cools.
+        Returns 1 if no sampled swap changes the score.
+        """
+        if self.OBJECTIVE == "count":
+            return 1.0
+        changes = self.__sample_score_changes()
+        if len(changes) == 0:
+            return 1.0
+        return max(float(np.quantile(changes, self.SCALE_QUANTILE)), 1.0)
+
+    def calibrate_temperature(self) -> float:
+        """
+        Set the initial temperature so that a swap worsening the score by a small score change is accepted with
+        probability CALIBRATION_ACCEPTANCE: T0 = -q / log(CALIBRATION_ACCEPTANCE), with q the SCALE_QUANTILE quantile
+        of the score changes of CALIBRATION_SAMPLES random swaps of the working cube. Improving swaps count as well,
+        since swapping back worsens the score by the same amount: a random initial cube has almost no magic line to
+        lose. The final temperature is scaled by the same factor, and reheats start from the calibrated temperature.
+        Keeps the temperatures if no sampled swap changes the score.
+
+        :return: The initial temperature
+        """
+        changes = self.__sample_score_changes()
+        if len(changes):
+            temperature = float(-np.quantile(changes, self.SCALE_QUANTILE) / math.log(self.CALIBRATION_ACCEPTANCE))
+            # The final temperature keeps its ratio to the initial temperature
+            self.FINAL_TEMPERATURE *= temperature / self.INITIAL_TEMPERATURE
+            self.INITIAL_TEMPERATURE = temperature
+        return self.INITIAL_TEMPERATURE
+
+    def get_acceptance_rates(self) -> list[float]:
+        return self.acceptance_rates
+
+    def get_swap_rates(self) -> list[float]:
+        return self.swap_rates
+
     # -- INTERNAL FUNCTION --
 
-    def __get_random_neighbor(self) -> [MagicCube, int]:
+    def __record_swap(self, i: int, j: int, objective: int, temperature: float) -> None:
+        """
+        Append an accepted move to the states, with its temperature if the states are streamed to a file
+        """
+        if self.record_path is None:
+            self.states.append_swap(i, j, objective)
+        else:
+            self.states.append_swap(i, j, objective, temperature)
+
+    def __record(self, cube: MagicCube, objective: int, temperature: float) -> None:
+        """
+        Append a state that is not one swap away from the last state to the states
+        """
+        if self.record_path is None:
+            self.states.append(cube, objective)
+        else:
+            self.states.append(cube, objective, temperature)
+
+    def __reheat(self, schedule: CoolingSchedule) -> CoolingSchedule:
+        """
+        Returns the schedule restarting from REHEAT_FRACTION of the initial temperature at the current time, and
+        cooling over the remaining steps
+        """
+        self.reheats += 1
+        temperature = self.REHEAT_FRACTION * self.INITIAL_TEMPERATURE
+        print("State " + str(self.time) + " reheats to temperature " + str(temperature))
+        return get_cooling_schedule(self.SCHEDULE, temperature, schedule.final_temperature,
+                                    self.MAX_TIME - self.time + 1)
+
+    def __finish_recording(self) -> None:
+        """
+        Close the trajectory file of a recorded run and read the states back from it, or append the final state to
+        the states of a run that did not record its moves
+        """
+        if isinstance(self.states, TrajectoryRecorder):
+            self.states = self.states.close()
+        elif not self.RECORD:
+            self.states.append(self.cube, self.objective)
+
+    def __sample_score_changes(self) -> np.ndarray:
         """
-        Returns a random neighbor and it's value
+        Returns the absolute score change of CALIBRATION_SAMPLES random swaps of the working cube, without the swaps
+        that keep the score
         """
-        i = random.randint(0, self.size ** 3 - 1)
-        j = random.randint(i, self.size ** 3 - 1)
-        neighbor: MagicCube = self.cube.swap_index_copy(i, j)
-        neighbor_objective: int = ObjectiveFunction.get_object_value(neighbor)
-        return [neighbor, neighbor_objective]
+        first, _ = get_swap_pairs(self.cube.size)
+        pairs = np.random.randint(len(first), size=self.CALIBRATION_SAMPLES)
+        delta_E = self.evaluator.neighbour_scores(pairs) - self.evaluator.score
+        return np.abs(delta_E[delta_E != 0])
 
-    def __accept_by_probability(self, delta_e, time) -> bool:
-        temperature: float = self.INITIAL_TEMPERATURE / math.log(time + 1)
+    @staticmethod
+    def __get_random_pair(cells: int) -> tuple[int, int]:
+        """
+        Returns a random pair of distinct indices (i < j) to swap, every pair with the same probability
+        """
+        i = random.randrange(cells)
+        j = random.randrange(cells - 1)
+        if j >= i:
+            j += 1
+        return (i, j) if i < j else (j, i)
+
+    @staticmethod
+    def __accept_by_probability(delta_e, temperature) -> float:
+        """
+        Metropolis rule: accept a move that does not decrease the score, and a worse move with probability
+        exp(delta_e / temperature).
+
+        :return: The probability of the move if it is accepted (1 for moves that do not decrease the score), 0 if it
+                 is rejected
+        """
+        if delta_e >= 0:
+            return 1.0
         probability: float = math.exp(delta_e / temperature)
-        return random.random() < probability
+        return probability if random.random() < probability else 0.0
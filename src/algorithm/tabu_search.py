@@ -0,0 +1,124 @@
+from data_structure.magic_cube import MagicCube
+from data_structure.line_table import get_swap_pairs
+from data_structure.trajectory import Trajectory
+from algorithm.line_sum_evaluator import LineSumEvaluator
+from algorithm.objective_function import ObjectiveFunction
+from algorithm.search_monitor import SearchMonitor
+
+import numpy as np
+
+
+class TabuSearch:
+    """
+    A local search algorithm: Tabu Search.
+
+    Every iteration moves to the best swap of the neighbourhood that is not tabu, even if it is worse than the current
+    state, so the search walks out of local optima. The attribute of a move stays tabu for the next `tenure`
+    iterations, which keeps the search from undoing recent moves and cycling:
+        - "cell": both swapped cells can not be swapped again
+        - "assignment": both swapped values can not go back to the cell they left, other swaps of them are allowed
+    A tabu swap is still allowed if it reaches a score higher than the best score found so far (aspiration).
+
+    The whole neighbourhood is scored per iteration through the line sums, without creating any successor.
+    """
+
+    ATTRIBUTES = ("cell", "assignment")
+
+    def __init__(self, initial_cube: MagicCube, max_iterations: int = 1000, tenure: int = None,
+                 attribute: str = "assignment", objective: str = "count"):
+        """
+        :param max_iterations: The maximum amount of moves
+        :param tenure: The amount of iterations a move stays tabu, default size^3 / 10
+        :param attribute: What a move makes tabu, one of ATTRIBUTES
+        :param objective: The score to maximize, one of objective_function.OBJECTIVES. The states always record the
+                          objective value (amount of magic lines).
+        """
+        if attribute not in self.ATTRIBUTES:
+            raise ValueError(f"Unknown tabu attribute {attribute}, expected one of {', '.join(self.ATTRIBUTES)}")
+        self.MAX_ITERATION: int = int(max_iterations)
+        self.TENURE: int = int(tenure) if tenure else max(1, initial_cube.size**3 // 10)
+        self.ATTRIBUTE: str = attribute
+        self.TARGET_VALUE = ObjectiveFunction.get_max_value(initial_cube.size)
+        self.objective: str = objective
+        self.states: Trajectory = Trajectory(initial_cube)   # every move, then the best state
+        self.best_score: int = 0
+        self.aspirations: int = 0                            # tabu moves taken because they beat the best score
+        self.monitor: SearchMonitor = SearchMonitor()        # progress reports and cancellation
+
+    def tabu_search(self) -> tuple[Trajectory, int]:
+        """
+        Returns the states and the amount of iterations. The last state is the best state found.
+        """
+        current = self.states[-1]                           # copy of the initial cube, swapped in place
+        current_value = int(self.states.values[-1])
+        evaluator = current.get_evaluator(self.objective)   # line sums and score of the current state
+        first, second = get_swap_pairs(current.size)
+        # First iteration at which each cell, or each (cell, value) assignment, is no longer tabu
+        if self.ATTRIBUTE == "cell":
+            tabu_until = np.zeros(current.size**3, dtype=np.int64)
+        else:
+            tabu_until = np.zeros((current.size**3, current.size**3 + 1), dtype=np.int64)
+
+        self.best_score = evaluator.score
+        best_value = current_value
+        best_data = current.data.copy()
+        i = 0
+        while i < self.MAX_ITERATION and best_value < self.TARGET_VALUE:
+            if self.monitor.update(i, self.MAX_ITERATION, current_value, best_value, i * len(first)):
+                break
+
+            move = self.__get_best_admissible_move(evaluator, tabu_until, i, first, second)
+            if move is None:
+                # every swap is tabu
+                break
+            swap, neighbour_score = move
+
+            # The move is tabu on the next TENURE iterations, i + 1 to i + TENURE
+            if self.ATTRIBUTE == "cell":
+                tabu_until[list(swap)] = i + 1 + self.TENURE
+            else:
+                # Forbid putting each value back into the cell it leaves
+                tabu_until[list(swap), current.data[list(swap)]] = i + 1 + self.TENURE
+            current_value = evaluator.swap(*swap)
+            self.states.append_swap(*swap, current_value)
+            i += 1
+
+            if neighbour_score > self.best_score:
+                self.best_score = neighbour_score
+                best_value = current_value
+                best_data = current.data.copy()
+            print("iteration", i, "- current value", current_value, "- best value", best_value)
+
+        if evaluator.score < self.best_score:
+            # End on the best state instead of the last move
+            self.states.append(MagicCube(current.size, best_data), best_value)
+        return self.states, i
+
+    def get_aspirations(self) -> int:
+        return self.aspirations
+
+    # -- INTERNAL FUNCTIONS --
+
+    def __get_best_admissible_move(self, evaluator: LineSumEvaluator, tabu_until: np.ndarray, iteration: int,
+                                   first: np.ndarray, second: np.ndarray) -> tuple[tuple[int, int], int] | None:
+        """
+        Returns the best swap that is not tabu or beats the best score, and the score after that swap.
+        Ties are broken at random. Returns None if every swap is tabu.
+        """
+        scores = evaluator.neighbour_scores()
+        if self.ATTRIBUTE == "cell":
+            tabu = (tabu_until[first] > iteration) | (tabu_until[second] > iteration)
+        else:
+            # The swap puts the value of the second cell into the first cell and the other way around
+            data = evaluator.cube.data
+            tabu = (tabu_until[first, data[second]] > iteration) | (tabu_until[second, data[first]] > iteration)
+        admissible = ~tabu | (scores > self.best_score)
+        if not admissible.any():
+            return None
+
+        max_score = scores[admissible].max()
+        candidates = np.flatnonzero(admissible & (scores == max_score))
+        index = candidates[np.random.randint(len(candidates))]
+        if tabu[index]:
+            self.aspirations += 1
+        return (int(first[index]), int(second[index])), int(max_score)
@@ -0,0 +1,512 @@
+from data_structure.magic_cube import MagicCube
+from algorithm.objective_function import ObjectiveFunction, OBJECTIVES
+from data_structure.line_table import get_swap_pairs, get_line_table, get_cell_lines, get_swap_line_table
+from data_structure.trajectory import Trajectory
+from data_structure.cube_validator import validate_cubes
+from data_structure.zobrist_hash import ZobristHash
+from algorithm.simulated_annealing import SimulatedAnnealing
+from algorithm.cooling_schedule import COOLING_SCHEDULES
+from algorithm.search_monitor import SearchBudget
+import cli
+
+import argparse
+import contextlib
+import copy
+import datetime
+import io
+import itertools
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+
+
+# Bounded budget of every end-to-end solve, in cli.py options
+SOLVE_BUDGETS = {
+    "steepest": [],
+    "sideways": ["--max-sideways", "20"],
+    "random-restart": ["--restarts", "3", "--restart-iterations", "10"],
+    "stochastic": ["--iterations", "5000"],
+    "simulated-annealing": ["--iterations", "50000"],
+    "genetic": ["--iterations", "50", "--population", "100"],
+    "tabu": ["--iterations", "100"],
+}
+
+# Simulated annealing variants solved on top of SOLVE_BUDGETS, each with the simulated annealing budget and these
+# options. The logarithmic schedule is the default one of "simulated-annealing".
+SOLVE_SCHEDULES = {
+    **{schedule: ["--schedule", schedule] for schedule in COOLING_SCHEDULES if schedule != "logarithmic"},
+    "reheat": ["--reheat-after", "10000"],
+    "calibrated": ["--calibrate"],
+}
+
+# Units of the metrics, higher is better for every "/sec" unit and lower is better for the others
+PER_SECOND = "/sec"
+
+
+def per_line_objective(magic_cube: MagicCube) -> int:
+    """
+    Reference objective of the original implementation, inlined so it does not use the line index table: every line
+    is gathered and summed one by one, the diagonals element by element through a bounds-checked index.
+    """
+    n = magic_cube.size
+    data = magic_cube.data
+    magic_sum = magic_cube.magic_sum
+
+    def index(x: int, y: int, z: int) -> int:
+        if x < 0 or x >= n:
+            raise IndexError("Row index out of bounds")
+        if y < 0 or y >= n:
+            raise IndexError("Column index out of bounds")
+        if z < 0 or z >= n:
+            raise IndexError("Layer index out of bounds")
+        return x + y * n + z * n**2
+
+    def space_diag(from_left: bool, from_front: bool) -> np.ndarray:
+        diagonal = np.zeros(n, dtype=int)
+        for i in range(n):
+            if from_left and from_front:
+                diagonal[i] = data[index(i, i, i)]
+            elif from_left and not from_front:
+                diagonal[i] = data[index(i, n - 1 - i, i)]
+            elif not from_left and from_front:
+                diagonal[i] = data[index(n - 1 - i, i, i)]
+            else:
+                diagonal[i] = data[index(n - 1 - i, n - 1 - i, i)]
+        return diagonal
+
+    rows = [data[index(0, y, z):index(0, y, z) + n] for z in range(n) for y in range(n)]
+    cols = [data[index(x, 0, z):index(x, 0, z) + n**2:n] for z in range(n) for x in range(n)]
+    pillars = [data[x + y * n::n**2] for y in range(n) for x in range(n)]
+    space_diags = np.array([space_diag(True, True), space_diag(True, False),
+                            space_diag(False, True), space_diag(False, False)])
+    side_diags_x = np.array([np.array([data[index(x, i, i)] for i in range(n)]) for x in range(n)] +
+                            [np.array([data[index(x, i, n - 1 - i)] for i in range(n)]) for x in range(n)])
+    side_diags_y = np.array([np.array([data[index(i, y, i)] for i in range(n)]) for y in range(n)] +
+                            [np.array([data[index(n - 1 - i, y, i)] for i in range(n)]) for y in range(n)])
+    side_diags_z = np.array([np.array([data[index(i, i, z)] for i in range(n)]) for z in range(n)] +
+                            [np.array([data[index(i, n - 1 - i, z)] for i in range(n)]) for z in range(n)])
+    lines = rows + cols + pillars + list(space_diags) + list(side_diags_x) + list(side_diags_y) + list(side_diags_z)
+    return sum(1 for line in lines if np.sum(line) == magic_sum)
+
+
+def ops_per_second(function, duration: float = 1.0) -> float:
+    """
+    Calls `function` repeatedly for about `duration` seconds and returns the amount of calls per second.
+    """
+    calls = 0
+    start_time = time.perf_counter()
+    end_time = start_time + duration
+    while True:
+        for _ in range(100):
+            function()
+        calls += 100
+        now = time.perf_counter()
+        if now >= end_time:
+            return calls / (now - start_time)
+
+
+def metric(value: float, unit: str) -> dict:
+    return {"value": value, "unit": unit}
+
+
+def benchmark_objective(size: int = 5, duration: float = 1.0) -> dict:
+    """
+    Print and return the objective evaluations per second of the per-line reference and of the line index table.
+    """
+    cube = MagicCube(size=size)
+    assert per_line_objective(cube) == ObjectiveFunction.get_object_value(cube)
+
+    before = ops_per_second(lambda: per_line_objective(cube), duration)
+    after = ops_per_second(lambda: ObjectiveFunction.get_object_value(cube), duration)
+    print(f"Objective evaluation (size {size})")
+    print(f"  per line loop    : {before:12.0f} evals/sec")
+    print(f"  line index table : {after:12.0f} evals/sec ({after / before:.1f}x)")
+    return {"objective.per_line": metric(before, "evals/sec"),
+            "objective.get_object_value": metric(after, "evals/sec")}
+
+
+def benchmark_swap_delta(size: int = 5, duration: float = 1.0) -> dict:
+    """
+    Print and return the swap scores per second of a full rescore and of the incremental line sum evaluator, for
+    every objective.
+    """
+    cube = MagicCube(size=size)
+    evaluator = cube.get_evaluator()
+    pairs = itertools.cycle(np.random.randint(0, size**3, (1000, 2)).tolist())
+
+    def full_rescore():
+        i, j = next(pairs)
+        return cube.swap_index_copy(i, j).get_state_value() - cube.get_state_value()
+
+    def incremental():
+        i, j = next(pairs)
+        return evaluator.swap_delta(i, j)
+
+    before = ops_per_second(full_rescore, duration)
+    after = ops_per_second(incremental, duration)
+    print(f"Swap delta (size {size})")
+    print(f"  copy and rescore : {before:12.0f} swaps/sec")
+    print(f"  line sums        : {after:12.0f} swaps/sec ({after / before:.1f}x)")
+    results = {"swap_delta.rescore": metric(before, "swaps/sec"),
+               "swap_delta.line_sums": metric(after, "swaps/sec")}
+    for objective in OBJECTIVES[1:]:
+        graded = cube.get_evaluator(objective)
+        swaps = ops_per_second(lambda: graded.swap_delta(*next(pairs)), duration)
+        print(f"  line sums {objective:8s}: {swaps:10.0f} swaps/sec")
+        results[f"swap_delta.line_sums.{objective}"] = metric(swaps, "swaps/sec")
+    return results
+
+
+def benchmark_annealing(size: int = 5, proposals: int = 50000) -> dict:
+    """
+    Print and return the simulated annealing proposals per second, against the step of the original implementation:
+    deep copy the cube for every proposal, rescore it with the per-line objective and keep every accepted state.
+    """
+    cube = MagicCube(size=size)
+    reference_proposals = max(proposals // 500, 10)
+    start_time = time.perf_counter()
+    current, current_value = cube, per_line_objective(cube)
+    states = [current]
+    for t in range(1, reference_proposals + 1):
+        i = random.randint(0, size**3 - 1)
+        j = random.randint(i, size**3 - 1)
+        neighbour = copy.deepcopy(current)
+        neighbour.data[i], neighbour.data[j] = neighbour.data[j], neighbour.data[i]
+        neighbour_value = per_line_objective(neighbour)
+        delta_E = neighbour_value - current_value
+        if delta_E > 0 or random.random() < math.exp(delta_E / (2 / math.log(t + 1))):
+            states.append(neighbour)
+            current, current_value = neighbour, neighbour_value
+    before = reference_proposals / (time.perf_counter() - start_time)
+
+    results = {"annealing.deepcopy_rescore": metric(before, "proposals/sec")}
+    print(f"Simulated annealing proposals (size {size})")
+    print(f"  deepcopy, rescore: {before:12.0f} proposals/sec")
+    for record in (True, False):
+        sa = SimulatedAnnealing(cube, size, record=record)
+        sa.MAX_TIME = proposals
+        sa.TARGET_VALUE = float("inf")
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            sa.simulated_annealing()
+            after = sa.time / (time.perf_counter() - start_time)
+        name = "in_place" if record else "in_place.no_trajectory"
+        label = "in place" if record else "no trajectory"
+        print(f"  {label:17s}: {after:12.0f} proposals/sec ({after / before:.1f}x)")
+        results[f"annealing.{name}"] = metric(after, "proposals/sec")
+    return results
+
+
+def benchmark_neighbourhood(size: int = 5, duration: float = 1.0, reference: bool = True) -> dict:
+    """
+    Print and return the time of one full neighbourhood scan (every two-cell swap, as one steepest ascent step)
+    with successor copies and with batched scoring.
+
+    :param reference: Also time the scan with successor copies, slow for large sizes
+    """
+    cube = MagicCube(size=size)
+    evaluator = cube.get_evaluator()
+    first, second = get_swap_pairs(size)
+    after = 1 / ops_per_second(evaluator.neighbour_values, duration)
+    print(f"Neighbourhood scan of {len(first)} swaps (size {size})")
+    if not reference:
+        print(f"  batched scoring  : {after * 1000:12.2f} ms")
+        return {"neighbourhood.batched": metric(1 / after, "scans/sec")}
+
+    start_time = time.perf_counter()
+    copied = [cube.swap_index_copy(i, j).get_state_value() for i, j in zip(first.tolist(), second.tolist())]
+    before = time.perf_counter() - start_time
+    assert (evaluator.neighbour_values() == copied).all()
+
+    print(f"  successor copies : {before * 1000:12.2f} ms")
+    print(f"  batched scoring  : {after * 1000:12.2f} ms ({before / after:.1f}x)")
+    return {"neighbourhood.successor_copies": metric(1 / before, "scans/sec"),
+            "neighbourhood.batched": metric(1 / after, "scans/sec")}
+
+
+def benchmark_setup(size: int = 5) -> dict:
+    """
+    Print and return the time to create an evaluator and scan the neighbourhood once, with the line tables of the
+    size built from scratch and taken from their cache.
+    """
+    def setup():
+        MagicCube(size=size).get_evaluator().neighbour_values()
+
+    for table in (get_line_table, get_cell_lines, get_swap_pairs, get_swap_line_table):
+        table.cache_clear()
+    start_time = time.perf_counter()
+    setup()
+    cold = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    setup()
+    cached = time.perf_counter() - start_time
+
+    print(f"Line tables (size {size})")
+    print(f"  first solve setup: {cold * 1000:12.2f} ms")
+    print(f"  cached setup     : {cached * 1000:12.2f} ms")
+    return {"setup.cold": metric(cold * 1000, "ms"), "setup.cached": metric(cached * 1000, "ms")}
+
+
+def benchmark_size(size: int, duration: float) -> dict:
+    """
+    Print and return the per-iteration costs of the algorithms for one size of a scaling study: objective evaluation
+    (genetic algorithm), swap delta (simulated annealing, stochastic) and neighbourhood scan (steepest ascent,
+    sideways, random restart).
+
+    The metric names end with the size, e.g. objective.get_object_value.n7.
+    """
+    metrics = {}
+    metrics.update(benchmark_setup(size))
+    metrics.update(benchmark_objective(size, duration))
+    metrics.update(benchmark_swap_delta(size, duration))
+    metrics.update(benchmark_neighbourhood(size, duration, reference=False))
+    return {f"{name}.n{size}": value for name, value in metrics.items()}
+
+
+def benchmark_visited(size: int = 5, duration: float = 1.0, visited_states: int = 2000, ties: int = 100) -> dict:
+    """
+    Print and return the visited-state checks per second of the sideways move (one check per tied best successor),
+    with successor copies in a set of bytes and with Zobrist hashes.
+    """
+    cube = MagicCube(size=size)
+    zobrist = ZobristHash(cube)
+    first, second = np.random.randint(0, size**3, (2, ties))
+    pairs = list(zip(first.tolist(), second.tolist()))
+    visited_bytes = {MagicCube(size=size).data.tobytes() for _ in range(visited_states)}
+    visited_hashes = {ZobristHash(MagicCube(size=size)).value for _ in range(visited_states)}
+
+    def copies():
+        for i, j in pairs:
+            successor = cube.data.copy()
+            successor[i], successor[j] = successor[j], successor[i]
+            if successor.tobytes() not in visited_bytes:
+                pass
+
+    def hashes():
+        for successor_hash in zobrist.swap_hashes(first, second).tolist():
+            if successor_hash not in visited_hashes:
+                pass
+
+    before = ops_per_second(copies, duration) * ties
+    after = ops_per_second(hashes, duration) * ties
+    print(f"Visited-state checks ({ties} tied successors, {visited_states} visited states, size {size})")
+    print(f"  successor bytes  : {before:12.0f} checks/sec")
+    print(f"  zobrist hashes   : {after:12.0f} checks/sec ({after / before:.1f}x)")
+    return {"visited.bytes": metric(before, "checks/sec"),
+            "visited.zobrist": metric(after, "checks/sec")}
+
+
+def benchmark_trajectory(size: int = 5, steps: int = 100000) -> dict:
+    """
+    Print and return the memory used to store a random walk of swaps as a list of cube copies and as a trajectory.
+    """
+    cube = MagicCube(size=size)
+    trajectory = Trajectory(cube)
+    pairs = np.random.randint(0, size**3, (steps, 2)).tolist()
+    for i, j in pairs:
+        trajectory.append_swap(i, j, 0)
+
+    snapshot_bytes = steps * (sys.getsizeof(cube) + sys.getsizeof(cube.data))
+    print(f"Trajectory of {steps} swaps (size {size})")
+    print(f"  cube snapshots   : {snapshot_bytes / steps:12.1f} bytes/step")
+    print(f"  move log         : {trajectory.nbytes / steps:12.1f} bytes/step")
+    return {"trajectory.move_log": metric(trajectory.nbytes / steps, "bytes/step")}
+
+
+def benchmark_cube(size: int = 5, duration: float = 1.0) -> dict:
+    """
+    Print and return the construction, copy and validation throughput of MagicCube.
+    """
+    cube = MagicCube(size=size)
+    batch = np.stack([MagicCube(size=size).data for _ in range(1000)])
+    results = {
+        "cube.construction": metric(ops_per_second(lambda: MagicCube(size=size), duration), "cubes/sec"),
+        "cube.copy": metric(ops_per_second(cube.copy, duration), "cubes/sec"),
+        "cube.swap_index_copy": metric(ops_per_second(lambda: cube.swap_index_copy(0, 1), duration), "cubes/sec"),
+        "cube.is_perfect": metric(ops_per_second(cube.is_perfect, duration), "checks/sec"),
+        "cube.validate_batch": metric(ops_per_second(lambda: validate_cubes(batch, size), duration) * len(batch),
+                                      "checks/sec"),
+    }
+    print(f"MagicCube (size {size}, {cube.data.dtype}, {cube.data.nbytes} bytes of data)")
+    print(f"  construction     : {results['cube.construction']['value']:12.0f} cubes/sec")
+    print(f"  copy             : {results['cube.copy']['value']:12.0f} cubes/sec")
+    print(f"  swap_index_copy  : {results['cube.swap_index_copy']['value']:12.0f} cubes/sec")
+    print(f"  is_perfect       : {results['cube.is_perfect']['value']:12.0f} checks/sec")
+    print(f"  validate_batch   : {results['cube.validate_batch']['value']:12.0f} checks/sec "
+          f"(stacks of {len(batch)} cubes)")
+    return results
+
+
+def benchmark_solves(seeds: list[int], target: int, size: int = 5, objective: str = "count",
+                     time_limit: float = None) -> tuple[dict, dict]:
+    """
+    Print and return the results of fixed-seed end-to-end solves of every algorithm with the budgets of SOLVE_BUDGETS,
+    and of simulated annealing with every variant of SOLVE_SCHEDULES (named "simulated-annealing.<variant>").
+
+    Every solver stops once it reaches `target`, so the time of a solve that reached it is its time-to-target.
+
+    :param objective: The score the solvers maximize, the names of the metrics and solves of an objective other than
+                      "count" end with "." + objective
+    :param time_limit: Optional wall-clock budget of every solve in seconds, a solve out of time reports its best state
+    :return: The metrics (median time and time-to-target per algorithm) and the result of every solve
+    """
+    metrics = {}
+    solves = {}
+    suffix = "" if objective == "count" else f".{objective}"
+    print(f"End-to-end solves (size {size}, target {target}, objective {objective}, seeds {seeds})")
+    solvers = [(algorithm, algorithm, budget) for algorithm, budget in SOLVE_BUDGETS.items()]
+    solvers += [(f"simulated-annealing.{variant}", "simulated-annealing",
+                 SOLVE_BUDGETS["simulated-annealing"] + options) for variant, options in SOLVE_SCHEDULES.items()]
+    for name, algorithm, budget in solvers:
+        runs = []
+        for seed in seeds:
+            limits = [] if time_limit is None else ["--time-limit", str(time_limit)]
+            args = cli.parse_args([algorithm, "--seed", str(seed), "--target", str(target), "--objective", objective,
+                                   *limits, *budget])
+            random.seed(seed)
+            np.random.seed(seed)
+            cube = MagicCube(size)
+
+            start_time = time.perf_counter()
+            solver_budget = SearchBudget(args.time_limit, args.max_evaluations)
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = cli.SOLVERS[algorithm](cube, args, solver_budget)
+            elapsed = time.perf_counter() - start_time
+
+            values = result["states"].values
+            runs.append({
+                "seed": seed,
+                "stopped_by": solver_budget.stop_reason,
+                "time_ms": elapsed * 1000,
+                "final_value": int(values[-1]),
+                "best_value": int(values.max()),
+                "reached_target": bool(values.max() >= target),
+                "iterations": result["iterations"],
+            })
+
+        reached = [run["time_ms"] for run in runs if run["reached_target"]]
+        median_time = float(np.median([run["time_ms"] for run in runs]))
+        success_rate = len(reached) / len(runs)
+        median_iterations = float(np.median([run["iterations"] for run in runs]))
+        metrics[f"solve.{name}.time{suffix}"] = metric(median_time, "ms")
+        if reached:
+            metrics[f"solve.{name}.time_to_target{suffix}"] = metric(float(np.median(reached)), "ms")
+        solves[name + suffix] = {"budget": budget, "objective": objective, "success_rate": success_rate,
+                                 "runs": runs}
+
+        time_to_target = f"{np.median(reached):10.1f} ms" if reached else "         -   "
+        print(f"  {name:32s}: {median_time:10.1f} ms, {median_iterations:8.0f} iterations, "
+              f"best {max(run['best_value'] for run in runs):4d}, reached {success_rate:4.0%}, "
+              f"time-to-target {time_to_target}")
+    return metrics, solves
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(metrics: dict, baseline_path: str, tolerance: float) -> list[str]:
+    """
+    Print the change of every metric against a previous benchmark JSON file.
+
+    :return: The names of the metrics that regressed by more than `tolerance` (a fraction)
+    """
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"Compared to {baseline_path} (revision {baseline.get('revision')})")
+
+    regressions = []
+    for name, current in metrics.items():
+        previous = baseline.get("metrics", {}).get(name)
+        if previous is None or not previous["value"]:
+            continue
+        ratio = current["value"] / previous["value"]
+        # ratio > 1 is an improvement for throughput, a regression for times and sizes
+        speedup = ratio if current["unit"].endswith(PER_SECOND) else 1 / ratio
+        flag = ""
+        if speedup < 1 - tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:40s}: {previous['value']:14.2f} -> {current['value']:14.2f} {current['unit']:12s} "
+              f"({speedup:.2f}x){flag}")
+    return regressions
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths and end-to-end solves of every algorithm.")
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare the results to a JSON file of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown fraction reported as a regression by --compare (default 0.1)")
+    parser.add_argument("--quick", action="store_true", help="shorter measurements and a single solve seed")
+    parser.add_argument("--seeds", type=int, nargs="+", default=None,
+                        help="seeds of the end-to-end solves (default 0 1 2)")
+    parser.add_argument("--target", type=int, default=30, help="objective value of the time-to-target (default 30)")
+    parser.add_argument("--skip-solves", action="store_true", help="only run the micro benchmarks")
+    parser.add_argument("--time-limit", type=float, default=None, metavar="SECONDS",
+                        help="wall-clock budget of every end-to-end solve (default: none)")
+    parser.add_argument("--objectives", choices=OBJECTIVES, nargs="+", default=["count"],
+                        help="run the end-to-end solves with each of these objectives (default count)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[],
+                        help="also measure the per-iteration costs at these cube sizes, e.g. 6 7 8 9")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    duration = 0.2 if args.quick else 1.0
+    seeds = args.seeds or ([0] if args.quick else [0, 1, 2])
+    np.random.seed(0)
+
+    metrics = {}
+    metrics.update(benchmark_objective(duration=duration))
+    metrics.update(benchmark_cube(duration=duration))
+    metrics.update(benchmark_swap_delta(duration=duration))
+    metrics.update(benchmark_annealing(proposals=10000 if args.quick else 50000))
+    metrics.update(benchmark_neighbourhood(duration=duration))
+    metrics.update(benchmark_visited(duration=duration))
+    metrics.update(benchmark_trajectory(steps=10000 if args.quick else 100000))
+    for size in args.sizes:
+        metrics.update(benchmark_size(size, duration))
+    solves = {}
+    if not args.skip_solves:
+        for objective in args.objectives:
+            solve_metrics, objective_solves = benchmark_solves(seeds, args.target, objective=objective,
+                                                               time_limit=args.time_limit)
+            metrics.update(solve_metrics)
+            solves.update(objective_solves)
+
+    regressions = []
+    if args.compare is not None:
+        regressions = compare(metrics, args.compare, args.tolerance)
+
+    if args.output is not None:
+        output = {
+            "revision": git_revision(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "target": args.target,
+            "metrics": metrics,
+            "solves": solves,
+        }
+        with open(args.output, "w") as file:
+            json.dump(output, file, indent=2)
+
+    if regressions:
+        sys.exit(f"{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+from data_structure.magic_cube import MagicCube
+from algorithm.hc_steepest_ascent import HillClimbSteepest
+from algorithm.hc_sideways_move import HillClimbSideways
+from algorithm.hc_random import RandomRestartHillClimbing
+from algorithm.hc_stochastic import StochasticHillClimb
+from algorithm.simulated_annealing import SimulatedAnnealing
+from algorithm.cooling_schedule import COOLING_SCHEDULES
+from algorithm.genetic_algorithm import GeneticAlgorithm
+from algorithm.tabu_search import TabuSearch
+from algorithm.objective_function import ObjectiveFunction, OBJECTIVES
+from algorithm.search_monitor import SearchMonitor, SearchBudget
+from data_structure.cube_validator import validate_cubes, is_permutation
+
+import argparse
+import contextlib
+import json
+import random
+import re
+import signal
+import sys
+import time
+import numpy as np
+
+
+def read_cube_file(path: str) -> np.ndarray:
+    """
+    Read a cube from a text file of comma-separated values, such as example.txt.
+
+    If the file contains a [...] block, only the values inside it are read.
+    """
+    with open(path) as file:
+        text = file.read()
+    block = re.search(r"\[([^\]]*)\]", text)
+    if block is not None:
+        text = block.group(1)
+    return np.array([int(value) for value in re.split(r"[\s,]+", text.strip()) if value])
+
+
+def set_limits(solver, args: argparse.Namespace, budget: SearchBudget = None) -> None:
+    """
+    Stop the solver once it reaches the --target value instead of a perfect magic cube, or once its budget is spent.
+
+    :param budget: The budget of the solver, a new one with the --time-limit and --max-evaluations options if not given
+    """
+    if args.target is not None:
+        solver.TARGET_VALUE = args.target
+    if budget is None:
+        budget = SearchBudget(args.time_limit, args.max_evaluations)
+    solver.monitor = SearchMonitor(budget=budget)
+
+
+def run_steepest(cube: MagicCube, args: argparse.Namespace, budget: SearchBudget = None) -> dict:
+    hc_steepest = HillClimbSteepest(cube, args.objective, not args.full_scan)
+    set_limits(hc_steepest, args, budget)
+    states, iteration = hc_steepest.hill_climb_steepest_ascent()
+    return {"states": states, "iterations": iteration}
+
+
+def run_sideways(cube: MagicCube, args: argparse.Namespace, budget: SearchBudget = None) -> dict:
+    hc_sideways = HillClimbSideways(args.max_sideways, cube, args.objective, not args.full_scan)
+    set_limits(hc_sideways, args, budget)
+    states, iteration = hc_sideways.hill_climb_sideways_move()
+    return {"states": states, "iterations": iteration}
+
+
+def run_random_restart(cube: MagicCube, args: argparse.Namespace, budget: SearchBudget = None) -> dict:
+    hc_random = RandomRestartHillClimbing(cube.size, args.restarts, args.restart_iterations, cube.data,
+                                          workers=args.workers, seed=args.seed, stop_at_target=args.stop_at_target,
+                                          objective=args.objective, candidate_list=not args.full_scan)
+    set_limits(hc_random, args, budget)
+    states, iteration, iteration_per_restart, restart_amount = hc_random.run()
+    return {"states": states, "iterations": iteration, "iteration_per_restart": iteration_per_restart,
+            "restart_amount": restart_amount}
+
+
+def run_stochastic(cube: MagicCube, args: argparse.Namespace, budget: SearchBudget = None) -> dict:
+    hc_stochastic = StochasticHillClimb(cube, args.objective, args.first_improvement)
+    set_limits(hc_stochastic, args, budget)
+    states, iteration, _ = hc_stochastic.stochastic_hill_climb(args.iterations or 5000)
+    return {"states": states, "iterations": iteration}
+
+
+def run_simulated_annealing(cube: MagicCube, args: argparse.Namespace, budget: SearchBudget = None) -> dict:
+    sa = SimulatedAnnealing(cube, cube.size, args.record, args.objective, record=not args.no_trajectory,
+                            schedule=args.schedule, reheat_after=args.reheat_after, calibrate=args.calibrate)
+    set_limits(sa, args, budget)
+    if args.iterations:
+        sa.MAX_TIME = args.iterations
+    if args.replicas > 1:
+        sa.parallel_tempering(args.replicas)
+    else:
+        sa.simulated_annealing()
+    result = {"states": sa.get_states(), "iterations": sa.time - 1, "stuck_frequency": sa.get_stuck_frequency()}
+    if args.replicas == 1:
+        result["initial_temperature"] = sa.INITIAL_TEMPERATURE
+        result["reheats"] = sa.get_reheats()
+    if args.replicas > 1:
+        result["acceptance_rates"] = sa.get_acceptance_rates()
+        result["swap_rates"] = sa.get_swap_rates()
+    return result
+
+
+def run_genetic(cube: MagicCube, args: argparse.Namespace, budget: SearchBudget = None) -> dict:
+    ga = GeneticAlgorithm(cube, cube.size, args.iterations or 300, args.population, args.selection,
+                          args.objective)
+    set_limits(ga, args, budget)
+    ga.genetic_algorithm()
+    return {"states": ga.get_states(), "iterations": ga.generations, "average": ga.get_average()}
+
+
+def run_tabu(cube: MagicCube, args: argparse.Namespace, budget: SearchBudget = None) -> dict:
+    tabu = TabuSearch(cube, args.iterations or 1000, args.tenure, args.tabu_attribute, args.objective)
+    set_limits(tabu, args, budget)
+    states, iteration = tabu.tabu_search()
+    return {"states": states, "iterations": iteration, "tenure": tabu.TENURE, "aspirations": tabu.get_aspirations()}
+
+
+SOLVERS = {
+    "steepest": run_steepest,
+    "sideways": run_sideways,
+    "random-restart": run_random_restart,
+    "stochastic": run_stochastic,
+    "simulated-annealing": run_simulated_annealing,
+    "genetic": run_genetic,
+    "tabu": run_tabu,
+}
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Solve a perfect magic cube with local search, without the GUI.")
+    parser.add_argument("algorithm", choices=SOLVERS.keys(), help="local search algorithm to run")
+    parser.add_argument("--size", type=int, default=None,
+                        help="cube dimensions (default: from the input file, otherwise 5)")
+    parser.add_argument("--input", help="cube file of comma-separated values, e.g. example.txt (default: random cube)")
+    parser.add_argument("--output", help="write the JSON result to this file instead of stdout")
+    parser.add_argument("--report", action="store_true",
+                        help="also list every line of the final cube whose sum is not the magic number")
+    parser.add_argument("--seed", type=int, default=None, help="seed of every random generator")
+    parser.add_argument("--target", type=int, default=None,
+                        help="stop once the objective value reaches this value (default: a perfect magic cube)")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="count",
+                        help="score the search maximizes: the amount of magic lines, or minus the sum of the absolute "
+                             "or squared deviations of the line sums from the magic sum (default count)")
+    parser.add_argument("--iterations", type=int, default=None,
+                        help="iteration limit of stochastic (default 5000), simulated annealing (default 250000), "
+                             "genetic (generations, default 300) and tabu (default 1000)")
+    parser.add_argument("--time-limit", type=float, default=None, metavar="SECONDS",
+                        help="stop the search after this many seconds and report the best state found so far")
+    parser.add_argument("--max-evaluations", type=int, default=None, metavar="N",
+                        help="stop the search after N objective evaluations (scored swaps, or individuals of the "
+                             "genetic algorithm) and report the best state found so far")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="score every swap on every iteration of steepest, sideways and random restart, instead "
+                             "of the swaps touching a violated line only")
+    parser.add_argument("--first-improvement", action="store_true",
+                        help="stochastic: apply the first improving swap of a random order every iteration, stopping "
+                             "at a local optimum, instead of drawing a single random swap")
+    parser.add_argument("--max-sideways", type=int, default=100, help="maximum sideways moves (default 100)")
+    parser.add_argument("--restarts", type=int, default=10, help="maximum random restarts (default 10)")
+    parser.add_argument("--restart-iterations", type=int, default=20,
+                        help="maximum iterations per random restart (default 20)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for random restarts (default 1)")
+    parser.add_argument("--stop-at-target", action="store_true",
+                        help="stop every random restart once one reaches a perfect cube")
+    parser.add_argument("--replicas", type=int, default=1,
+                        help="simulated annealing replicas, more than 1 runs parallel tempering (default 1)")
+    parser.add_argument("--schedule", choices=COOLING_SCHEDULES, default="logarithmic",
+                        help="simulated annealing cooling schedule (default logarithmic)")
+    parser.add_argument("--reheat-after", type=int, default=None, metavar="K",
+                        help="reheat simulated annealing after K iterations without a better score")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="set the simulated annealing temperatures from a sample of random swaps, instead of "
+                             "the default scale of the objective")
+    parser.add_argument("--record", metavar="FILE",
+                        help="stream the simulated annealing trajectory to this file (and FILE.keys) instead of "
+                             "memory, open it with data_structure.trajectory_file.TrajectoryFile")
+    parser.add_argument("--no-trajectory", action="store_true",
+                        help="do not log the accepted simulated annealing moves, the result only holds the initial "
+                             "and the final cube")
+    parser.add_argument("--tenure", type=int, default=None,
+                        help="iterations a tabu search move stays tabu (default: a tenth of the cube cells)")
+    parser.add_argument("--tabu-attribute", choices=TabuSearch.ATTRIBUTES, default="assignment",
+                        help="what a tabu search move makes tabu: the swapped cells, or putting the swapped values "
+                             "back (default assignment)")
+    parser.add_argument("--population", type=int, default=300, help="genetic algorithm population (default 300)")
+    parser.add_argument("--selection", choices=GeneticAlgorithm.SELECTIONS, default="roulette",
+                        help="genetic algorithm parent selection (default roulette)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+
+    data = None
+    if args.input is not None:
+        data = read_cube_file(args.input)
+        size = args.size or round(len(data) ** (1 / 3))
+        if len(data) != size**3:
+            sys.exit(f"{args.input}: expected {size**3} values for a cube of size {size}, got {len(data)}")
+    else:
+        size = args.size or 5
+    if size < 3:
+        sys.exit(f"the cube size must be at least 3, got {size}")
+    if args.record is not None and args.no_trajectory:
+        sys.exit("--record streams the trajectory, it can not be combined with --no-trajectory")
+    if data is not None and not is_permutation(data, size):
+        sys.exit(f"{args.input}: every value from 1 to {size**3} must appear exactly once")
+    cube = MagicCube(size, data)
+
+    # The solvers report progress with print, keep stdout for the JSON result.
+    # Ctrl-C cancels the budget, the solver stops and the best state found so far is reported.
+    budget = SearchBudget(args.time_limit, args.max_evaluations)
+    interrupt_handler = signal.signal(signal.SIGINT, lambda signum, frame: budget.cancel())
+    start_time = time.time()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            result = SOLVERS[args.algorithm](cube, args, budget)
+    finally:
+        signal.signal(signal.SIGINT, interrupt_handler)
+    end_time = time.time()
+
+    states = result.pop("states")
+    final_cube = states[-1]
+    report = validate_cubes(final_cube.data, cube.size, report=True)
+    output = {
+        "algorithm": args.algorithm,
+        "size": cube.size,
+        "max_value": ObjectiveFunction.get_max_value(cube.size),
+        "seed": args.seed,
+        "time_ms": (end_time - start_time) * 1000,
+        "initial_value": cube.get_state_value(),
+        "final_value": int(states.values[-1]),
+        "best_value": int(states.values.max()),
+        "is_perfect": bool(report.is_perfect[0]),
+        "is_permutation": bool(report.is_permutation[0]),
+        "states": len(states),
+        "stopped_by": budget.stop_reason,
+        **result,
+        "initial_cube": cube.data.tolist(),
+        "final_cube": final_cube.data.tolist(),
+    }
+    if args.report:
+        output["failing_lines"] = [{"line": line, "name": name, "deviation": deviation}
+                                   for line, name, deviation in report.failing_lines(0)]
+
+    if args.output is None:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(output, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from data_structure.line_table import get_line_table, get_line_name, get_magic_sum
+
+import numpy as np
+
+
+# Cubes validated at once, bounds the memory of the gathered lines to about CHUNK_SIZE * size^3 * 3 values
+CHUNK_SIZE = 4096
+
+
+class ValidationReport:
+    """
+    The result of validating many Magic Cubes with validate_cubes(..., report=True).
+
+    :var size: The dimensions of every Magic Cube
+    :var deviations: Array of shape (amount of cubes, n_lines), the sum of every line minus the magic number
+    :var is_permutation: Whether each cube holds every value from 1 to size^3 exactly once
+    :var is_perfect: Whether each cube is a perfect magic cube, a permutation with every line sum equal to the
+                     magic number
+    """
+
+    def __init__(self, size: int, deviations: np.ndarray, is_permutation: np.ndarray):
+        self.size: int = size
+        self.deviations: np.ndarray = deviations
+        self.is_permutation: np.ndarray = is_permutation
+        self.is_perfect: np.ndarray = is_permutation & ~deviations.any(axis=1)
+
+    @property
+    def failing_line_counts(self) -> np.ndarray:
+        """
+        The amount of lines of each cube whose sum is not the magic number.
+        """
+        return np.count_nonzero(self.deviations, axis=1)
+
+    def failing_lines(self, cube: int = 0) -> list[tuple[int, str, int]]:
+        """
+        Returns the lines of a cube whose sum is not the magic number.
+
+        :param cube: The index of the cube in the validated stack
+        :return: The index (row of the line table), name and deviation from the magic number of every failing line
+        """
+        lines = np.flatnonzero(self.deviations[cube])
+        return [(int(line), get_line_name(self.size, line), int(self.deviations[cube, line])) for line in lines]
+
+    def __len__(self) -> int:
+        return len(self.is_perfect)
+
+    def __str__(self) -> str:
+        return (f"{int(self.is_perfect.sum())}/{len(self)} perfect, "
+                f"{int((~self.is_permutation).sum())} not a permutation of 1..{self.size**3}")
+
+
+def validate_cubes(cubes_data: np.ndarray, size: int, report: bool = False):
+    """
+    Check whether one or many Magic Cubes are perfect magic cubes, in a single vectorized pass.
+
+    A perfect magic cube holds every value from 1 to size^3 exactly once and every line (rows, columns, pillars, space
+    and side diagonals) sums to the magic number.
+
+    :param cubes_data: The data of one cube (shape (size^3,)) or a stack of cubes (shape (amount of cubes, size^3))
+    :param size: The dimensions of every Magic Cube
+    :param report: Return a ValidationReport with the deviation of every line instead of the result only
+    :return: Whether the cube is perfect (bool) for one cube, an array of bool for a stack, or the ValidationReport of
+             the stack (a one-cube stack for one cube) if `report` is set
+    """
+    cubes_data = np.asarray(cubes_data)
+    single = cubes_data.ndim == 1
+    table = get_line_table(size)
+    magic_sum = get_magic_sum(size)
+    if single and not report:
+        # Most cubes fail on the line sums, only count the values of cubes whose lines all match
+        if (cubes_data[table].sum(axis=1, dtype=np.int64) != magic_sum).any():
+            return False
+        return bool(_check_permutation(cubes_data[None], size)[0])
+
+    stack = cubes_data.reshape(-1, size**3)
+
+    deviations = np.empty((len(stack), len(table)), dtype=np.int64)
+    permutations = np.empty(len(stack), dtype=bool)
+    for start in range(0, len(stack), CHUNK_SIZE):
+        chunk = stack[start:start + CHUNK_SIZE]
+        deviations[start:start + len(chunk)] = chunk[:, table].sum(axis=2, dtype=np.int64) - magic_sum
+        permutations[start:start + len(chunk)] = _check_permutation(chunk, size)
+
+    if report:
+        return ValidationReport(size, deviations, permutations)
+    return permutations & ~deviations.any(axis=1)
+
+
+def is_permutation(cubes_data: np.ndarray, size: int):
+    """
+    Check whether one or many Magic Cubes hold every value from 1 to size^3 exactly once.
+
+    :param cubes_data: The data of one cube (shape (size^3,)) or a stack of cubes (shape (amount of cubes, size^3))
+    :param size: The dimensions of every Magic Cube
+    :return: The result (bool) for one cube, an array of bool for a stack
+    """
+    cubes_data = np.asarray(cubes_data)
+    result = _check_permutation(cubes_data.reshape(-1, size**3), size)
+    return bool(result[0]) if cubes_data.ndim == 1 else result
+
+
+# -- INTERNAL FUNCTIONS --
+
+def _check_permutation(stack: np.ndarray, size: int) -> np.ndarray:
+    """
+    Returns whether each row of a stack of cube data is a permutation of 1..size^3.
+
+    Counts every value of every row with a single bincount over (row, value) slots, linear in the size of the stack.
+    """
+    cells = size**3
+    in_range = ((stack >= 1) & (stack <= cells)).all(axis=1)
+    # Values of rows out of range are clipped, those rows already failed
+    values = np.clip(stack, 1, cells).astype(np.int64) - 1
+    slots = values + (np.arange(len(stack), dtype=np.int64) * cells)[:, None]
+    counts = np.bincount(slots.ravel(), minlength=len(stack) * cells).reshape(len(stack), cells)
+    return in_range & (counts == 1).all(axis=1)
@@ -0,0 +1,151 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+# Cube sizes whose tables are kept, the swap tables of a size take O(size^6) memory (tens of MB from size 8 on)
+TABLE_CACHE_SIZE = 4
+
+
+def get_line_count(size: int) -> int:
+    """
+    Returns the amount of lines of a Magic Cube with the given size: 3n^2 rows, columns and pillars,
+    4 space diagonals and 6n side diagonals. 109 for a 5x5x5 cube.
+    """
+    return 3 * size**2 + 6 * size + 4
+
+
+def get_magic_sum(size: int) -> int:
+    """
+    Returns the magic number/constant of a Magic Cube with the given size, the sum of every line. 315 for a 5x5x5 cube.
+    """
+    return size * (size**3 + 1) // 2
+
+
+def get_line_name(size: int, line: int) -> str:
+    """
+    Returns a readable name of a line (row of get_line_table) of a Magic Cube with the given size, e.g. "row y=1 z=2".
+    """
+    n = size
+    if line < 0 or line >= get_line_count(n):
+        raise IndexError("Line index out of range")
+    if line < 3 * n**2:
+        # rows are ordered by (z, y), columns by (z, x) and pillars by (y, x)
+        name, inner_axis, outer_axis = [("row", "y", "z"), ("column", "x", "z"), ("pillar", "x", "y")][line // n**2]
+        outer, inner = divmod(line % n**2, n)
+        return f"{name} {inner_axis}={inner} {outer_axis}={outer}"
+    line -= 3 * n**2
+    if line < 4:
+        return f"space diagonal {line}"
+    axis, line = divmod(line - 4, 2 * n)
+    side, k = divmod(line, n)
+    return f"{('left', 'right')[side]} side diagonal {'xyz'[axis]}={k}"
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def get_line_table(size: int) -> np.ndarray:
+    """
+    Returns the index table of every line of a Magic Cube with the given size.
+
+    Each row of the table holds the 1D indices of one line, in this order:
+        - Rows (z, y)
+        - Columns (z, x)
+        - Pillars (y, x)
+        - Space diagonals
+        - Side diagonals on the x, y and z axis (left diagonals first, then right diagonals)
+
+    The table is built once per size (for the last TABLE_CACHE_SIZE sizes) and is read-only.
+
+    :param size: Magic Cube dimensions
+    :return: Array of shape (n_lines, size) with the 1D index of each element of each line
+    """
+    n = size
+    i = np.arange(n)
+    rev = n - 1 - i
+    a, b = np.meshgrid(i, i, indexing='ij')  # a is the outer index, b is the inner index
+
+    def index(x, y, z) -> np.ndarray:
+        return x + y * n + z * n**2
+
+    # rows[z, y] = (x, y, z) for every x, and so on
+    rows = index(i, b[..., None], a[..., None]).reshape(-1, n)
+    cols = index(b[..., None], i, a[..., None]).reshape(-1, n)
+    pillars = index(b[..., None], a[..., None], i).reshape(-1, n)
+
+    space_diags = np.array([
+        index(i, i, i),          # From (0, 0, 0) to (n-1, n-1, n-1)
+        index(i, rev, i),        # From (0, n-1, 0) to (n-1, 0, n-1)
+        index(rev, i, i),        # From (n-1, 0, 0) to (0, n-1, n-1)
+        index(rev, rev, i),      # From (n-1, n-1, 0) to (0, 0, n-1)
+    ])
+
+    k = i[:, None]  # the fixed coordinate of a side diagonal
+    side_diags_x = np.concatenate((index(k, i, i), index(k, i, rev)))
+    side_diags_y = np.concatenate((index(i, k, i), index(rev, k, i)))
+    side_diags_z = np.concatenate((index(i, i, k), index(i, rev, k)))
+
+    table = np.concatenate((rows, cols, pillars, space_diags, side_diags_x, side_diags_y, side_diags_z))
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def get_cell_lines(size: int) -> tuple[tuple[int, ...], ...]:
+    """
+    Returns the lines that pass through each cell of a Magic Cube with the given size.
+
+    :param size: Magic Cube dimensions
+    :return: Tuple indexed by the 1D cell index, holding the indices of the lines (rows of the line table) of that cell
+    """
+    cell_lines: list[list[int]] = [[] for _ in range(size**3)]
+    for line, cells in enumerate(get_line_table(size).tolist()):
+        for cell in cells:
+            cell_lines[cell].append(line)
+    return tuple(tuple(lines) for lines in cell_lines)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def get_swap_pairs(size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns every pair of cells (i, j) with i < j, i.e. every two-cell swap of a Magic Cube with the given size.
+
+    Pairs are ordered by i first, then by j.
+
+    :param size: Magic Cube dimensions
+    :return: Tuple of two arrays, the first and the second cell index of each pair
+    """
+    first, second = np.triu_indices(size**3, 1)
+    first.flags.writeable = False
+    second.flags.writeable = False
+    return first, second
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def get_swap_line_table(size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the lines whose sum changes for every swap of get_swap_pairs.
+
+    Lines through only one cell of the pair change, lines through both cells keep their sum. Each row is padded with
+    the line index n_lines, so it can be used with an array of line sums that has one extra (never matching) entry.
+
+    :param size: Magic Cube dimensions
+    :return: Tuple of two arrays of shape (n_pairs, max_lines_per_cell), the changed lines of the first and second cell
+    """
+    cell_lines = get_cell_lines(size)
+    n_lines = len(get_line_table(size))
+    width = max(len(lines) for lines in cell_lines)
+    padded = np.full((size**3, width), n_lines)
+    for cell, lines in enumerate(cell_lines):
+        padded[cell, :len(lines)] = lines
+
+    first, second = get_swap_pairs(size)
+    lines_first = padded[first]
+    lines_second = padded[second]
+    shared = (lines_first[:, :, None] == lines_second[:, None, :]).any(axis=2)
+    lines_first[shared] = n_lines
+    shared = (lines_second[:, :, None] == padded[first][:, None, :]).any(axis=2)
+    lines_second[shared] = n_lines
+
+    lines_first.flags.writeable = False
+    lines_second.flags.writeable = False
+    return lines_first, lines_second
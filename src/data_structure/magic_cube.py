@@ -1,27 +1,63 @@
 from algorithm.objective_function import ObjectiveFunction
+from algorithm.line_sum_evaluator import LineSumEvaluator
+from data_structure.line_table import get_line_table, get_magic_sum
+from data_structure.cube_validator import validate_cubes
 
-import copy
+from functools import lru_cache
 import numpy as np
 
 
+@lru_cache(maxsize=None)
+def get_cube_values(size: int) -> np.ndarray:
+    """
+    Returns the values 1 to size^3 of a Magic Cube with the given size, read-only.
+
+    The values use the smallest integer type that holds them, which is the type of the data of every Magic Cube.
+    """
+    values = np.arange(1, size**3 + 1, dtype=np.min_scalar_type(size**3))
+    values.flags.writeable = False
+    return values
+
+
 class MagicCube:
     """
     A Magic Cube represented by a 1D array
 
     :var size: The dimensions of the Magic Cube, default is 5
-    :var data: The 1D array representing the Magic Cube
+    :var data: The 1D array representing the Magic Cube, of the smallest integer type for the size
     :var magic_sum: The magic number/constant for the Magic Cube
     """
 
+    __slots__ = ('size', 'data')
+
     def __init__(self, size=5, data=None):
         """
-        Generates a Magic Cube in the form of a 1D array with elements from 1 to 125.
+        Generates a Magic Cube in the form of a 1D array with elements from 1 to size^3 (125 by default).
 
         :param size: Magic Cube Dimensions, default = 5
+        :param data: Optional elements of the Magic Cube, converted to the integer type of the size if needed
+        :raises ValueError: If data does not hold size^3 values from 1 to size^3
         """
+        values = get_cube_values(size)
         self.size: int = size  # dimensions, default 5x5x5
-        self.magic_sum: int = size * (size**3 + 1) // 2  # default is 315
-        self.data : np.ndarray = data if data is not None else np.random.permutation(np.arange(1, size**3 + 1))
+        if data is None:
+            self.data: np.ndarray = np.random.permutation(values)
+            return
+        data = np.asarray(data)
+        if data.shape != values.shape:
+            raise ValueError(f"A Magic Cube of size {size} holds {size**3} values, got an array of shape {data.shape}")
+        # Check before the conversion, which would wrap values out of the range of the integer type of the size
+        if data.min() < 1 or data.max() > size**3:
+            raise ValueError(f"The values of a Magic Cube of size {size} must be between 1 and {size**3}, "
+                             f"got values from {data.min()} to {data.max()}")
+        self.data: np.ndarray = data.astype(values.dtype, copy=False)
+
+    @property
+    def magic_sum(self) -> int:
+        """
+        The magic number/constant for the Magic Cube, 315 for the default size.
+        """
+        return get_magic_sum(self.size)
 
     def copy(self) -> 'MagicCube':
         """
@@ -29,7 +65,11 @@ class MagicCube:
 
         :return: A new MagicCube instance that is a deep copy of this instance.
         """
-        return copy.deepcopy(self)
+        # Skip __init__, only the data array is copied
+        new_cube = MagicCube.__new__(MagicCube)
+        new_cube.size = self.size
+        new_cube.data = self.data.copy()
+        return new_cube
 
     def randomize(self) -> None:
         """
@@ -57,66 +97,15 @@ class MagicCube:
         """
         return ObjectiveFunction.get_object_value(self)
 
-    def is_perfect(self) -> bool:
+    def get_evaluator(self, objective: str = "count") -> LineSumEvaluator:
         """
-        Checks if the Magic Cube is a perfect magic cube.
+        Returns an incremental evaluator attached to this Magic Cube.
 
-        A perfect magic cube has the same magic sum for:
-            - All rows
-            - All columns
-            - All pillars
-            - All space diagonals
-            - All side diagonals
+        Swaps done through the evaluator update the cube in place and only rescore the lines of the swapped cells.
 
-        :return: True if the cube is perfect, False otherwise.
+        :param objective: The score maximized with the evaluator, one of objective_function.OBJECTIVES
         """
-
-        # Check all rows
-        for z in range(self.size):
-            for y in range(self.size):
-                if np.sum(self.get_row(y, z)) != self.magic_sum:
-                    print("Row", y, z, "sum is", np.sum(self.get_row(y, z)), "expected", self.magic_sum)
-                    return False
-
-        # Check all columns
-        for z in range(self.size):
-            for x in range(self.size):
-                if np.sum(self.get_col(x, z)) != self.magic_sum:
-                    print("Col", x, z, "sum is", np.sum(self.get_col(x, z)), "expected", self.magic_sum)
-                    return False
-
-        # Check all pillars
-        for y in range(self.size):
-            for x in range(self.size):
-                if np.sum(self.get_pillar(x, y)) != self.magic_sum:
-                    print("Pillar", x, y, "sum is", np.sum(self.get_pillar(x, y)), "expected", self.magic_sum)
-                    return False
-
-        # Check all space diagonals
-        for diag in self.get_space_diags():
-            if np.sum(diag) != self.magic_sum:
-                print("Space Diag", diag, "sum is", np.sum(diag), "expected", self.magic_sum)
-                return False
-
-        # Check all side diagonals on each axis
-        for diag_x in self.get_side_diags_x():
-            if np.sum(diag_x) != self.magic_sum:
-                print("Side Diag X", diag_x, "sum is", np.sum(diag_x), "expected", self.magic_sum)
-                return False
-
-        for diag_y in self.get_side_diags_y():
-            if np.sum(diag_y) != self.magic_sum:
-                print("Side Diag Y", diag_y, "sum is", np.sum(diag_y), "expected", self.magic_sum)
-                return False
-
-        for diag_z in self.get_side_diags_z():
-            if np.sum(diag_z) != self.magic_sum:
-                print("Side Diag Z", diag_z, "sum is", np.sum(diag_z), "expected", self.magic_sum)
-                return False
-
-        # If all checks pass, it's a perfect magic cube
-        return True
-
+        return LineSumEvaluator(self, objective)
 
     def __str__(self):
         """
@@ -183,24 +172,9 @@ class MagicCube:
         :param start_from_front: true if starting from the top front of the cube
         :return: space diagonal from the starting point (left/right, front/back)
         """
-        # Initialize the diagonal array
-        diagonal = np.zeros(self.size, dtype=int)
-
-        for i in range(self.size):
-            if start_from_left and start_from_front:
-                # From (0, 0, 0) to (n-1, n-1, n-1)
-                diagonal[i] = self.data[self.__get_index(i, i, i)]
-            elif start_from_left and not start_from_front:
-                # From (0, n-1, 0) to (n-1, 0, n-1)
-                diagonal[i] = self.data[self.__get_index(i, self.size - 1 - i, i)]
-            elif not start_from_left and start_from_front:
-                # From (n-1, 0, 0) to (0, n-1, n-1)
-                diagonal[i] = self.data[self.__get_index(self.size - 1 - i, i, i)]
-            else:
-                # From (n-1, n-1, 0) to (0, 0, n-1)
-                diagonal[i] = self.data[self.__get_index(self.size - 1 - i, self.size - 1 - i, i)]
-
-        return diagonal
+        # Space diagonals are ordered (left, front), (left, back), (right, front), (right, back)
+        offset = (0 if start_from_left else 2) + (0 if start_from_front else 1)
+        return self.data[self.__get_lines(3 * self.size**2 + offset, 1)[0]]
 
     def get_space_diags(self) -> np.ndarray:
         """
@@ -208,100 +182,42 @@ class MagicCube:
 
         :return: A 2D array containing all space diagonals.
         """
-        diagonals = [self.get_space_diag(start_from_left=True, start_from_front=True),
-                     self.get_space_diag(start_from_left=True, start_from_front=False),
-                     self.get_space_diag(start_from_left=False, start_from_front=True),
-                     self.get_space_diag(start_from_left=False, start_from_front=False)]
-
-        return np.array(diagonals)
+        return self.data[self.__get_lines(3 * self.size**2, 4)]
 
     def get_side_diags_x(self) -> np.ndarray:
         """
         Return all side diagonals from the Magic Cube at x-axis as a 2D array.
         """
-        left_diags = [self.__get_side_diag_x_left(i) for i in range(self.size)]
-        right_diags = [self.__get_side_diag_x_right(i) for i in range(self.size)]
-
-        # Combine left and right diagonals into a single 2D array
-        return np.array(left_diags + right_diags)
+        return self.data[self.__get_lines(3 * self.size**2 + 4, 2 * self.size)]
 
     def get_side_diags_y(self) -> np.ndarray:
         """
         Return all side diagonals from the Magic Cube at y-axis as a 2D array.
         """
-        left_diags = [self.__get_side_diag_y_left(i) for i in range(self.size)]
-        right_diags = [self.__get_side_diag_y_right(i) for i in range(self.size)]
-
-        return np.array(left_diags + right_diags)
+        return self.data[self.__get_lines(3 * self.size**2 + 4 + 2 * self.size, 2 * self.size)]
 
     def get_side_diags_z(self) -> np.ndarray:
         """
         Return all side diagonals from the Magic Cube at z-axis as a 2D array.
         """
-        left_diags = [self.__get_side_diag_z_left(i) for i in range(self.size)]
-        right_diags = [self.__get_side_diag_z_right(i) for i in range(self.size)]
-
-        return np.array(left_diags + right_diags)
+        return self.data[self.__get_lines(3 * self.size**2 + 4 + 4 * self.size, 2 * self.size)]
 
     def is_perfect(self) -> bool:
         """
         Checks if the Magic Cube is a perfect magic cube.
 
-        A perfect magic cube has the same magic sum for:
+        A perfect magic cube holds every value from 1 to size^3 once and has the same magic sum for:
             - All rows
             - All columns
             - All pillars
             - All space diagonals
             - All side diagonals
 
+        Use cube_validator.validate_cubes to check many cubes at once or to find the failing lines.
+
         :return: True if the cube is perfect, False otherwise.
         """
-
-        # Check all rows
-        for z in range(self.size):
-            for y in range(self.size):
-                if np.sum(self.get_row(y, z)) != self.magic_sum:
-                    # print("Row", y, z, "sum is", np.sum(self.get_row(y, z)), "expected", self.magic_sum)
-                    return False
-
-        # Check all columns
-        for z in range(self.size):
-            for x in range(self.size):
-                if np.sum(self.get_col(x, z)) != self.magic_sum:
-                    # print("Col", x, z, "sum is", np.sum(self.get_col(x, z)), "expected", self.magic_sum)
-                    return False
-
-        # Check all pillars
-        for y in range(self.size):
-            for x in range(self.size):
-                if np.sum(self.get_pillar(x, y)) != self.magic_sum:
-                    # print("Pillar", x, y, "sum is", np.sum(self.get_pillar(x, y)), "expected", self.magic_sum)
-                    return False
-
-        # Check all space diagonals
-        for diag in self.get_space_diags():
-            if np.sum(diag) != self.magic_sum:
-                # print("Space Diag", diag, "sum is", np.sum(diag), "expected", self.magic_sum)
-                return False
-
-        # Check all side diagonals on each axis
-        for diag_x in self.get_side_diags_x():
-            if np.sum(diag_x) != self.magic_sum:
-                # print("Side Diag X", diag_x, "sum is", np.sum(diag_x), "expected", self.magic_sum)
-                return False
-
-        for diag_y in self.get_side_diags_y():
-            if np.sum(diag_y) != self.magic_sum:
-                # print("Side Diag Y", diag_y, "sum is", np.sum(diag_y), "expected", self.magic_sum)
-                return False
-
-        for diag_z in self.get_side_diags_z():
-            if np.sum(diag_z) != self.magic_sum:
-                # print("Side Diag Z", diag_z, "sum is", np.sum(diag_z), "expected", self.magic_sum)
-                return False
-
-        # If all checks pass, it's a perfect magic cube
-        return True
+        return validate_cubes(self.data, self.size)
 
     # -- INTERNAL/PRIVATE FUNCTIONS --
 
@@ -320,20 +236,8 @@ class MagicCube:
 
         return x + y * self.size + z * self.size**2
 
-    def __get_side_diag_x_left(self, x: int) -> np.ndarray:
-        return np.array([self.data[self.__get_index(x, i, i)] for i in range(self.size)])
-
-    def __get_side_diag_x_right(self, x: int) -> np.ndarray:
-        return np.array([self.data[self.__get_index(x, i, self.size - 1 - i)] for i in range(self.size)])
-
-    def __get_side_diag_y_left(self, y: int) -> np.ndarray:
-        return np.array([self.data[self.__get_index(i, y, i)] for i in range(self.size)])
-
-    def __get_side_diag_y_right(self, y: int) -> np.ndarray:
-        return np.array([self.data[self.__get_index(self.size - 1 - i, y, i)] for i in range(self.size)])
-
-    def __get_side_diag_z_left(self, z) -> np.ndarray:
-        return np.array([self.data[self.__get_index(i, i, z)] for i in range(self.size)])
-
-    def __get_side_diag_z_right(self, z) -> np.ndarray:
-        return np.array([self.data[self.__get_index(i, self.size - 1 - i, z)] for i in range(self.size)])
+    def __get_lines(self, start: int, count: int) -> np.ndarray:
+        """
+        Returns `count` rows of the line index table, starting from the line at `start`.
+        """
+        return get_line_table(self.size)[start:start + count]
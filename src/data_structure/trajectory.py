@@ -0,0 +1,135 @@
+from data_structure.magic_cube import MagicCube
+
+from bisect import bisect_right
+import numpy as np
+
+
+class Trajectory:
+    """
+    The sequence of states visited by a local search, stored as a move log.
+
+    Instead of a full Magic Cube per state, the trajectory keeps the initial state, the two-cell swap that leads to
+    each next state and the objective value of every state. A full copy of the cube data (keyframe) is kept every
+    `keyframe_interval` states, and for states that are not one swap away from the previous state (e.g. the best
+    state of a new generation or restart). trajectory[k] rebuilds a state from the nearest keyframe before it.
+
+    :var size: The dimensions of the Magic Cube of every state
+    :var keyframe_interval: The amount of states between two keyframes
+    """
+
+    def __init__(self, initial_cube: MagicCube, initial_value: int = None, keyframe_interval: int = 100):
+        """
+        :param initial_cube: The first state of the trajectory
+        :param initial_value: The objective value of the initial state, computed if not given
+        :param keyframe_interval: The amount of states between two keyframes
+        """
+        self.size: int = initial_cube.size
+        self.keyframe_interval: int = keyframe_interval
+        index_dtype = np.int16 if self.size**3 <= np.iinfo(np.int16).max else np.int32
+
+        self.__length: int = 0
+        self.__swaps: np.ndarray = np.full((16, 2), -1, dtype=index_dtype)   # swap leading to each state
+        self.__values: np.ndarray = np.zeros(16, dtype=np.int32)             # objective value of each state
+        self.__keyframes: dict[int, np.ndarray] = {}                         # state index --> cube data
+        self.__keyframe_steps: list[int] = []                                # sorted keys of self.__keyframes
+        self.__last_data: np.ndarray = None                                  # data of the last state
+        self.__cached_step: int = -1                                         # last state rebuilt by __getitem__
+        self.__cached_data: np.ndarray = None
+
+        self.append(initial_cube, initial_value)
+
+    def append(self, cube: MagicCube, value: int = None) -> None:
+        """
+        Append a state that is stored as a keyframe, e.g. a state that is not one swap away from the last state.
+
+        :param cube: The new state, its data is copied
+        :param value: The objective value of the new state, computed if not given
+        """
+        if value is None:
+            value = cube.get_state_value()
+        self.__last_data = np.array(cube.data)
+        self.__add_step(-1, -1, value)
+        self.__add_keyframe()
+
+    def append_swap(self, i: int, j: int, value: int) -> None:
+        """
+        Append the state reached by swapping the cells at index i and j of the last state.
+
+        :param value: The objective value of the new state
+        """
+        data = self.__last_data
+        data[i], data[j] = data[j], data[i]
+        self.__add_step(i, j, value)
+        if (self.__length - 1) % self.keyframe_interval == 0:
+            self.__add_keyframe()
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        The objective value of every state, read-only.
+        """
+        values = self.__values[:self.__length]
+        values.flags.writeable = False
+        return values
+
+    @property
+    def swaps(self) -> np.ndarray:
+        """
+        The swap (i, j) leading to every state, (-1, -1) for keyframe-only states, read-only.
+        """
+        swaps = self.__swaps[:self.__length]
+        swaps.flags.writeable = False
+        return swaps
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The amount of memory used by the stored moves, values and keyframes.
+        """
+        return (self.__swaps[:self.__length].nbytes + self.__values[:self.__length].nbytes +
+                sum(keyframe.nbytes for keyframe in self.__keyframes.values()))
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __getitem__(self, index: int) -> MagicCube:
+        """
+        Rebuild the state at the given index from the nearest keyframe.
+        """
+        if index < 0:
+            index += self.__length
+        if index < 0 or index >= self.__length:
+            raise IndexError("Trajectory index out of range")
+
+        keyframe_step = self.__keyframe_steps[bisect_right(self.__keyframe_steps, index) - 1]
+        if keyframe_step <= self.__cached_step <= index:
+            # Continue from the last rebuilt state, so stepping forward replays a single swap
+            start, data = self.__cached_step, self.__cached_data
+        else:
+            start, data = keyframe_step, self.__keyframes[keyframe_step].copy()
+
+        for i, j in self.__swaps[start + 1:index + 1].tolist():
+            data[i], data[j] = data[j], data[i]
+
+        self.__cached_step, self.__cached_data = index, data
+        return MagicCube(self.size, data.copy())
+
+    def __iter__(self):
+        for index in range(self.__length):
+            yield self[index]
+
+    # -- INTERNAL FUNCTIONS --
+
+    def __add_step(self, i: int, j: int, value: int) -> None:
+        if self.__length == len(self.__values):
+            # Double the capacity
+            self.__swaps = np.concatenate((self.__swaps, np.full_like(self.__swaps, -1)))
+            self.__values = np.concatenate((self.__values, np.zeros_like(self.__values)))
+        self.__swaps[self.__length] = i, j
+        self.__values[self.__length] = value
+        self.__length += 1
+
+    def __add_keyframe(self) -> None:
+        step = self.__length - 1
+        self.__keyframes[step] = self.__last_data.copy()
+        self.__keyframe_steps.append(step)
@@ -0,0 +1,226 @@
+from data_structure.magic_cube import MagicCube, get_cube_values
+
+import numpy as np
+
+
+# File layout:
+#   <path>       HEADER, then one record per state: the swap (i, j) leading to it, its objective value and temperature
+#   <path>.keys  one keyframe per record of (step, cube data)
+# Both files only grow by whole records, so they can be memory-mapped while or after a search writes them.
+MAGIC = b"MCTRAJ01"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("size", "<i4"), ("keyframe_interval", "<i4")])
+KEYFRAME_SUFFIX = ".keys"
+
+
+def get_record_dtype(size: int) -> np.dtype:
+    """
+    Returns the dtype of one state record of a trajectory file of a Magic Cube with the given size.
+    """
+    index_dtype = "<i2" if size**3 <= np.iinfo(np.int16).max else "<i4"
+    return np.dtype([("i", index_dtype), ("j", index_dtype), ("value", "<i4"), ("temperature", "<f4")])
+
+
+def get_keyframe_dtype(size: int) -> np.dtype:
+    """
+    Returns the dtype of one keyframe of a trajectory file of a Magic Cube with the given size.
+    """
+    return np.dtype([("step", "<i8"), ("data", get_cube_values(size).dtype, (size**3,))])
+
+
+class TrajectoryRecorder:
+    """
+    Streams the states visited by a local search to a trajectory file, as Trajectory does in memory.
+
+    Records are buffered in chunks of `chunk_size` and appended to the file, so the memory used does not grow with
+    the length of the search. A keyframe (full copy of the cube data) is written every `keyframe_interval` states
+    and for every state appended with TrajectoryRecorder.append. Open the file with TrajectoryFile to replay it.
+
+    :var path: The path of the trajectory file, the keyframes are written to path + ".keys"
+    :var size: The dimensions of the Magic Cube of every state
+    :var keyframe_interval: The amount of states between two keyframes
+    """
+
+    def __init__(self, path: str, initial_cube: MagicCube, initial_value: int = None,
+                 keyframe_interval: int = 1000, chunk_size: int = 4096):
+        """
+        :param path: The trajectory file to create, an existing file is overwritten
+        :param initial_cube: The first state of the trajectory
+        :param initial_value: The objective value of the initial state, computed if not given
+        :param keyframe_interval: The amount of states between two keyframes
+        :param chunk_size: The amount of records buffered before they are written to the file
+        """
+        self.path: str = path
+        self.size: int = initial_cube.size
+        self.keyframe_interval: int = keyframe_interval
+
+        self.__length: int = 0
+        self.__buffer: np.ndarray = np.zeros(chunk_size, dtype=get_record_dtype(self.size))
+        self.__buffered: int = 0
+        self.__keyframe: np.ndarray = np.zeros(1, dtype=get_keyframe_dtype(self.size))
+        self.__last_data: np.ndarray = None    # data of the last state
+
+        self.__file = open(path, "wb")
+        self.__keyframe_file = open(path + KEYFRAME_SUFFIX, "wb")
+        header = np.array((MAGIC, self.size, keyframe_interval), dtype=HEADER_DTYPE)
+        self.__file.write(header.tobytes())
+
+        self.append(initial_cube, initial_value)
+
+    def append(self, cube: MagicCube, value: int = None, temperature: float = np.nan) -> None:
+        """
+        Append a state that is stored as a keyframe, e.g. a state that is not one swap away from the last state.
+
+        :param cube: The new state, its data is copied
+        :param value: The objective value of the new state, computed if not given
+        :param temperature: The temperature of the search at the new state, if it has one
+        """
+        if value is None:
+            value = cube.get_state_value()
+        self.__last_data = np.array(cube.data)
+        self.__add_step(-1, -1, value, temperature)
+        self.__add_keyframe()
+
+    def append_swap(self, i: int, j: int, value: int, temperature: float = np.nan) -> None:
+        """
+        Append the state reached by swapping the cells at index i and j of the last state.
+
+        :param value: The objective value of the new state
+        :param temperature: The temperature of the search at the new state, if it has one
+        """
+        data = self.__last_data
+        data[i], data[j] = data[j], data[i]
+        self.__add_step(i, j, value, temperature)
+        if (self.__length - 1) % self.keyframe_interval == 0:
+            self.__add_keyframe()
+
+    def flush(self) -> None:
+        """
+        Write the buffered records, so a TrajectoryFile opened afterwards sees every state appended so far.
+        """
+        if self.__buffered:
+            self.__file.write(self.__buffer[:self.__buffered].tobytes())
+            self.__buffered = 0
+        self.__file.flush()
+        self.__keyframe_file.flush()
+
+    def close(self) -> "TrajectoryFile":
+        """
+        Write the buffered records, close the files and open them for replay.
+        """
+        self.flush()
+        self.__file.close()
+        self.__keyframe_file.close()
+        return TrajectoryFile(self.path)
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __enter__(self) -> "TrajectoryRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if not self.__file.closed:
+            self.close()
+
+    # -- INTERNAL FUNCTIONS --
+
+    def __add_step(self, i: int, j: int, value: int, temperature: float) -> None:
+        self.__buffer[self.__buffered] = i, j, value, temperature
+        self.__buffered += 1
+        self.__length += 1
+        if self.__buffered == len(self.__buffer):
+            self.flush()
+
+    def __add_keyframe(self) -> None:
+        self.__keyframe[0] = self.__length - 1, self.__last_data
+        self.__keyframe_file.write(self.__keyframe.tobytes())
+
+
+class TrajectoryFile:
+    """
+    A trajectory file written by TrajectoryRecorder, memory-mapped so it can be scrubbed without loading it.
+
+    Supports the reading interface of Trajectory (len, indexing, iteration, values and swaps), so it can be passed to
+    the visualization in place of an in-memory trajectory.
+
+    :var path: The path of the trajectory file
+    :var size: The dimensions of the Magic Cube of every state
+    :var keyframe_interval: The amount of states between two keyframes
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: The trajectory file, its keyframes are read from path + ".keys"
+        """
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+
+        self.path: str = path
+        self.size: int = int(header["size"][0])
+        self.keyframe_interval: int = int(header["keyframe_interval"][0])
+
+        self.__records: np.ndarray = np.memmap(path, dtype=get_record_dtype(self.size), mode="r",
+                                               offset=HEADER_DTYPE.itemsize)
+        keyframes = np.memmap(path + KEYFRAME_SUFFIX, dtype=get_keyframe_dtype(self.size), mode="r")
+        # Only the keyframes of states whose record was written are usable
+        self.__keyframes: np.ndarray = keyframes[:np.searchsorted(keyframes["step"], len(self.__records))]
+        self.__cached_step: int = -1    # last state rebuilt by __getitem__
+        self.__cached_data: np.ndarray = None
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        The objective value of every state, memory-mapped.
+        """
+        return self.__records["value"]
+
+    @property
+    def temperatures(self) -> np.ndarray:
+        """
+        The temperature of the search at every state (NaN if it was not recorded), memory-mapped.
+        """
+        return self.__records["temperature"]
+
+    @property
+    def swaps(self) -> np.ndarray:
+        """
+        The swap (i, j) leading to every state, (-1, -1) for keyframe-only states, a memory-mapped view of shape
+        (length, 2).
+        """
+        records = self.__records
+        index_dtype = records.dtype["i"]
+        # i and j are adjacent in every record, step over the rest of the record instead of copying the columns
+        return np.ndarray((len(records), 2), dtype=index_dtype, buffer=records, offset=records.dtype.fields["i"][1],
+                          strides=(records.dtype.itemsize, index_dtype.itemsize))
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    def __getitem__(self, index: int) -> MagicCube:
+        """
+        Rebuild the state at the given index from the nearest keyframe.
+        """
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("Trajectory index out of range")
+
+        keyframe = self.__keyframes[np.searchsorted(self.__keyframes["step"], index, side="right") - 1]
+        keyframe_step = int(keyframe["step"])
+        if keyframe_step <= self.__cached_step <= index:
+            # Continue from the last rebuilt state, so stepping forward replays a single swap
+            start, data = self.__cached_step, self.__cached_data
+        else:
+            start, data = keyframe_step, np.array(keyframe["data"])
+
+        records = self.__records[start + 1:index + 1]
+        for i, j in zip(records["i"].tolist(), records["j"].tolist()):
+            data[i], data[j] = data[j], data[i]
+
+        self.__cached_step, self.__cached_data = index, data
+        return MagicCube(self.size, data.copy())
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
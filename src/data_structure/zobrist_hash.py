@@ -0,0 +1,84 @@
+from data_structure.magic_cube import MagicCube
+from data_structure.line_table import TABLE_CACHE_SIZE
+
+from functools import lru_cache
+import numpy as np
+
+
+# Seed of the random keys, fixed so the hash of a state is the same in every run and process
+ZOBRIST_SEED = 0x5EED
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def get_zobrist_table(size: int) -> np.ndarray:
+    """
+    Returns the random 64-bit keys of every (cell, value) pair of a Magic Cube with the given size.
+
+    The table is built once per size (for the last TABLE_CACHE_SIZE sizes) and is read-only.
+
+    :param size: Magic Cube dimensions
+    :return: Array of shape (size^3, size^3 + 1), the key of value v at cell i is table[i, v]
+    """
+    rng = np.random.default_rng(ZOBRIST_SEED + size)
+    table = rng.integers(0, 2**64, size=(size**3, size**3 + 1), dtype=np.uint64)
+    table.flags.writeable = False
+    return table
+
+
+class ZobristHash:
+    """
+    Zobrist hash of a Magic Cube state, updated in O(1) per swap.
+
+    The hash is the XOR of the keys of every (cell, value) pair of the cube. Swapping the values a and b of the cells
+    i and j only replaces the keys of those two cells, so the new hash is the old one XOR the four keys (i, a), (i, b),
+    (j, a) and (j, b). Two different states share a hash with a probability of about 2^-64, small enough to identify
+    visited states by their hash alone.
+
+    The hash follows the cube data it is attached to: call ZobristHash.swap for every swap of the cube, before or after
+    the data is swapped (the update is the same).
+
+    :var cube: The Magic Cube the hash is attached to
+    :var value: The hash of the current state of the cube
+    """
+
+    def __init__(self, magic_cube: MagicCube):
+        self.cube: MagicCube = magic_cube
+        self.__table: np.ndarray = get_zobrist_table(magic_cube.size)
+        self.value: int = 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Recompute the hash from the cube data, e.g. after the data was changed without ZobristHash.swap.
+        """
+        keys = self.__table[np.arange(len(self.cube.data)), self.cube.data]
+        self.value = int(np.bitwise_xor.reduce(keys))
+
+    def swap_hash(self, i: int, j: int) -> int:
+        """
+        Returns the hash of the state reached by swapping the cells at index i and j, without swapping them.
+        """
+        a, b = self.cube.data[i], self.cube.data[j]
+        table = self.__table
+        return self.value ^ int(table[i, a] ^ table[i, b] ^ table[j, a] ^ table[j, b])
+
+    def swap_hashes(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """
+        Returns the hash of the state reached by each swap (first[k], second[k]), without swapping.
+
+        :param first: The first cell index of every swap
+        :param second: The second cell index of every swap
+        :return: Array of uint64, the hash after each swap
+        """
+        a, b = self.cube.data[first], self.cube.data[second]
+        table = self.__table
+        return (np.uint64(self.value) ^ table[first, a] ^ table[first, b] ^ table[second, a] ^ table[second, b])
+
+    def swap(self, i: int, j: int) -> int:
+        """
+        Update the hash for the swap of the cells at index i and j.
+
+        :return: The new hash
+        """
+        self.value = self.swap_hash(i, j)
+        return self.value
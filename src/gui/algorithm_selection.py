@@ -1,13 +1,19 @@
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 from algorithm.hc_steepest_ascent import HillClimbSteepest
 from algorithm.hc_sideways_move import HillClimbSideways
 from algorithm.hc_random import RandomRestartHillClimbing
 from algorithm.simulated_annealing import SimulatedAnnealing
 from algorithm.genetic_algorithm import GeneticAlgorithm
 from algorithm.hc_stochastic import StochasticHillClimb
+from algorithm.tabu_search import TabuSearch
+from algorithm.search_monitor import SearchMonitor, SearchBudget
+from algorithm.objective_function import OBJECTIVES
 from gui.visualization import Visualization
 from data_structure.magic_cube import MagicCube
+from data_structure.trajectory import Trajectory
+import queue
+import threading
 import time
 
 
@@ -15,7 +21,10 @@ class AlgorithmSelection(tk.Frame):
     """
     Algorithm Selection Window Frame.
     Call Visualization to show the visualization window.
+
+    The algorithms run in a worker thread, their progress is sent through a queue polled by the Tk main loop.
     """
+    POLL_INTERVAL = 50  # milliseconds between two polls of the worker queue
 
     def __init__(self, master=None, initial_cube: MagicCube = None):
         super().__init__(master)  # Construct the algorithm selection window
@@ -35,15 +44,23 @@ class AlgorithmSelection(tk.Frame):
         self.button_sideways = None
         self.input_sideways = None
         self.input_stochastic = None
+        self.hc_tabu_input = False  # Flag to check if the input for Tabu Search is shown
+        self.input_tabu_iterations = None
+        self.input_tabu_tenure = None
+        self.tabu_tenure = None
+        self.aspirations = None
         self.iteration = 0  # Number of iterations
         self.iteration_values = None
         self.master = master  # Reference to the main window
         self.cube: MagicCube = initial_cube  # Reference to the Magic Cube object
-        self.cube_states: list[MagicCube] = [initial_cube]  # List of MagicCube objects
+        self.cube_states: Trajectory = Trajectory(initial_cube)  # States visited by the search
         self.time_taken: float = 0  # Time taken to solve the cube
         self.message_passed: str = ""  # Additional Message to be displayed
         self.algorithm: str = ""
         self.maximum_objective_function = None
+        self.monitor: SearchMonitor | None = None                  # monitor of the running algorithm
+        self.worker: threading.Thread | None = None               # thread of the running algorithm
+        self.worker_queue: queue.Queue = queue.Queue()            # progress and result events of the worker
 
         self.hc_sideways_input = False  # Flag to check if the input for Hill Climbing with Sideways Move is shown
         self.hc_stochastic_input = False  # Flag to check if the input for Stochastic Hill Climbing is shown
@@ -59,6 +76,21 @@ class AlgorithmSelection(tk.Frame):
         bottom_row_frame = tk.Frame(self)
         bottom_row_frame.pack(pady=(5, 10))
 
+        # Objective maximized by the algorithms
+        objective_frame = tk.Frame(self)
+        objective_frame.pack(pady=(5, 5))
+        tk.Label(objective_frame, text="Objective:", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=(0, 5))
+        self.objective = tk.StringVar(self, value="count")
+        tk.OptionMenu(objective_frame, self.objective, *OBJECTIVES).pack(side=tk.LEFT)
+
+        # Budget of the algorithms, empty for no limit
+        tk.Label(objective_frame, text="Time Limit (s):", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=(10, 5))
+        self.input_time_limit = tk.Entry(objective_frame, width=6, bg="white", font=("Courier", 10))
+        self.input_time_limit.pack(side=tk.LEFT)
+        tk.Label(objective_frame, text="Max Evaluations:", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=(10, 5))
+        self.input_max_evaluations = tk.Entry(objective_frame, width=10, bg="white", font=("Courier", 10))
+        self.input_max_evaluations.pack(side=tk.LEFT)
+
         # Frame for inputs
         self.input_frame = tk.Frame(self)
         self.input_frame.pack(pady=(10, 5))  # Added top and bottom padding
@@ -74,7 +106,8 @@ class AlgorithmSelection(tk.Frame):
         ]
         algorithms_bottom = [
             ("Simulated Annealing", self.run_simulated_annealing),
-            ("Genetic Algorithm", self.run_genetic_algorithm)
+            ("Genetic Algorithm", self.run_genetic_algorithm),
+            ("Tabu Search", self.run_tabu_search)
         ]
 
         # Create buttons for top row algorithms (Hill Climbing)
@@ -82,27 +115,29 @@ class AlgorithmSelection(tk.Frame):
             button = tk.Button(top_row_frame, text=algo_name, command=algo_method, font=("Arial", 10))
             button.pack(side='left', padx=5)  # Keep the same horizontal padding
 
-        # Create buttons for bottom row algorithms (Genetic and Simulated Annealing)
+        # Create buttons for bottom row algorithms (Genetic, Simulated Annealing and Tabu Search)
         for algo_name, algo_method in algorithms_bottom:
             button = tk.Button(bottom_row_frame, text=algo_name, command=algo_method, font=("Arial", 10))
             button.pack(side='left', padx=5)  # Keep the same horizontal padding
 
+        # Frame for the progress of the running algorithm
+        progress_frame = tk.Frame(self)
+        progress_frame.pack(pady=(5, 10))
+        self.progress_bar = ttk.Progressbar(progress_frame, length=300, mode='determinate')
+        self.progress_bar.pack(side=tk.LEFT, padx=(0, 5))
+        self.cancel_button = tk.Button(progress_frame, text="Cancel", command=self.cancel, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT)
+        self.progress_label = tk.Label(self, text="", font=("Arial", 10))
+        self.progress_label.pack()
+
     # Placeholder methods for each algorithm
     def run_steepest_ascent_hill_climbing(self):
-        self.algorithm = "Steepest Ascent Hill-Climbing"
-        hc_steepest = HillClimbSteepest(self.cube)
-
-        print("Running")
+        hc_steepest = HillClimbSteepest(self.cube, self.objective.get())
 
-        start_time = time.time()
-        self.cube_states, self.iteration = hc_steepest.hill_climb_steepest_ascent()
-        end_time = time.time()
+        def finish(result):
+            self.cube_states, self.iteration = result
 
-        print("Finished")
-
-        self.time_taken = (end_time - start_time) * 1000
-
-        self.show_visualization()
+        self.__start("Steepest Ascent Hill-Climbing", hc_steepest, hc_steepest.hill_climb_steepest_ascent, finish)
 
     def run_hill_climbing_with_sideways(self):
         if not self.hc_sideways_input:
@@ -122,20 +157,12 @@ class AlgorithmSelection(tk.Frame):
 
     def __run_hill_climbing_with_sideways(self):
         max_side = self.input_sideways.get()
-        self.algorithm = "Hill Climbing with Sideways Move"
-        hc_sideways = HillClimbSideways(max_side, self.cube)
-
-        print("Running")
-
-        start_time = time.time()
-        self.cube_states, self.iteration = hc_sideways.hill_climb_sideways_move()
-        end_time = time.time()
+        hc_sideways = HillClimbSideways(max_side, self.cube, self.objective.get())
 
-        print("Finished")
+        def finish(result):
+            self.cube_states, self.iteration = result
 
-        self.time_taken = (end_time - start_time) * 1000
-
-        self.show_visualization()
+        self.__start("Hill Climbing with Sideways Move", hc_sideways, hc_sideways.hill_climb_sideways_move, finish)
 
     def run_random_restart_hill_climbing(self):
         if not self.hc_random_restart_input:
@@ -157,17 +184,13 @@ class AlgorithmSelection(tk.Frame):
     def __run_random_restart_hill_climbing(self):
         max_restart = self.input_max_random_restart.get()
         max_restart_iteration = self.input_random_restart_iteration.get()
-        self.algorithm = "Random Restart Hill Climbing"
+        hc_random = RandomRestartHillClimbing(self.cube.size, max_restart, max_restart_iteration, self.cube.data,
+                                              objective=self.objective.get())
 
-        print("Running")
+        def finish(result):
+            self.cube_states, self.iteration, self.random_restart_iterations, self.random_restart_amount = result
 
-        start_time = time.time()
-        hc_random = RandomRestartHillClimbing(self.cube.size, max_restart, max_restart_iteration, self.cube.data)
-        self.cube_states, self.iteration, self.random_restart_iterations, self.random_restart_amount = hc_random.run()
-        end_time = time.time()
-        print("Finished")
-        self.time_taken = (end_time - start_time) * 1000
-        self.show_visualization()
+        self.__start("Random Restart Hill Climbing", hc_random, hc_random.run, finish)
 
     def run_stochastic_hill_climbing(self):
         if not self.hc_stochastic_input:
@@ -189,39 +212,24 @@ class AlgorithmSelection(tk.Frame):
             max_iterations = 5000  # default number
         else:
             max_iterations = int(temp)
-        self.algorithm = "Stochastic Hill Climbing"
-        print("Running")
-        start_time = time.time()
-        hc_stochastic = StochasticHillClimb(self.cube)
-        self.cube_states, self.iteration, self.iteration_values = hc_stochastic.stochastic_hill_climb(max_iterations)
-        end_time = time.time()
+        hc_stochastic = StochasticHillClimb(self.cube, self.objective.get())
 
-        print("Finished")
+        def finish(result):
+            self.cube_states, self.iteration, self.iteration_values = result
 
-        self.time_taken = (end_time - start_time) * 1000
-
-        self.show_visualization()
+        self.__start("Stochastic Hill Climbing", hc_stochastic,
+                   lambda: hc_stochastic.stochastic_hill_climb(max_iterations), finish)
 
     def run_simulated_annealing(self):
-        self.algorithm = "Simulated Annealing"
-
-        print("Running")
-
-        start_time = time.time()
         initial_state = self.cube
+        sa = SimulatedAnnealing(initial_state, self.cube.size, objective=self.objective.get())
 
-        sa = SimulatedAnnealing(initial_state, self.cube.size)
-        sa.simulated_annealing()
-        self.cube_states = sa.get_states()
-        self.data_per_iteration = sa.get_probability_per_iteration()
-        self.stuck_frequency = sa.get_stuck_frequency()
-        
-        end_time = time.time()
-        self.time_taken = (end_time - start_time) * 1000
-
-        print("Finished")
+        def finish(result):
+            self.cube_states = sa.get_states()
+            self.data_per_iteration = sa.get_probability_per_iteration()
+            self.stuck_frequency = sa.get_stuck_frequency()
 
-        self.show_visualization()
+        self.__start("Simulated Annealing", sa, sa.simulated_annealing, finish)
 
     def run_genetic_algorithm(self):
         if not self.generic_algorithm:
@@ -246,24 +254,148 @@ class AlgorithmSelection(tk.Frame):
             messagebox.showerror("Button Already Pressed", "Please use the button Run Genetic Algorithm")
 
     def __run_genetic_algorithm(self):
-        self.algorithm = "Genetic Algorithm"
+        initial_state = self.cube
 
-        print("Running")
+        ga : GeneticAlgorithm = GeneticAlgorithm(initial_state, self.cube.size, int(self.generic_algorithm_iteration.get()), int(self.population_amount.get()), objective=self.objective.get())
 
-        start_time = time.time()
-        initial_state = self.cube
+        def finish(result):
+            self.cube_states = ga.get_states()
+            self.maximum_objective_function = ga.get_best_value()
+
+        self.__start("Genetic Algorithm", ga, ga.genetic_algorithm, finish)
+
+    def run_tabu_search(self):
+        if not self.hc_tabu_input:
+            self.hc_tabu_input = True
+            self.label = tk.Label(self.input_frame, text="Maximum Tabu Iterations:", font=("Arial", 10, "bold"))
+            self.label.pack(side=tk.LEFT, padx=(0, 5))  # Added right padding
+            self.input_tabu_iterations = tk.Entry(self.input_frame, width=5, bg="white", font=("Courier", 10))
+            self.input_tabu_iterations.pack(side=tk.LEFT)
+            self.label = tk.Label(self.input_frame, text="Tabu Tenure:", font=("Arial", 10, "bold"))
+            self.label.pack(side=tk.LEFT, padx=(0, 5))  # Added right padding
+            self.input_tabu_tenure = tk.Entry(self.input_frame, width=4, bg="white", font=("Courier", 10))
+            self.input_tabu_tenure.pack(side=tk.LEFT)
+
+            button_tabu = tk.Button(self.button_frame, text="Run Tabu Search",
+                                    command=lambda: self.__run_tabu_search())
+            button_tabu.pack(side=tk.RIGHT, padx=(5, 0))  # Added left padding
+        else:
+            messagebox.showerror("Button Already Pressed", "Please use the button Run Tabu Search")
+
+    def __run_tabu_search(self):
+        # Empty inputs use the defaults: 1000 iterations, a tenure of a tenth of the cube cells
+        iterations = self.input_tabu_iterations.get()
+        tenure = self.input_tabu_tenure.get()
+        tabu = TabuSearch(self.cube, int(iterations) if iterations else 1000, int(tenure) if tenure else None,
+                          objective=self.objective.get())
+
+        def finish(result):
+            self.cube_states, self.iteration = result
+            self.tabu_tenure = tabu.TENURE
+            self.aspirations = tabu.get_aspirations()
+
+        self.__start("Tabu Search", tabu, tabu.tabu_search, finish)
 
-        ga : GeneticAlgorithm = GeneticAlgorithm(initial_state, self.cube.size, int(self.generic_algorithm_iteration.get()), int(self.population_amount.get()))
-        ga.genetic_algorithm()
-        self.cube_states = ga.get_states()
-        self.maximum_objective_function = ga.get_best_value()
+    def __start(self, algorithm: str, solver, run, finish) -> None:
+        """
+        Run an algorithm in a worker thread, then show its visualization.
 
-        end_time = time.time()
-        self.time_taken = (end_time - start_time) * 1000
+        :param algorithm: The name of the algorithm
+        :param solver: The algorithm object, its monitor is replaced to report to this window
+        :param run: Called in the worker thread to run the algorithm, returns its result
+        :param finish: Called in the Tk main thread with the result of run, before the visualization is shown
+        """
+        if self.worker is not None and self.worker.is_alive():
+            messagebox.showerror("Algorithm Running", "Please wait for the running algorithm or cancel it")
+            return
+
+        try:
+            time_limit = self.input_time_limit.get().strip()
+            max_evaluations = self.input_max_evaluations.get().strip()
+            budget = SearchBudget(float(time_limit) if time_limit else None,
+                                  int(max_evaluations) if max_evaluations else None)
+        except ValueError:
+            messagebox.showerror("Invalid Budget", "The time limit and maximum evaluations must be numbers")
+            return
+
+        self.algorithm = algorithm
+        self.monitor = SearchMonitor(lambda progress: self.worker_queue.put(("progress", progress)), budget=budget)
+        solver.monitor = self.monitor
+
+        def work():
+            start_time = time.time()
+            try:
+                result = run()
+            except Exception as error:
+                self.worker_queue.put(("error", error))
+                return
+            end_time = time.time()
+            self.worker_queue.put(("done", result, (end_time - start_time) * 1000, finish))
 
-        print("Finished")
+        print("Running")
+        self.progress_bar.config(mode='determinate', value=0)
+        self.progress_label.config(text=f"Running {algorithm}...")
+        self.cancel_button.config(state=tk.NORMAL)
+        self.worker = threading.Thread(target=work, daemon=True)
+        self.worker.start()
+        self.after(self.POLL_INTERVAL, self.__poll_worker)
+
+    def cancel(self) -> None:
+        """
+        Stop the running algorithm, its visualization shows the states found so far.
+        """
+        if self.monitor is not None:
+            self.monitor.cancel()
+            self.progress_label.config(text=f"Cancelling {self.algorithm}...")
+            self.cancel_button.config(state=tk.DISABLED)
 
-        self.show_visualization()
+    def __poll_worker(self) -> None:
+        """
+        Handle the events sent by the worker thread, until its algorithm finished.
+        """
+        while True:
+            try:
+                event = self.worker_queue.get_nowait()
+            except queue.Empty:
+                self.after(self.POLL_INTERVAL, self.__poll_worker)
+                return
+
+            if event[0] == "progress":
+                self.__show_progress(event[1])
+            elif event[0] == "error":
+                self.cancel_button.config(state=tk.DISABLED)
+                self.progress_label.config(text=f"{self.algorithm} failed")
+                messagebox.showerror("Algorithm Failed", str(event[1]))
+                return
+            else:
+                _, result, self.time_taken, finish = event
+                stop_reason = self.monitor.budget.stop_reason
+                finish(result)
+                print("Finished")
+                self.cancel_button.config(state=tk.DISABLED)
+                self.progress_bar.config(mode='determinate', value=self.progress_bar['maximum'])
+                stopped = {"cancelled": "cancelled", "deadline": "reached its time limit",
+                           "evaluations": "reached its maximum evaluations"}.get(stop_reason)
+                self.progress_label.config(text=f"{self.algorithm} {stopped or 'finished'}")
+                self.message_passed = f"{stopped.capitalize()}, showing the best state found" if stopped else ""
+                self.show_visualization()
+                return
+
+    def __show_progress(self, progress: dict) -> None:
+        """
+        Show a progress report of the running algorithm.
+        """
+        if progress["total"]:
+            self.progress_bar.config(mode='determinate', maximum=progress["total"], value=progress["iteration"])
+            iteration = f"{progress['iteration']}/{progress['total']}"
+        else:
+            # Unknown amount of iterations, the bar only shows activity
+            self.progress_bar.config(mode='indeterminate')
+            self.progress_bar.step(5)
+            iteration = str(progress["iteration"])
+        self.progress_label.config(
+            text=f"Iteration {iteration} - value {progress['current_value']} (best {progress['best_value']}) - "
+                 f"{progress['evaluations_per_second']:,.0f} evaluations/sec")
 
     # Method to show the visualization
     def show_visualization(self) -> None:
@@ -276,5 +408,6 @@ class AlgorithmSelection(tk.Frame):
                                       self.time_taken, self.cube_states[-1].is_perfect(), self.message_passed,
                                       self.algorithm, self.iteration, self.iteration_values,
                                       self.random_restart_amount, self.random_restart_iterations,
-                                      self.data_per_iteration, self.stuck_frequency, self.get_population_amount, self.maximum_objective_function)
+                                      self.data_per_iteration, self.stuck_frequency, self.get_population_amount, self.maximum_objective_function,
+                                      self.tabu_tenure if self.algorithm == "Tabu Search" else None, self.aspirations)
         visualization.pack(fill='both', expand=True)
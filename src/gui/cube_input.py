@@ -1,4 +1,5 @@
-from data_structure.magic_cube import MagicCube
+from data_structure.magic_cube import MagicCube, get_cube_values
+from data_structure.cube_validator import is_permutation
 
 import tkinter as tk
 from tkinter import messagebox
@@ -16,7 +17,8 @@ class CubeInput(tk.Frame):
         self.cube: MagicCube = cube     # Reference to the MagicCube object
 
         # Add a label for the input field
-        self.label = tk.Label(self, text="Enter 125 comma-separated values:", font=("Arial", 12, "bold"))
+        self.label = tk.Label(self, text="Enter n\u00b3 comma-separated values (125 for a 5x5x5 cube, n \u2265 3):",
+                              font=("Arial", 12, "bold"))
         self.label.grid(row=0, column=0, columnspan=5, pady=(10, 5))
 
         # Create a large input area
@@ -42,9 +44,12 @@ class CubeInput(tk.Frame):
         input_data: str = self.input_text.get("1.0", tk.END).strip()
         values: list[str] = input_data.split(',')
 
-        # Validate the input length
-        if len(values) != 125:
-            messagebox.showerror("Input Error", "Please provide exactly 125 comma-separated values.")
+        # Validate the input length, it must fill a cube of size 3 or more
+        size = round(len(values) ** (1 / 3))
+        if size < 3 or len(values) != size**3:
+            messagebox.showerror("Input Error",
+                                 "Please provide n\u00b3 comma-separated values for a cube of size n \u2265 3, "
+                                 "e.g. 125 values for a 5x5x5 cube.")
             return
 
         # Try to convert values to integers
@@ -54,8 +59,14 @@ class CubeInput(tk.Frame):
             messagebox.showerror("Input Error", "All values must be integers.")
             return
 
-        # Update the cube's data
-        self.cube.data = values
+        # Every value from 1 to n^3 must appear exactly once
+        if not is_permutation(np.array(values), size):
+            messagebox.showerror("Input Error", f"Please use every value from 1 to {size**3} exactly once.")
+            return
+
+        # Update the cube's size and data
+        self.cube.size = size
+        self.cube.data = np.array(values, dtype=get_cube_values(size).dtype)
 
         # Update the input text area with formatted data
         formatted_data = ', '.join(map(str, values))
@@ -0,0 +1,70 @@
+import math
+import numpy as np
+
+
+def min_max_downsample(values, start: int, stop: int, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce values[start:stop] to at most about `max_points` points, keeping the minimum and the maximum of every bucket.
+
+    Unlike taking every k-th value, every peak and dip of the series stays visible in the plot.
+
+    :param values: The series, any array-like that can be sliced (list, ndarray, memory-mapped ndarray)
+    :param start: The index of the first value to plot
+    :param stop: The index after the last value to plot
+    :param max_points: The maximum amount of points returned, besides the first and the last value
+    :return: The indices of the kept values and the kept values, in index order
+    """
+    window = np.asarray(values[start:stop])
+    n = len(window)
+    if n <= max_points:
+        return np.arange(start, start + n), window
+
+    buckets = max(1, max_points // 2)
+    bucket_size = math.ceil(n / buckets)
+    buckets = math.ceil(n / bucket_size)
+
+    # Pad the last bucket with the last value, indices in the padding are clipped back to the last value
+    padded = np.concatenate((window, np.full(buckets * bucket_size - n, window[-1], dtype=window.dtype)))
+    blocks = padded.reshape(buckets, bucket_size)
+    offsets = np.arange(buckets) * bucket_size
+    kept = np.concatenate(([0], offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1), [n - 1]))
+    kept = np.unique(np.minimum(kept, n - 1))
+    return kept + start, window[kept]
+
+
+class DownsampledLine:
+    """
+    A line plot of a long series that draws at most about `max_points` vertices.
+
+    The line starts as the min/max envelope of the whole series. Whenever the x limits of the axes change (zoom, pan),
+    the visible range is downsampled again from the full series, so zooming in shows every value once few enough
+    values are visible.
+
+    :var line: The matplotlib line of the plot
+    """
+
+    def __init__(self, ax, values, max_points: int = 2000, **line_kwargs):
+        """
+        :param ax: The matplotlib axes to plot on, the x axis is the index of each value
+        :param values: The series, kept by reference and read again on every zoom
+        :param max_points: The maximum amount of vertices of the line
+        :param line_kwargs: Keyword arguments of ax.plot, e.g. color or marker
+        """
+        self.values = values
+        self.max_points = max_points
+        x, y = min_max_downsample(values, 0, len(values), max_points)
+        self.line = ax.plot(x, y, **line_kwargs)[0]
+        ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+    def on_xlim_changed(self, ax) -> None:
+        """
+        Downsample the values inside the new x limits.
+        """
+        low, high = ax.get_xlim()
+        start = min(max(0, math.floor(low)), len(self.values))
+        stop = max(min(len(self.values), math.ceil(high) + 1), start)
+        if stop - start < 2:
+            return
+        x, y = min_max_downsample(self.values, start, stop, self.max_points)
+        self.line.set_data(x, y)
+        ax.figure.canvas.draw_idle()
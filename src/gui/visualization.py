@@ -1,5 +1,9 @@
-from data_structure.magic_cube import MagicCube
+from data_structure.trajectory import Trajectory
+from algorithm.objective_function import ObjectiveFunction
+from gui.downsample import DownsampledLine
 
+import math
+import time
 import tkinter as tk
 import numpy as np
 import matplotlib.pyplot as plt
@@ -11,13 +15,16 @@ class Visualization(tk.Frame):
     Visualization Window Frame. Visualize the result of local search.
     """
 
+    MAX_PLOT_POINTS = 4000  # maximum vertices of a line plot, longer series are downsampled
+    MAX_MARKERS = 200       # maximum points of a line plot drawn with markers
+
     class Visualization(tk.Frame):
         """
         Visualization Window Frame. Visualize the result of local search.
         """
 
     def __init__(self, master,
-                 cube_states: list[MagicCube],
+                 cube_states: Trajectory,
                  time_taken: float,
                  is_perfect_cube: bool,
                  message_passed: str,
@@ -29,11 +36,13 @@ class Visualization(tk.Frame):
                  data_per_iteration: list[float],
                  stuck_frequency: int,
                  get_population_amount: int,
-                 max_obj_func: int):
+                 max_obj_func: int,
+                 tabu_tenure: int = None,
+                 aspirations: int = None):
 
         super().__init__(master)  # Construct the visualization window
         self.master = master  # Reference to the main window
-        self.cube_states = cube_states  # List of MagicCube objects
+        self.cube_states = cube_states  # States visited by the search
         self.cube_size = cube_states[0].size  # Size of the cube
         self.row_colors = ['red', 'blue', 'green', 'orange', 'purple']  # Colors for each row
         self.spacing_factor = 1.5  # Spacing between cube elements
@@ -47,10 +56,15 @@ class Visualization(tk.Frame):
         self.stuck_frequency = stuck_frequency
         self.get_population_amount = get_population_amount
         self.maximum_objective_function = max_obj_func
+        self.tabu_tenure = tabu_tenure
+        self.aspirations = aspirations
 
         # Set the default play speed
         self.play_speed = 500
         self.current_state_index = 0
+        self.shown_index = None             # state index currently drawn
+        self.frame_time = 0.0               # moving average of the time to render one frame, in seconds
+        self.frame_step = 1                 # states advanced per frame, more than 1 when rendering is too slow
 
         # Create 3D figure with Matplotlib
         self.fig = plt.Figure(figsize=(8, 8))
@@ -69,12 +83,27 @@ class Visualization(tk.Frame):
         self.spaced_y = self.y * self.spacing_factor
         self.spaced_z = self.z * self.spacing_factor
 
-        # Draw the initial cube visualization
-        self.draw_cube(0)
+        # Create the text of every cell and the wireframe once, frames only change the texts
+        self.texts = []
+        self.shown_data = None
+        self.background = None
+        self.create_artists()
 
         # Embed the Matplotlib plot into the Tkinter window
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+        self.use_blit = getattr(self.canvas, 'supports_blit', False)
+        if self.use_blit:
+            # The texts are animated: full redraws (e.g. rotating the view) skip them, so the background is
+            # captured without them after every full redraw and the texts are blitted over it
+            for text in self.texts:
+                text.set_animated(True)
+            self.canvas.mpl_connect('draw_event', self.on_draw)
+
+        # Draw the initial cube visualization
+        self.draw_cube(0)
+        self.shown_index = 0
+        self.canvas.draw()
 
         # State for play/pause functionality
         self.is_playing = False
@@ -163,6 +192,12 @@ class Visualization(tk.Frame):
                 f"Maximum_objective_function: {self.maximum_objective_function}\n"
             )
 
+        if self.tabu_tenure is not None:
+            description_text += (
+                f"Tabu Tenure: {self.tabu_tenure}\n"
+                f"Aspiration Moves: {self.aspirations}\n"
+            )
+
         self.description_label = tk.Label(self, text=description_text, font=("Arial", 10), justify=tk.LEFT,
                                           bg="white", borderwidth=2, relief=tk.SUNKEN, padx=20)
         self.description_label.place(relx=0, rely=0, anchor=tk.NW)  # Position at top left
@@ -171,6 +206,10 @@ class Visualization(tk.Frame):
         self.state_value_label = tk.Label(self, text="", font=("Arial", 12), justify=tk.CENTER)
         self.state_value_label.pack(pady=(5, 10), side=tk.BOTTOM)
 
+        # Label to display the measured playback frame rate
+        self.frame_rate_label = tk.Label(self, text="", font=("Arial", 10), justify=tk.CENTER)
+        self.frame_rate_label.pack(side=tk.BOTTOM)
+
         # Initialize state value display
         self.update_state_value(0)
 
@@ -219,24 +258,24 @@ class Visualization(tk.Frame):
         resulting_cube_display.config(state=tk.DISABLED)
         resulting_cube_display.pack()
 
-        # Prepare data for the line plot
+        # Prepare data for the line plot, the values recorded by the search
         if self.iteration_values is None:
-            objective_values = [cube.get_state_value() for cube in self.cube_states]
-            iterations = list(range(len(objective_values)))
+            objective_values = self.cube_states.values
         else:
             objective_values = self.iteration_values
-            iterations = list(range(len(objective_values)))
 
-        # Create a figure for the line plot
+        # Create a figure for the line plot, long runs are downsampled and re-fetched on zoom
         fig, ax = plt.subplots()
-        ax.plot(iterations, objective_values, marker='o')
+        self.objective_line = DownsampledLine(ax, objective_values, self.MAX_PLOT_POINTS,
+                                              marker='o' if len(objective_values) <= self.MAX_MARKERS else None)
         ax.set_title('Objective Function Value Over Iterations')
         ax.set_xlabel('Iteration Number')
         ax.set_ylabel('Objective Value')
         ax.grid()
 
-        # Add a red horizontal line at y = 109
-        ax.axhline(y=109, color='red', linestyle='--', label='Diagonal Magic Cube(y=109)')
+        # Add a red horizontal line at the value of a perfect magic cube (109 for a 5x5x5 cube)
+        max_value = ObjectiveFunction.get_max_value(self.cube_size)
+        ax.axhline(y=max_value, color='red', linestyle='--', label=f'Diagonal Magic Cube(y={max_value})')
         ax.legend()
 
         # Embed the plot into the Tkinter window
@@ -263,12 +302,10 @@ class Visualization(tk.Frame):
             canvas2.get_tk_widget().pack()
 
         if self.data_per_iteration is not None:
-            # Prepare data for the random restart plot
-            iterations = list(range(len(self.data_per_iteration)))
-
-            # Create a new figure for the random restart plot
+            # Create a new figure for the probability plot
             fig2, ax2 = plt.subplots()
-            ax2.plot(iterations, self.data_per_iteration, color='orange')
+            self.probability_line = DownsampledLine(ax2, self.data_per_iteration, self.MAX_PLOT_POINTS,
+                                                    color='orange')
             ax2.set_title('Iteration over probability = e(delta_e/temperature)')
             ax2.set_xlabel('Probability')
             ax2.set_ylabel('Iteration')
@@ -290,21 +327,17 @@ class Visualization(tk.Frame):
         # Bind the mouse wheel to scroll
         canvas.bind_all("<MouseWheel>", lambda event: canvas.yview_scroll(int(-1 * (event.delta / 120)), "units"))
 
-    def draw_cube(self, state_index) -> None:
+    def create_artists(self) -> None:
         """
-        Draw the cube at a specific state index.
+        Create the text of every cell, the axis limits and the wireframe, once.
         """
-        self.ax.clear()
-        cube_state = self.cube_states[state_index].data
-
         for i in range(len(self.x)):
             # Determine the color based on the row index (y value)
-            color = self.row_colors[self.y[i] % self.cube_size]
-            self.ax.text(
-                self.spaced_x[i], self.spaced_y[i], self.spaced_z[i],
-                str(cube_state[i]),
+            color = self.row_colors[self.y[i] % len(self.row_colors)]
+            self.texts.append(self.ax.text(
+                self.spaced_x[i], self.spaced_y[i], self.spaced_z[i], "",
                 color=color, fontsize=12, ha='center', va='center', fontweight='bold'
-            )
+            ))
 
         # Set axis limits
         self.ax.set_xlim([-self.margin_factor, (self.cube_size - 1) * self.spacing_factor + self.margin_factor])
@@ -314,6 +347,41 @@ class Visualization(tk.Frame):
         # Draw the wireframe box
         self.draw_wireframe()
 
+    def draw_cube(self, state_index) -> None:
+        """
+        Set the texts to the cube at a specific state index, only the cells that changed since the last frame.
+        """
+        cube_state = self.cube_states[state_index].data
+        if self.shown_data is None:
+            changed = range(len(cube_state))
+        else:
+            changed = np.flatnonzero(cube_state != self.shown_data).tolist()
+        for i in changed:
+            self.texts[i].set_text(str(cube_state[i]))
+        self.shown_data = cube_state
+
+    def render(self) -> None:
+        """
+        Show the current texts, by blitting them over the saved background if the backend supports it.
+        """
+        if self.use_blit and self.background is not None:
+            self.canvas.restore_region(self.background)
+            self.draw_texts()
+            self.canvas.blit(self.fig.bbox)
+        else:
+            self.canvas.draw_idle()
+
+    def draw_texts(self) -> None:
+        for text in self.texts:
+            self.ax.draw_artist(text)
+
+    def on_draw(self, event) -> None:
+        """
+        Save the background after a full redraw, then draw the animated texts over it.
+        """
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_texts()
+
     def draw_wireframe(self) -> None:
         """
         Draw a wireframe around the cube to give a 3D box effect.
@@ -344,16 +412,20 @@ class Visualization(tk.Frame):
         """
         Update the cube's visualization based on slider value.
         """
+        val = int(val)
+        if val == self.shown_index:
+            # e.g. the slider callback of a frame that was already drawn
+            return
         self.draw_cube(val)
-        self.canvas.draw()
+        self.render()
+        self.shown_index = val
         self.update_state_value(val)
 
     def update_state_value(self, state_index) -> None:
         """
         Update the label with the current state value.
         """
-        current_cube = self.cube_states[state_index]
-        state_value = current_cube.get_state_value()  # Get the state value
+        state_value = self.cube_states.values[state_index]  # Get the recorded state value
         self.state_value_label.config(text=f"Current State Value: {state_value}")
 
     def show_initial_state(self) -> None:
@@ -441,6 +513,8 @@ class Visualization(tk.Frame):
         """
         Start automatic update of the cube states.
         """
+        if self.is_playing:
+            return
         self.is_playing = True
         self.update_cube(self.current_state_index)
         self.auto_update()
@@ -462,18 +536,31 @@ class Visualization(tk.Frame):
     def auto_update(self):
         """
         Automatically update the cube state.
+
+        When a frame takes longer to render than the chosen speed allows, several states are advanced per frame
+        so the playback keeps the chosen speed in states per second.
         """
         if self.is_playing:
-            self.current_state_index += 1
+            start_time = time.perf_counter()
+            self.current_state_index += self.frame_step
             if self.current_state_index >= len(self.cube_states):
                 self.current_state_index = 0
 
             # Update the cube and the slider
             self.update_cube(self.current_state_index)
-
             self.slider.set(self.current_state_index)
-
-            self.after(self.play_speed, self.auto_update)
+            self.update_idletasks()
+
+            # Measure the rendering time and skip states if it outpaces the chosen speed
+            elapsed = time.perf_counter() - start_time
+            self.frame_time = elapsed if self.frame_time == 0 else 0.8 * self.frame_time + 0.2 * elapsed
+            self.frame_step = max(1, math.ceil(self.frame_time * 1000 / self.play_speed))
+            frame_interval = max(self.play_speed * self.frame_step, self.frame_time * 1000)
+            self.frame_rate_label.config(
+                text=f"Playback: {1000 / frame_interval:.1f} fps" +
+                     (f" (skipping {self.frame_step - 1} states per frame)" if self.frame_step > 1 else ""))
+
+            self.after(max(1, round(frame_interval - elapsed * 1000)), self.auto_update)
 
     def set_speed(self, speed_value: int) -> None:
         """
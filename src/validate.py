@@ -0,0 +1,66 @@
+from data_structure.cube_validator import validate_cubes
+import cli
+
+import argparse
+import json
+import sys
+import numpy as np
+
+
+def load_cubes(path: str, size: int = None) -> tuple[np.ndarray, int]:
+    """
+    Read the cubes of a result file as a stack of cube data.
+
+    Supported files are .npy arrays (one cube, or one cube per row), JSON results of cli.py (their final cube) and
+    cube files of comma-separated values such as example.txt.
+
+    :param size: The dimensions of every cube, derived from the amount of values of a cube if not given
+    :return: Array of shape (amount of cubes, size^3) and the size
+    """
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+    elif path.endswith(".json"):
+        with open(path) as file:
+            data = np.array(json.load(file)["final_cube"])
+    else:
+        data = cli.read_cube_file(path)
+    cells = data.shape[-1]
+    size = size or round(cells ** (1 / 3))
+    if cells != size**3:
+        raise ValueError(f"{path}: expected {size**3} values per cube for a cube of size {size}, got {cells}")
+    return data.reshape(-1, cells), size
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check whether the cubes of result files are perfect magic cubes.")
+    parser.add_argument("files", nargs="+", help=".npy stacks of cubes, JSON results of cli.py or cube text files")
+    parser.add_argument("--size", type=int, default=None, help="cube dimensions (default: from the amount of values)")
+    parser.add_argument("--report", action="store_true",
+                        help="list the failing lines of every cube that is not perfect")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    all_perfect = True
+    for path in args.files:
+        try:
+            cubes, size = load_cubes(path, args.size)
+        except (OSError, ValueError, KeyError) as error:
+            sys.exit(str(error))
+        report = validate_cubes(cubes, size, report=True)
+        all_perfect &= bool(report.is_perfect.all())
+        print(f"{path}: {report}")
+
+        if args.report:
+            for cube in np.flatnonzero(~report.is_perfect):
+                lines = report.failing_lines(cube)
+                permutation = "" if report.is_permutation[cube] else ", not a permutation"
+                print(f"  cube {cube}: {len(lines)} failing lines{permutation}")
+                for _, name, deviation in lines:
+                    print(f"    {name}: {deviation:+d}")
+    sys.exit(0 if all_perfect else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from algorithm.cooling_schedule import COOLING_SCHEDULES, LinearCooling, LogarithmicCooling, get_cooling_schedule
+
+import math
+import numpy as np
+import pytest
+
+
+INITIAL, FINAL = 20.0, 0.5
+# Every schedule but the logarithmic one, which ignores the final temperature
+REACHING = [name for name, schedule in COOLING_SCHEDULES.items() if schedule is not LogarithmicCooling]
+
+
+def temperatures(schedule, times) -> np.ndarray:
+    return np.array([schedule.temperature(time) for time in times])
+
+
+@pytest.mark.parametrize("name", COOLING_SCHEDULES)
+@pytest.mark.parametrize("max_time", [2, 10, 1000])
+def test_starts_at_the_initial_temperature(name, max_time):
+    schedule = get_cooling_schedule(name, INITIAL, FINAL, max_time)
+    assert schedule.temperature(1) == pytest.approx(INITIAL)
+
+
+@pytest.mark.parametrize("name", REACHING)
+@pytest.mark.parametrize("max_time", [2, 10, 1000])
+def test_ends_at_the_final_temperature(name, max_time):
+    schedule = get_cooling_schedule(name, INITIAL, FINAL, max_time)
+    assert schedule.temperature(max_time) == pytest.approx(FINAL)
+
+
+def test_logarithmic_ignores_the_final_temperature():
+    schedule = get_cooling_schedule("logarithmic", INITIAL, FINAL, 1000)
+    times = np.arange(1, 1001)
+    assert temperatures(schedule, times) == pytest.approx(INITIAL * math.log(2) / np.log(times + 1))
+    assert schedule.temperature(1000) > FINAL
+
+
+@pytest.mark.parametrize("name", COOLING_SCHEDULES)
+@pytest.mark.parametrize("max_time", [2, 10, 1000])
+def test_never_increases(name, max_time):
+    schedule = get_cooling_schedule(name, INITIAL, FINAL, max_time)
+    # Past max_time too, a run may overshoot its last step
+    values = temperatures(schedule, range(1, 2 * max_time + 1))
+    assert (np.diff(values) <= 0).all()
+    assert (values > 0).all()
+
+
+@pytest.mark.parametrize("name", REACHING)
+def test_stays_between_the_temperatures(name):
+    schedule = get_cooling_schedule(name, INITIAL, FINAL, 500)
+    values = temperatures(schedule, range(1, 501))
+    assert values.min() >= FINAL * (1 - 1e-9)
+    assert values.max() <= INITIAL * (1 + 1e-9)
+
+
+def test_linear_is_clamped_at_the_final_temperature():
+    schedule = LinearCooling(INITIAL, FINAL, 100)
+    assert schedule.temperature(101) == FINAL
+    assert schedule.temperature(10**6) == FINAL
+
+
+@pytest.mark.parametrize("name", COOLING_SCHEDULES)
+def test_single_step(name):
+    # No step between the initial and the final temperature, the schedule still starts at the initial one
+    schedule = get_cooling_schedule(name, INITIAL, FINAL, 1)
+    assert schedule.steps == 1
+    assert schedule.temperature(1) == pytest.approx(INITIAL)
+
+
+@pytest.mark.parametrize("name", COOLING_SCHEDULES)
+@pytest.mark.parametrize("initial, final", [(0, FINAL), (INITIAL, 0), (-1, FINAL), (INITIAL, -1)])
+def test_non_positive_temperatures_are_rejected(name, initial, final):
+    with pytest.raises(ValueError):
+        get_cooling_schedule(name, initial, final, 100)
+
+
+def test_unknown_schedule_is_rejected():
+    with pytest.raises(ValueError):
+        get_cooling_schedule("exponential", INITIAL, FINAL, 100)
@@ -0,0 +1,103 @@
+from data_structure import cube_validator
+from data_structure.cube_validator import ValidationReport, is_permutation, validate_cubes
+from data_structure.line_table import get_cell_lines, get_line_count, get_magic_sum
+from data_structure.magic_cube import MagicCube
+
+import numpy as np
+
+
+def perfect_cube_data(size: int = 11) -> np.ndarray:
+    """
+    The data of a perfect magic cube, for a prime size with no line direction d (axes, side and space diagonals) such
+    that v . d = 0 mod size for the vectors v below, 11 or 13.
+
+    Every digit (v . (x, y, z)) mod size of the value in base size takes every digit once along every line, and the
+    three digits together are an invertible linear map of (x, y, z), so every value appears once.
+    """
+    x, y, z = np.meshgrid(np.arange(size), np.arange(size), np.arange(size), indexing="ij")
+    digits = [(a * x + b * y + c * z) % size for a, b, c in ((1, 2, 4), (1, 2, 5), (1, 3, 5))]
+    values = 1 + digits[0] * size**2 + digits[1] * size + digits[2]
+    data = np.empty(size**3, dtype=np.int64)
+    data[(x + y * size + z * size**2).ravel()] = values.ravel()
+    return data
+
+
+def test_perfect_cube():
+    data = perfect_cube_data()
+    assert validate_cubes(data, 11) is True
+    assert is_permutation(data, 11) is True
+    assert MagicCube(11, data).is_perfect()
+
+
+def test_imperfect_cubes():
+    data = perfect_cube_data()
+    swapped = data.copy()
+    swapped[[0, 1]] = swapped[[1, 0]]
+    assert validate_cubes(swapped, 11) is False
+    assert is_permutation(swapped, 11) is True
+
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        assert validate_cubes(rng.permutation(125) + 1, 5) is False
+
+
+def test_every_line_magic_but_not_a_permutation():
+    # Every line of a cube filled with magic_sum / size sums to the magic number
+    data = np.full(125, get_magic_sum(5) // 5)
+    assert validate_cubes(data, 5) is False
+    assert is_permutation(data, 5) is False
+
+    report = validate_cubes(data, 5, report=True)
+    assert not report.deviations.any()
+    assert not report.is_permutation[0]
+    assert not report.is_perfect[0]
+
+
+def test_permutation_out_of_range():
+    data = np.arange(1, 126)
+    assert is_permutation(data, 5) is True
+    data[0] = 0
+    assert is_permutation(data, 5) is False
+    data[0] = 126
+    assert is_permutation(data, 5) is False
+
+
+def test_stack_matches_single_cubes():
+    rng = np.random.default_rng(1)
+    perfect = perfect_cube_data()
+    stack = np.array([perfect, rng.permutation(11**3) + 1, perfect, np.full(11**3, get_magic_sum(11) // 11)])
+    expected = [validate_cubes(cube, 11) for cube in stack]
+    assert expected == [True, False, True, False]
+    assert validate_cubes(stack, 11).tolist() == expected
+    assert is_permutation(stack, 11).tolist() == [True, True, True, False]
+
+
+def test_report():
+    perfect = perfect_cube_data()
+    swapped = perfect.copy()
+    swapped[[0, 1]] = swapped[[1, 0]]
+    report = validate_cubes(np.array([perfect, swapped]), 11, report=True)
+
+    assert isinstance(report, ValidationReport)
+    assert len(report) == 2
+    assert report.deviations.shape == (2, get_line_count(11))
+    assert report.is_perfect.tolist() == [True, False]
+    assert report.failing_line_counts[0] == 0
+    assert report.failing_lines(0) == []
+
+    # Lines through one of the swapped cells change by their difference, lines through both keep their sum
+    lines_first, lines_second = set(get_cell_lines(11)[0]), set(get_cell_lines(11)[1])
+    difference = int(perfect[1] - perfect[0])
+    expected = {line: difference for line in lines_first - lines_second}
+    expected.update({line: -difference for line in lines_second - lines_first})
+    assert {line: deviation for line, _, deviation in report.failing_lines(1)} == expected
+    assert report.failing_line_counts[1] == len(expected)
+    assert str(report) == "1/2 perfect, 0 not a permutation of 1..1331"
+
+
+def test_chunks(monkeypatch):
+    monkeypatch.setattr(cube_validator, "CHUNK_SIZE", 2)
+    rng = np.random.default_rng(2)
+    perfect = perfect_cube_data()
+    stack = np.array([perfect if k % 3 == 0 else rng.permutation(11**3) + 1 for k in range(7)])
+    assert validate_cubes(stack, 11).tolist() == [k % 3 == 0 for k in range(7)]
@@ -0,0 +1,90 @@
+from algorithm.genetic_algorithm import GeneticAlgorithm
+from data_structure.magic_cube import MagicCube
+
+import numpy as np
+import pytest
+
+
+POPULATION = 10
+ROUNDS = 2000   # selections drawn to estimate the frequency of each individual
+
+
+def make_genetic(selection: str, scores: np.ndarray, objective: str = "count") -> GeneticAlgorithm:
+    """
+    A genetic algorithm on a 3x3x3 cube whose population has the given scores, the first row the least fit.
+    """
+    np.random.seed(0)
+    genetic = GeneticAlgorithm(MagicCube(3), 3, 10, POPULATION, selection, objective)
+    genetic.population = np.zeros((POPULATION, 27), dtype=np.uint8)
+    genetic.scores = np.asarray(scores)
+    genetic.fitness = np.arange(POPULATION)
+    return genetic
+
+
+def select_parents(genetic: GeneticAlgorithm) -> np.ndarray:
+    return genetic._GeneticAlgorithm__select_parents()
+
+
+def frequencies(genetic: GeneticAlgorithm) -> np.ndarray:
+    """
+    The share of the draws of ROUNDS selections that picked each individual.
+    """
+    draws = np.concatenate([select_parents(genetic).ravel() for _ in range(ROUNDS)])
+    return np.bincount(draws, minlength=POPULATION) / len(draws)
+
+
+@pytest.mark.parametrize("selection", GeneticAlgorithm.SELECTIONS)
+def test_parents_of_every_pair(selection):
+    parents = select_parents(make_genetic(selection, np.arange(POPULATION)))
+    # Two parents for each of the POPULATION_COUNT pairs of children, 2 * POPULATION_COUNT draws
+    assert parents.shape == (POPULATION, 2)
+    assert np.issubdtype(parents.dtype, np.integer)
+    assert parents.min() >= 0 and parents.max() < POPULATION
+
+
+def test_roulette_draws_proportionally_to_the_fitness():
+    scores = np.arange(POPULATION)
+    observed = frequencies(make_genetic("roulette", scores))
+    assert observed == pytest.approx(scores / scores.sum(), abs=0.01)
+    # A zero fitness is never drawn
+    assert observed[0] == 0
+
+
+def test_graded_roulette_draws_by_the_distance_to_the_worst():
+    # Graded scores are penalties, the worst individual has the lowest score
+    scores = np.arange(POPULATION) - 100
+    observed = frequencies(make_genetic("roulette", scores, "absolute"))
+    weights = np.arange(POPULATION)
+    assert observed == pytest.approx(weights / weights.sum(), abs=0.01)
+
+
+def test_roulette_without_fitness_draws_uniformly():
+    observed = frequencies(make_genetic("roulette", np.zeros(POPULATION)))
+    assert observed == pytest.approx(np.full(POPULATION, 1 / POPULATION), abs=0.01)
+
+
+def test_rank_draws_proportionally_to_the_rank():
+    # The ranks, not the score gaps, set the weights: 1 for the worst up to POPULATION for the best
+    scores = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 1000])
+    observed = frequencies(make_genetic("rank", scores))
+    ranks = np.arange(1, POPULATION + 1)
+    assert observed == pytest.approx(ranks / ranks.sum(), abs=0.01)
+
+
+def test_tournament_favours_the_fittest():
+    genetic = make_genetic("tournament", np.arange(POPULATION))
+    observed = frequencies(genetic)
+    # Individual k wins when it is the fittest of TOURNAMENT_SIZE candidates drawn with replacement
+    below = np.arange(POPULATION + 1) ** genetic.TOURNAMENT_SIZE
+    expected = np.diff(below) / POPULATION ** genetic.TOURNAMENT_SIZE
+    assert observed == pytest.approx(expected, abs=0.01)
+
+
+@pytest.mark.parametrize("selection", GeneticAlgorithm.SELECTIONS)
+def test_fitter_individuals_are_drawn_more(selection):
+    # Shuffled scores, so the selection cannot rely on the order of the population
+    scores = np.random.default_rng(1).permutation(POPULATION)
+    observed = frequencies(make_genetic(selection, scores))
+    by_score = observed[np.argsort(scores)]
+    assert (np.diff(by_score) > 0).all()
+    assert (observed * scores).sum() > scores.mean()
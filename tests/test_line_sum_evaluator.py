@@ -0,0 +1,112 @@
+from algorithm.objective_function import ObjectiveFunction, OBJECTIVES
+from data_structure.line_table import get_cell_lines, get_swap_pairs
+from data_structure.magic_cube import MagicCube
+
+import numpy as np
+import pytest
+
+
+def brute_force(cube: MagicCube, objective: str) -> tuple[int, int]:
+    """
+    The objective value and the score of a cube, recomputed from every line of the cube.
+    """
+    value = ObjectiveFunction.get_object_value(cube)
+    score = int(ObjectiveFunction.get_object_scores(cube.data[None], cube.size, objective)[0])
+    return value, score
+
+
+def swapped(cube: MagicCube, i: int, j: int) -> MagicCube:
+    new_cube = cube.copy()
+    new_cube.swap_index(i, j)
+    return new_cube
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_deltas_match_recompute(size, objective):
+    rng = np.random.default_rng(size)
+    cube = MagicCube(size, rng.permutation(size**3) + 1)
+    evaluator = cube.get_evaluator(objective)
+    value, score = brute_force(cube, objective)
+    assert (evaluator.value, evaluator.score) == (value, score)
+
+    for i, j in rng.integers(0, size**3, size=(200, 2)).tolist():
+        new_value, new_score = brute_force(swapped(cube, i, j), objective)
+        assert evaluator.value_delta(i, j) == new_value - value
+        assert evaluator.swap_delta(i, j) == new_score - score
+        assert evaluator.swap_deltas(i, j) == (new_value - value, new_score - score)
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_swap_keeps_line_sums(objective):
+    rng = np.random.default_rng(1)
+    cube = MagicCube(5, rng.permutation(125) + 1)
+    evaluator = cube.get_evaluator(objective)
+
+    for i, j in rng.integers(0, 125, size=(100, 2)).tolist():
+        expected = evaluator.value + evaluator.value_delta(i, j)
+        assert evaluator.swap(i, j) == expected
+        assert (evaluator.value, evaluator.score) == brute_force(cube, objective)
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_neighbour_scores_match_recompute(objective):
+    rng = np.random.default_rng(2)
+    cube = MagicCube(3, rng.permutation(27) + 1)
+    evaluator = cube.get_evaluator(objective)
+    first, second = get_swap_pairs(3)
+
+    successors = [swapped(cube, i, j) for i, j in zip(first.tolist(), second.tolist())]
+    stack = np.array([successor.data for successor in successors])
+    assert np.array_equal(evaluator.neighbour_values(), ObjectiveFunction.get_object_values(stack, 3))
+    assert np.array_equal(evaluator.neighbour_scores(), ObjectiveFunction.get_object_scores(stack, 3, objective))
+    assert evaluator.scanned == 2 * len(first)
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_candidate_pairs_hold_the_best_swap(objective):
+    # Every line of a cube filled with magic_sum / size is magic, moving a few units between two cells off the
+    # diagonals only violates the row, column and pillar of each cell
+    off_diagonals = [cell for cell, lines in enumerate(get_cell_lines(5)) if len(lines) == 3]
+    data = np.full(125, 63)
+    data[off_diagonals[0]] += 7
+    data[off_diagonals[-1]] -= 7
+    evaluator = MagicCube(5, data).get_evaluator(objective)
+
+    pairs = evaluator.candidate_pairs()
+    assert pairs is not None
+    scores = evaluator.neighbour_scores()
+    assert len(pairs) < len(scores)
+    assert scores[pairs].max() == scores.max()
+    assert np.array_equal(evaluator.neighbour_scores(pairs), scores[pairs])
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_candidate_pairs_follow_the_swaps(objective):
+    # Few violated lines: a cube filled with magic_sum / size where some cells hold a few units more or less. Swapping
+    # those cells around makes lines violated and magic again.
+    rng = np.random.default_rng(4)
+    data = np.full(125, 63)
+    cells = rng.choice(125, size=8, replace=False)
+    data[cells[:4]] += [1, 2, 5, 9]
+    data[cells[4:]] -= [1, 2, 5, 9]
+    cube = MagicCube(5, data)
+    evaluator = cube.get_evaluator(objective)
+    evaluator.CANDIDATE_FRACTION = 1.0      # always return the candidates, never fall back to the whole neighbourhood
+    evaluator.candidate_pairs()
+
+    changed = 0
+    for _ in range(300):
+        # Mostly swaps involving a perturbed cell, so the swap changes line sums
+        i = int(rng.choice(np.flatnonzero(cube.data != 63)))
+        j = int(rng.integers(125))
+        before = evaluator.candidate_pairs()
+        evaluator.swap(i, j)
+
+        recount = cube.copy().get_evaluator(objective)
+        recount.CANDIDATE_FRACTION = 1.0
+        expected = recount.candidate_pairs()
+        assert np.array_equal(evaluator.candidate_pairs(), expected)
+        changed += not np.array_equal(before, expected)
+    # The candidate set changed along the way, the incremental updates were exercised
+    assert changed > 50
@@ -0,0 +1,43 @@
+from data_structure.magic_cube import MagicCube, get_cube_values
+
+import numpy as np
+import pytest
+
+
+def test_random_cube_is_a_permutation():
+    cube = MagicCube(5)
+    assert cube.data.dtype == get_cube_values(5).dtype
+    assert np.array_equal(np.sort(cube.data), get_cube_values(5))
+
+
+def test_data_is_converted_to_the_cube_type():
+    data = np.arange(1, 126, dtype=np.int64)
+    cube = MagicCube(5, data)
+    assert cube.data.dtype == np.uint8
+    assert np.array_equal(cube.data, data)
+    # Data of the right type is used as is
+    assert MagicCube(5, cube.data).data is cube.data
+
+
+@pytest.mark.parametrize("value", [0, -1, 126, 300])
+def test_out_of_range_values_are_rejected(value):
+    data = np.arange(1, 126)
+    data[7] = value
+    # 300 would wrap to 44 and -1 to 255 in the uint8 data of a 5x5x5 cube
+    with pytest.raises(ValueError):
+        MagicCube(5, data)
+    with pytest.raises(ValueError):
+        MagicCube(5, data.tolist())
+
+
+def test_large_cube_values_are_rejected():
+    data = np.arange(1, 7**3 + 1)
+    data[0] = 2**16 + 1
+    with pytest.raises(ValueError):
+        MagicCube(7, data)
+
+
+@pytest.mark.parametrize("shape", [(124,), (126,), (5, 5, 5)])
+def test_wrong_shape_is_rejected(shape):
+    with pytest.raises(ValueError):
+        MagicCube(5, np.ones(shape, dtype=int))
@@ -0,0 +1,170 @@
+from algorithm.genetic_algorithm import GeneticAlgorithm
+from algorithm.hc_random import RandomRestartHillClimbing
+from algorithm.hc_sideways_move import HillClimbSideways
+from algorithm.hc_steepest_ascent import HillClimbSteepest
+from algorithm.hc_stochastic import StochasticHillClimb
+from algorithm.search_monitor import SearchBudget, SearchMonitor
+from algorithm.simulated_annealing import SimulatedAnnealing
+from algorithm.tabu_search import TabuSearch
+from data_structure.line_table import get_swap_pairs
+from data_structure.magic_cube import MagicCube
+
+import numpy as np
+import pytest
+import random
+
+
+NEIGHBOURHOOD = len(get_swap_pairs(5)[0])   # swaps scored by a full scan of a 5x5x5 cube
+
+
+class RecordingBudget(SearchBudget):
+    """
+    A SearchBudget that keeps the amount of evaluations the search reported on its last check.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evaluations: int = 0
+        self.checks: int = 0
+
+    def check(self, evaluations: int = 0) -> bool:
+        self.evaluations = evaluations
+        self.checks += 1
+        return super().check(evaluations)
+
+
+def run_steepest(cube, budget):
+    solver = HillClimbSteepest(cube)
+    solver.monitor = SearchMonitor(budget=budget)
+    return solver.hill_climb_steepest_ascent()[0]
+
+
+def run_sideways(cube, budget):
+    solver = HillClimbSideways(10, cube)
+    solver.monitor = SearchMonitor(budget=budget)
+    return solver.hill_climb_sideways_move()[0]
+
+
+def run_stochastic(cube, budget):
+    solver = StochasticHillClimb(cube)
+    solver.monitor = SearchMonitor(budget=budget)
+    return solver.stochastic_hill_climb(10**6)[0]
+
+
+def run_tabu(cube, budget):
+    solver = TabuSearch(cube, max_iterations=10**6)
+    solver.monitor = SearchMonitor(budget=budget)
+    return solver.tabu_search()[0]
+
+
+def run_annealing(cube, budget):
+    solver = SimulatedAnnealing(cube, 5)
+    solver.monitor = SearchMonitor(budget=budget)
+    solver.simulated_annealing()
+    return solver.get_states()
+
+
+def run_parallel_tempering(cube, budget):
+    solver = SimulatedAnnealing(cube, 5)
+    solver.monitor = SearchMonitor(budget=budget)
+    solver.parallel_tempering()
+    return solver.get_states()
+
+
+def run_genetic(cube, budget):
+    solver = GeneticAlgorithm(cube, 5, 10**6, 20)
+    solver.monitor = SearchMonitor(budget=budget)
+    solver.genetic_algorithm()
+    return solver.get_states()
+
+
+def run_random_restart(cube, budget, workers=1):
+    solver = RandomRestartHillClimbing(5, 50, 10**6, cube.data, workers=workers, seed=0, candidate_list=False)
+    solver.monitor = SearchMonitor(budget=budget)
+    return solver.run()[0]
+
+
+# Every solver with the most evaluations it does between two checks of the budget
+SOLVERS = {
+    "steepest": (run_steepest, NEIGHBOURHOOD),
+    "sideways": (run_sideways, NEIGHBOURHOOD),
+    "stochastic": (run_stochastic, 1),
+    "tabu": (run_tabu, NEIGHBOURHOOD),
+    "annealing": (run_annealing, 1000),
+    "parallel_tempering": (run_parallel_tempering, 1000),
+    "genetic": (run_genetic, 2 * 20),
+    "random_restart": (run_random_restart, NEIGHBOURHOOD),
+}
+
+
+@pytest.fixture
+def cube():
+    np.random.seed(0)
+    random.seed(0)
+    return MagicCube(5)
+
+
+@pytest.mark.parametrize("solver", SOLVERS)
+def test_max_evaluations(solver, cube):
+    run, step = SOLVERS[solver]
+    max_evaluations = 2 * NEIGHBOURHOOD + 1
+    budget = RecordingBudget(max_evaluations=max_evaluations)
+    states = run(cube, budget)
+
+    assert budget.stop_reason == "evaluations"
+    assert max_evaluations <= budget.evaluations < max_evaluations + step
+    # Out of budget, the search ends on the best state it found
+    assert states.values[-1] == states.values.max()
+
+
+@pytest.mark.parametrize("solver", SOLVERS)
+def test_time_limit(solver, cube):
+    run, _ = SOLVERS[solver]
+    budget = RecordingBudget(time_limit=0)
+    states = run(cube, budget)
+
+    assert budget.stop_reason == "deadline"
+    assert budget.checks == 1
+    assert states.values[-1] == states.values.max()
+
+
+@pytest.mark.parametrize("solver", SOLVERS)
+def test_cancelled(solver, cube):
+    run, _ = SOLVERS[solver]
+    budget = RecordingBudget()
+    budget.cancel()
+    states = run(cube, budget)
+
+    assert budget.stop_reason == "cancelled"
+    assert budget.checks == 1
+    assert np.array_equal(states[0].data, cube.data)
+
+
+def test_genetic_counts_every_individual(cube):
+    solver = GeneticAlgorithm(cube, 5, 10**6, 20)
+    solver.monitor = SearchMonitor(budget=SearchBudget(max_evaluations=220))
+    solver.genetic_algorithm()
+
+    # The initial population, then both children of every pair of parents per generation
+    assert solver.evaluations == 220
+    assert solver.generations == 5
+
+
+def test_random_restart_stops_within_a_restart(cube):
+    solver = RandomRestartHillClimbing(5, 50, 10**6, cube.data, seed=0, candidate_list=False)
+    solver.monitor = SearchMonitor(budget=SearchBudget(max_evaluations=NEIGHBOURHOOD + 1))
+    _, _, iteration_per_restart, restarts = solver.run()
+
+    # A full scan per iteration, the first restart stops on its second iteration
+    assert restarts == 1
+    assert iteration_per_restart == [2]
+
+
+def test_parallel_random_restart_shares_the_budget(cube):
+    budget = RecordingBudget(max_evaluations=2 * NEIGHBOURHOOD + 1)
+    states = run_random_restart(cube, budget, workers=2)
+
+    assert budget.stop_reason == "evaluations"
+    # Each worker may finish the scan it started once the shared budget is spent
+    assert budget.evaluations < budget.max_evaluations + 2 * NEIGHBOURHOOD
+    assert states.values[-1] == states.values.max()
@@ -0,0 +1,96 @@
+from algorithm.objective_function import OBJECTIVES
+from algorithm.simulated_annealing import SimulatedAnnealing
+from data_structure.magic_cube import MagicCube
+
+import numpy as np
+import pytest
+import random
+
+
+def make_annealing(objective: str, seed: int = 0, **kwargs) -> SimulatedAnnealing:
+    np.random.seed(seed)
+    return SimulatedAnnealing(MagicCube(5), 5, objective=objective, **kwargs)
+
+
+def score_changes(annealing: SimulatedAnnealing) -> np.ndarray:
+    """
+    The absolute score change of every swap of the working cube that changes the score.
+    """
+    evaluator = annealing.cube.get_evaluator(annealing.OBJECTIVE)
+    changes = np.abs(evaluator.neighbour_scores() - evaluator.score)
+    return changes[changes != 0]
+
+
+def test_count_scale_is_one_line():
+    annealing = make_annealing("count")
+    assert annealing.TEMPERATURE_SCALE == 1
+    assert annealing.INITIAL_TEMPERATURE == pytest.approx(2 / np.log(2))
+    assert annealing.FINAL_TEMPERATURE == pytest.approx(0.1)
+
+
+@pytest.mark.parametrize("objective", [objective for objective in OBJECTIVES if objective != "count"])
+def test_graded_scale_follows_the_smallest_score_changes(objective):
+    for seed in range(3):
+        annealing = make_annealing(objective, seed)
+        changes = score_changes(annealing)
+        # The sampled quantile lies among the smallest score changes of the whole neighbourhood
+        assert np.quantile(changes, 0.001) <= annealing.TEMPERATURE_SCALE <= np.quantile(changes, 0.1)
+        assert annealing.INITIAL_TEMPERATURE == pytest.approx(2 / np.log(2) * annealing.TEMPERATURE_SCALE)
+        assert annealing.FINAL_TEMPERATURE == pytest.approx(0.1 * annealing.TEMPERATURE_SCALE)
+
+
+def test_graded_scales_are_ordered():
+    # A squared deviation changes more than an absolute one, which changes more than a line count
+    scales = [make_annealing(objective).TEMPERATURE_SCALE for objective in ("count", "absolute", "squared")]
+    assert scales == sorted(scales)
+    assert scales[0] < scales[2]
+
+
+def test_parallel_tempering_ladder_uses_the_scale():
+    annealing = make_annealing("squared", record=False)
+    annealing.MAX_TIME = 400
+    annealing.parallel_tempering(replicas=3, min_temperature=0.1, max_temperature=0.4)
+    scale = annealing.TEMPERATURE_SCALE
+    assert annealing.temperatures == pytest.approx([0.1 * scale, 0.2 * scale, 0.4 * scale])
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_calibration_keeps_the_temperature_range(objective):
+    annealing = make_annealing(objective)
+    ratio = annealing.FINAL_TEMPERATURE / annealing.INITIAL_TEMPERATURE
+    temperature = annealing.calibrate_temperature()
+
+    assert annealing.INITIAL_TEMPERATURE == temperature
+    assert annealing.FINAL_TEMPERATURE / annealing.INITIAL_TEMPERATURE == pytest.approx(ratio)
+    # A small worsening swap is accepted with CALIBRATION_ACCEPTANCE at the start
+    changes = score_changes(annealing)
+    small = temperature * -np.log(annealing.CALIBRATION_ACCEPTANCE)
+    assert np.quantile(changes, 0.001) <= small <= np.quantile(changes, 0.1)
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_calibrated_run_stays_in_the_calibrated_range(tmp_path, objective):
+    annealing = make_annealing(objective, record_path=str(tmp_path / "run.traj"), schedule="geometric",
+                               calibrate=True)
+    annealing.MAX_TIME = 2000
+    annealing.simulated_annealing()
+
+    temperatures = np.asarray(annealing.get_states().temperatures[1:])
+    assert len(temperatures) > 0
+    assert temperatures.min() >= annealing.FINAL_TEMPERATURE * (1 - 1e-5)
+    assert temperatures.max() <= annealing.INITIAL_TEMPERATURE * (1 + 1e-5)
+
+
+def test_recorded_probabilities_are_read_in_chunks(tmp_path):
+    probabilities = []
+    for chunk in (SimulatedAnnealing.RECORD_CHUNK, 7):
+        random.seed(1)
+        annealing = make_annealing("count", seed=1, record_path=str(tmp_path / f"run{chunk}.traj"))
+        annealing.MAX_TIME = 20000
+        annealing.RECORD_CHUNK = chunk
+        annealing.simulated_annealing()
+        probabilities.append(annealing.get_probability_per_iteration())
+
+    assert len(probabilities[0]) > 0
+    assert np.array_equal(probabilities[0], probabilities[1])
+    assert ((probabilities[0] > 0) & (probabilities[0] <= 1)).all()
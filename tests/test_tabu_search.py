@@ -0,0 +1,46 @@
+from algorithm.tabu_search import TabuSearch
+from data_structure.magic_cube import MagicCube
+
+import numpy as np
+import pytest
+
+
+def run(attribute: str, tenure: int, iterations: int = 40, seed: int = 0) -> tuple[TabuSearch, np.ndarray]:
+    """
+    Run a tabu search on a 3x3x3 cube, which has no perfect magic cube so the search never stops early.
+
+    :return: The search and the swap of every move, in order
+    """
+    np.random.seed(seed)
+    tabu = TabuSearch(MagicCube(3, np.random.permutation(27) + 1), iterations, tenure, attribute)
+    states, moves = tabu.tabu_search()
+    assert moves == iterations
+    # The swaps of the moves, without the best state appended at the end
+    return tabu, np.sort(np.asarray(states.swaps[1:moves + 1]), axis=1)
+
+
+@pytest.mark.parametrize("attribute", TabuSearch.ATTRIBUTES)
+@pytest.mark.parametrize("tenure", [1, 3])
+def test_undone_move_is_tabu(attribute, tenure):
+    for seed in range(5):
+        _, swaps = run(attribute, tenure, seed=seed)
+        # Undoing the last move goes back to a state no better than the best, aspiration never allows it
+        assert not (swaps[1:] == swaps[:-1]).all(axis=1).any()
+
+
+@pytest.mark.parametrize("tenure", [1, 3])
+def test_swapped_cells_are_tabu_for_tenure_iterations(tenure):
+    for seed in range(5):
+        tabu, swaps = run("cell", tenure, seed=seed)
+        reused = 0
+        for k in range(1, len(swaps)):
+            recent = swaps[max(0, k - tenure):k]
+            reused += bool(np.isin(swaps[k], recent).any())
+        # Only a move beating the best score may swap a tabu cell
+        assert reused <= tabu.get_aspirations()
+
+
+def test_cells_are_allowed_again_after_the_tenure():
+    # With every cell tabu for most of the run, the search still makes a move on every iteration
+    tabu, swaps = run("cell", 12, iterations=60)
+    assert len(swaps) == 60
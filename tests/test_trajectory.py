@@ -0,0 +1,150 @@
+from algorithm.simulated_annealing import SimulatedAnnealing
+from data_structure.magic_cube import MagicCube
+from data_structure.trajectory import Trajectory
+from data_structure.trajectory_file import TrajectoryFile, TrajectoryRecorder
+
+import numpy as np
+import pytest
+import random
+
+
+def random_walk(size: int = 3, steps: int = 250, seed: int = 0) -> list[tuple[MagicCube, int, tuple[int, int] | None]]:
+    """
+    A sequence of states, mostly one swap away from the previous state, with a few jumps to a random cube.
+
+    :return: Every state, its objective value and the swap leading to it (None for a jump)
+    """
+    rng = np.random.default_rng(seed)
+    cube = MagicCube(size, rng.permutation(size**3) + 1)
+    walk = [(cube.copy(), cube.get_state_value(), None)]
+    for step in range(steps):
+        if step % 97 == 96:
+            cube = MagicCube(size, rng.permutation(size**3) + 1)
+            walk.append((cube.copy(), cube.get_state_value(), None))
+            continue
+        i, j = rng.choice(size**3, size=2, replace=False).tolist()
+        cube.swap_index(i, j)
+        walk.append((cube.copy(), cube.get_state_value(), (i, j)))
+    return walk
+
+
+def assert_states_equal(states, walk) -> None:
+    assert len(states) == len(walk)
+    assert np.array_equal(states.values, [value for _, value, _ in walk])
+    assert np.array_equal(states.swaps, [swap if swap is not None else (-1, -1) for _, _, swap in walk])
+    # Forward replay, then random access from the keyframes
+    for state, (cube, _, _) in zip(states, walk):
+        assert np.array_equal(state.data, cube.data)
+    for index in np.random.default_rng(1).permutation(len(walk)).tolist():
+        assert np.array_equal(states[index].data, walk[index][0].data)
+    assert np.array_equal(states[-1].data, walk[-1][0].data)
+
+
+@pytest.mark.parametrize("keyframe_interval", [1, 10, 1000])
+def test_trajectory_replays_the_states(keyframe_interval):
+    walk = random_walk()
+    states = Trajectory(walk[0][0], walk[0][1], keyframe_interval)
+    for cube, value, swap in walk[1:]:
+        if swap is None:
+            states.append(cube, value)
+        else:
+            states.append_swap(*swap, value)
+
+    assert_states_equal(states, walk)
+    with pytest.raises(IndexError):
+        states[len(walk)]
+
+
+@pytest.mark.parametrize("keyframe_interval, chunk_size", [(1, 16), (10, 7), (1000, 4096)])
+def test_trajectory_file_round_trip(tmp_path, keyframe_interval, chunk_size):
+    walk = random_walk()
+    path = str(tmp_path / "run.traj")
+    temperatures = np.linspace(2, 0.1, len(walk), dtype=np.float32)
+    with TrajectoryRecorder(path, walk[0][0], walk[0][1], keyframe_interval, chunk_size) as recorder:
+        for (cube, value, swap), temperature in zip(walk[1:], temperatures[1:]):
+            if swap is None:
+                recorder.append(cube, value, temperature)
+            else:
+                recorder.append_swap(*swap, value, temperature)
+        assert len(recorder) == len(walk)
+
+    states = TrajectoryFile(path)
+    assert_states_equal(states, walk)
+    assert np.isnan(states.temperatures[0])
+    assert np.array_equal(states.temperatures[1:], temperatures[1:])
+
+
+def test_trajectory_file_matches_trajectory(tmp_path):
+    walk = random_walk(size=5, steps=500, seed=2)
+    in_memory = Trajectory(walk[0][0], walk[0][1])
+    recorder = TrajectoryRecorder(str(tmp_path / "run.traj"), walk[0][0], walk[0][1])
+    for cube, value, swap in walk[1:]:
+        if swap is None:
+            in_memory.append(cube, value)
+            recorder.append(cube, value)
+        else:
+            in_memory.append_swap(*swap, value)
+            recorder.append_swap(*swap, value)
+    on_disk = recorder.close()
+
+    assert np.array_equal(on_disk.values, in_memory.values)
+    assert np.array_equal(on_disk.swaps, in_memory.swaps)
+    for from_disk, from_memory in zip(on_disk, in_memory):
+        assert np.array_equal(from_disk.data, from_memory.data)
+
+
+def test_recorded_annealing_matches_in_memory_run(tmp_path):
+    cube = MagicCube(3, np.random.default_rng(3).permutation(27) + 1)
+    runs = []
+    for record_path in (None, str(tmp_path / "annealing.traj")):
+        random.seed(4)
+        annealing = SimulatedAnnealing(cube, 3, record_path)
+        annealing.MAX_TIME = 3000
+        annealing.simulated_annealing()
+        runs.append(annealing)
+    in_memory, recorded = runs
+
+    assert isinstance(recorded.get_states(), TrajectoryFile)
+    assert np.array_equal(recorded.get_states().values, in_memory.get_states().values)
+    assert np.array_equal(recorded.get_states().swaps, in_memory.get_states().swaps)
+    assert np.array_equal(recorded.get_states()[-1].data, in_memory.cube.data)
+    assert recorded.get_states()[-1].get_state_value() == in_memory.objective
+
+
+def test_trajectory_file_reads_flushed_states_while_recording(tmp_path):
+    walk = random_walk(steps=50)
+    path = str(tmp_path / "run.traj")
+    recorder = TrajectoryRecorder(path, walk[0][0], walk[0][1], keyframe_interval=8, chunk_size=1024)
+    for cube, value, swap in walk[1:]:
+        if swap is None:
+            recorder.append(cube, value)
+        else:
+            recorder.append_swap(*swap, value)
+    recorder.flush()
+
+    assert_states_equal(TrajectoryFile(path), walk)
+    recorder.close()
+
+
+def test_trajectory_file_swaps_are_a_view(tmp_path):
+    walk = random_walk()
+    recorder = TrajectoryRecorder(str(tmp_path / "run.traj"), walk[0][0], walk[0][1])
+    for cube, value, swap in walk[1:]:
+        if swap is None:
+            recorder.append(cube, value)
+        else:
+            recorder.append_swap(*swap, value)
+    states = recorder.close()
+
+    swaps = states.swaps
+    assert swaps.shape == (len(walk), 2)
+    # The swaps are read from the memory-mapped records, not copied into a new array on every access
+    assert np.shares_memory(swaps, states.swaps)
+    assert not swaps.flags.writeable
+
+
+def test_trajectory_file_rejects_other_files(tmp_path):
+    path = tmp_path / "other.traj"
+    path.write_bytes(b"not a trajectory")
+    with pytest.raises(ValueError):
+        TrajectoryFile(str(path))
@@ -0,0 +1,75 @@
+from data_structure.line_table import get_swap_pairs
+from data_structure.magic_cube import MagicCube
+from data_structure.zobrist_hash import ZobristHash, get_zobrist_table
+
+import numpy as np
+import pytest
+
+
+def fresh_hash(cube: MagicCube) -> int:
+    """
+    The hash of a cube computed from scratch, the XOR of the keys of every (cell, value) pair.
+    """
+    table = get_zobrist_table(cube.size)
+    value = 0
+    for cell, cube_value in enumerate(cube.data.tolist()):
+        value ^= int(table[cell, cube_value])
+    return value
+
+
+@pytest.mark.parametrize("size", [3, 5])
+def test_swap_matches_fresh_hash(size):
+    rng = np.random.default_rng(size)
+    cube = MagicCube(size, rng.permutation(size**3) + 1)
+    zobrist = ZobristHash(cube)
+    assert zobrist.value == fresh_hash(cube)
+
+    for i, j in rng.integers(0, size**3, size=(200, 2)).tolist():
+        expected = zobrist.swap_hash(i, j)
+        # The update is the same before or after the data is swapped
+        if i % 2:
+            cube.swap_index(i, j)
+            assert zobrist.swap(i, j) == expected
+        else:
+            assert zobrist.swap(i, j) == expected
+            cube.swap_index(i, j)
+        assert zobrist.value == fresh_hash(cube)
+
+
+def test_swap_hashes_match_fresh_hashes():
+    rng = np.random.default_rng(0)
+    cube = MagicCube(3, rng.permutation(27) + 1)
+    zobrist = ZobristHash(cube)
+    first, second = get_swap_pairs(3)
+
+    hashes = zobrist.swap_hashes(first, second)
+    for k, (i, j) in enumerate(zip(first.tolist(), second.tolist())):
+        swapped = cube.copy()
+        swapped.swap_index(i, j)
+        assert int(hashes[k]) == fresh_hash(swapped) == zobrist.swap_hash(i, j)
+
+
+def test_swapping_back_restores_the_hash():
+    cube = MagicCube(5, np.random.default_rng(1).permutation(125) + 1)
+    zobrist = ZobristHash(cube)
+    start = zobrist.value
+    zobrist.swap(3, 70)
+    cube.swap_index(3, 70)
+    assert zobrist.value != start
+    zobrist.swap(3, 70)
+    cube.swap_index(3, 70)
+    assert zobrist.value == start
+
+
+def test_distinct_states_have_distinct_hashes():
+    cube = MagicCube(3, np.random.default_rng(2).permutation(27) + 1)
+    hashes = ZobristHash(cube).swap_hashes(*get_swap_pairs(3))
+    assert len(np.unique(hashes)) == len(hashes)
+
+
+def test_refresh_after_direct_changes():
+    cube = MagicCube(5, np.random.default_rng(3).permutation(125) + 1)
+    zobrist = ZobristHash(cube)
+    cube.randomize()
+    zobrist.refresh()
+    assert zobrist.value == fresh_hash(cube)